@@ -0,0 +1,190 @@
+"""Benchmark the validation rules on synthetic data.
+
+Every rule of the config runs on its own through ValidateDatasetController, in
+a fresh process so its peak RSS is its own. Wall time, peak RSS and features
+per second of each rule are written to a JSON results file, which can be
+compared with the results of another commit:
+
+    uv run python benchmarks/run_benchmarks.py --sizes 10000 100000 --output results.json
+    uv run python benchmarks/run_benchmarks.py --compare results-main.json results.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from synthetic import write_dataset
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tools import TopoValidatorSettings
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "default_config.json"
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the validation rules on synthetic data")
+    parser.add_argument("--config-file", default=str(CONFIG_PATH), help="Validation config with the rules to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000], help="Features per layer (default: 10000)")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["gpkg", "parquet"],
+        help="gpkg, parquet and/or a PostgreSQL URL, whose tables are replaced (default: gpkg parquet)",
+    )
+    parser.add_argument(
+        "--overlap", type=float, default=0.05, help="Fraction of features breaking the rules (default: 0.05)"
+    )
+    parser.add_argument("--rules", nargs="+", help="Only run these rule families, layer names or table.column")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two results files and exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the output of the validation runs")
+    return parser.parse_args()
+
+
+def rule_name(rule: dict) -> str:
+    """Layer name of a rule, or table.column for attribute rules which have none"""
+    return str(rule.get("layername") or f"{rule['table']}.{rule['column']}")
+
+
+def config_rules(config: dict, selected: list[str] | None) -> list[tuple[str, dict]]:
+    return [
+        (family, rule)
+        for family, rules in config.items()
+        for rule in rules
+        if not selected or family in selected or rule_name(rule) in selected
+    ]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_rule(family: str, rule: dict, db_path: str, output_dir: str, verbose: bool) -> dict[str, Any]:
+    """Validate one rule in this process, returns its wall time, phase times and the peak RSS of the process"""
+    os.makedirs(output_dir, exist_ok=True)
+    config_file = os.path.join(output_dir, "config.json")
+    with open(config_file, "w") as f:
+        json.dump({family: [rule]}, f)
+    settings = TopoValidatorSettings(validation_config_file=config_file, db_path=db_path, output_dir=output_dir)
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output:
+        ValidateDatasetController(settings).run_validation()
+    seconds = time.perf_counter() - start
+    with open(os.path.join(output_dir, "validation_summary_report.json")) as f:
+        metrics = json.load(f)["metrics"]
+    return {"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "phases": metrics[0]["phases"] if metrics else {}}
+
+
+def run_benchmarks(args: argparse.Namespace) -> list[dict[str, Any]]:
+    with open(args.config_file) as f:
+        config = json.load(f)
+    rules = config_rules(config, args.rules)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for file_format in args.formats:
+                source = "postgis" if file_format.startswith("postgresql") else file_format
+                data_dir = os.path.join(workdir, f"{source}_{size}")
+                print(f"Writing {size} features per layer as {source}...", flush=True)
+                db_path = write_dataset(config, size, args.overlap, file_format, data_dir)
+
+                for index, (family, rule) in enumerate(rules):
+                    # One process per rule, spawned so it starts with nothing loaded
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        measured = pool.submit(
+                            run_rule, family, rule, db_path, os.path.join(workdir, f"out_{index}"), args.verbose
+                        ).result()
+                    result = {
+                        "format": source,
+                        "size": size,
+                        "overlap": args.overlap,
+                        "family": family,
+                        "rule": rule_name(rule),
+                        "table": rule["table"],
+                        "seconds": round(measured["seconds"], 4),
+                        "peak_rss_mb": round(measured["peak_rss_mb"], 1),
+                        "features_per_second": round(size / measured["seconds"]),
+                        "phases": measured["phases"],
+                    }
+                    print(
+                        f"{source:8} {size:>9} {family:32} {result['rule']:45} "
+                        f"{result['seconds']:9.3f}s {result['peak_rss_mb']:8.1f} MB "
+                        f"{result['features_per_second']:>10} features/s",
+                        flush=True,
+                    )
+                    results.append(result)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_file: str, new_file: str) -> None:
+    """Print the wall time and peak RSS of every rule in both results files"""
+    with open(base_file) as f:
+        base = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+
+    def key(result: dict) -> tuple:
+        return (result["format"], result["size"], result["overlap"], result["family"], result["rule"])
+
+    base_results = {key(result): result for result in base["results"]}
+    print(f"base {base.get('commit')} -> new {new.get('commit')}")
+    for result in new["results"]:
+        before = base_results.get(key(result))
+        if before is None:
+            continue
+        print(
+            f"{result['format']:8} {result['size']:>9} {result['rule']:45} "
+            f"{before['seconds']:9.3f}s -> {result['seconds']:9.3f}s ({result['seconds'] / before['seconds']:5.2f}x) "
+            f"{before['peak_rss_mb']:8.1f} -> {result['peak_rss_mb']:8.1f} MB"
+        )
+
+
+def main() -> None:
+    args = parse_arguments()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run_benchmarks(args)
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": git_commit(),
+                "created": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            },
+            f,
+            indent=4,
+        )
+    print(f"Results written to {args.output}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Synthetic layers for the tables of a validation config.
+
+Every layer has one feature per cell of the same square grid, so the layers
+relate to each other like real topographic data: points at the cell centres
+lie in the polygons, lines along the middle of a cell lie on the other lines.
+``overlap`` is the fraction of features displaced to break a rule: polygons
+are enlarged over their neighbours, points and lines are moved off the
+features of the other layers.
+"""
+
+import math
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import box, linestrings, points
+from topographic_validation.validators.arrow_filters import KEYWORDS
+from topographic_validation.validators.base import SQL_STRING_LITERAL, referenced_identifiers
+from topographic_validation.validators.postgis import get_engine
+
+CRS = 2193
+# Lower left corner of the grid, in the middle of New Zealand in EPSG:2193
+ORIGIN = (1_500_000.0, 5_000_000.0)
+CELL_SIZE = 100.0
+
+# Tables of point features whose names do not end in _point
+POINT_TABLES = {"descriptive_text", "geographic_name"}
+
+# Config sections relating two tables
+TWO_TABLE_RULES = (
+    "feature_not_on_layers",
+    "feature_in_layers",
+    "line_not_on_feature_layers",
+    "line_not_touches_feature_layers",
+    "feature_not_contains_layers",
+)
+
+
+def geometry_kind(table: str) -> str:
+    if table.endswith("_point") or table in POINT_TABLES:
+        return "point"
+    if table.endswith("_line"):
+        return "line"
+    return "polygon"
+
+
+def config_tables(config: dict) -> dict[str, dict[str, list[str]]]:
+    """The tables used by the rules of a config, with the string values their expressions compare columns to"""
+    tables: dict[str, dict[str, list[str]]] = {}
+    for section, rules in config.items():
+        for rule in rules:
+            expressions = [rule.get("where"), rule.get("rule")]
+            if section in ("null_columns", "query_rules"):
+                expressions.append(rule["column"])
+            columns = tables.setdefault(rule["table"], {})
+            literals = [
+                literal[1:-1]
+                for expression in expressions
+                if expression
+                for literal in SQL_STRING_LITERAL.findall(expression)
+            ]
+            for column in referenced_identifiers(expressions):
+                if column.upper() in KEYWORDS:
+                    continue
+                columns.setdefault(column, [])
+                columns[column] += [value for value in literals if value not in columns[column]]
+            if section in TWO_TABLE_RULES:
+                tables.setdefault(rule["intersection_table"], {})
+    return tables
+
+
+def synthetic_layer(
+    table: str, columns: dict[str, list[str]], size: int, overlap: float, seed: int
+) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(seed)
+    grid = math.ceil(math.sqrt(size))
+    index = np.arange(size)
+    minx = ORIGIN[0] + (index % grid) * CELL_SIZE
+    miny = ORIGIN[1] + (index // grid) * CELL_SIZE
+    broken = rng.random(size) < overlap
+
+    kind = geometry_kind(table)
+    geometry: object
+    if kind == "polygon":
+        # Broken polygons reach half way into their neighbours
+        side = np.where(broken, CELL_SIZE * 1.5, CELL_SIZE)
+        geometry = box(minx, miny, minx + side, miny + side)
+    elif kind == "point":
+        offset = np.where(broken, CELL_SIZE * 0.75, CELL_SIZE / 2)
+        geometry = points(minx + offset, miny + offset)
+    else:
+        y = miny + np.where(broken, CELL_SIZE * 0.75, CELL_SIZE / 2)
+        coords = np.stack([np.stack([minx + 10, y], axis=1), np.stack([minx + CELL_SIZE - 10, y], axis=1)], axis=1)
+        geometry = linestrings(coords)
+
+    attributes: dict[str, object] = {
+        "id": index + 1,
+        "name": [f"{table} {i}" for i in index],
+        "feature_type": table,
+        "updated_at": "2026-01-01T00:00:00",
+    }
+    for column, values in columns.items():
+        if column in attributes:
+            continue
+        # Compared values, another value and nulls, so every where condition and rule selects some features
+        choices = np.array([*values, "other", None], dtype=object)
+        attributes[column] = choices[rng.integers(0, len(choices), size)]
+    return gpd.GeoDataFrame(attributes, geometry=geometry, crs=CRS)
+
+
+def write_dataset(config: dict, size: int, overlap: float, file_format: str, path: str, seed: int = 0) -> str:
+    """Write a synthetic layer for every table of config, returns the db path to validate"""
+    tables = config_tables(config)
+    layers = {
+        table: synthetic_layer(table, columns, size, overlap, seed + i)
+        for i, (table, columns) in enumerate(tables.items())
+    }
+    if file_format == "gpkg":
+        os.makedirs(path, exist_ok=True)
+        gpkg = os.path.join(path, "data.gpkg")
+        for table, gdf in layers.items():
+            gdf.to_file(gpkg, layer=table, driver="GPKG", use_arrow=True)
+        return gpkg
+    if file_format == "parquet":
+        os.makedirs(path, exist_ok=True)
+        for table, gdf in layers.items():
+            gdf.to_parquet(os.path.join(path, f"{table}.parquet"), write_covering_bbox=True)
+        return os.path.join(path, "files.parquet")
+    # A PostGIS database URL
+    write_postgis(layers, file_format)
+    return file_format
+
+
+def write_postgis(layers: dict[str, gpd.GeoDataFrame], db_url: str) -> None:
+    """Replace the tables in the database, copied in as EWKB with a primary key and a spatial index"""
+    connection = get_engine(db_url).raw_connection()
+    try:
+        assert connection.driver_connection is not None
+        with connection.driver_connection.cursor() as cursor:
+            for table, gdf in layers.items():
+                columns = [column for column in gdf.columns if column != "geometry"]
+                definitions = ", ".join(
+                    "id integer PRIMARY KEY" if column == "id" else f"{column} text" for column in columns
+                )
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(f"CREATE TABLE {table} ({definitions}, geom geometry(Geometry, {CRS}))")
+                ewkb = shapely.to_wkb(shapely.set_srid(gdf.geometry.values, CRS), hex=True, include_srid=True)
+                with cursor.copy(f"COPY {table} ({', '.join(columns)}, geom) FROM STDIN") as copy:
+                    for row in zip(*(gdf[column].tolist() for column in columns), ewkb, strict=True):
+                        copy.write_row(row)
+                cursor.execute(f"CREATE INDEX ON {table} USING GIST (geom)")
+        connection.commit()
+    finally:
+        connection.close()
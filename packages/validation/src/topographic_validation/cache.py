@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from geopandas.sindex import SpatialIndex
+
+# Sources whose bbox reads return the features intersecting the bbox, the others those whose envelope does
+EXACT_BBOX_SOURCES = ("gpkg",)
+
+# Rough size of a shapely geometry object and its GEOS structure, excluding coordinates
+GEOMETRY_OVERHEAD_BYTES = 112
+COORDINATE_BYTES = 16
+
+
+def estimate_nbytes(gdf: gpd.GeoDataFrame) -> int:
+    """Estimate the memory held by a GeoDataFrame, including its geometries"""
+    nbytes = 0
+    for name, column in gdf.items():
+        if isinstance(column, gpd.GeoSeries):
+            coordinates = shapely.get_num_coordinates(column.values).sum()
+            nbytes += len(column) * GEOMETRY_OVERHEAD_BYTES + int(coordinates) * COORDINATE_BYTES
+        else:
+            nbytes += int(gdf[name].memory_usage(deep=True, index=False))
+    return nbytes
+
+
+class CachedDataset:
+    """A dataset held by the DatasetCache together with its spatial index"""
+
+    def __init__(self, gdf: gpd.GeoDataFrame, nbytes: int) -> None:
+        self.gdf = gdf
+        self.nbytes = nbytes
+
+    @property
+    def sindex(self) -> SpatialIndex:
+        # geopandas keeps the STRtree on the geometry array, so every rule sharing
+        # this GeoDataFrame shares one tree and it is only built once
+        return self.gdf.sindex
+
+
+class DatasetCache:
+    """Run-scoped LRU cache of datasets read by the validators.
+
+    Entries are keyed by (source, db_url, table, where, bbox, columns) and evicted
+    least recently used first once the estimated memory exceeds ``max_bytes``.
+    A read of a frozenset of columns is also served by an entry of the same
+    read with more columns, or all of them (None). With ``clip_to_bbox`` a read
+    within a bbox is also served by the same read of the whole table, clipped
+    with its spatial index.
+    Datasets are shared between validators, so they must never be mutated.
+    """
+
+    def __init__(self, max_bytes: int | None = None, clip_to_bbox: bool = False) -> None:
+        self.max_bytes = max_bytes
+        self.clip_to_bbox = clip_to_bbox
+        self.entries: OrderedDict[Hashable, CachedDataset] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> CachedDataset | None:
+        if key not in self.entries:
+            key = self.covering_key(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.clipped(key) if self.clip_to_bbox else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def clipped(self, key: Hashable) -> CachedDataset | None:
+        """The features within the bbox of key from the cached read of the whole table, not cached itself"""
+        if not isinstance(key, tuple) or len(key) != 6 or key[4] is None:
+            return None
+        source, db_url, table, where, bbox, columns = key
+        whole_key = self.covering_key((source, db_url, table, where, None, columns))
+        whole = self.entries.get(whole_key)
+        if whole is None:
+            return None
+        self.entries.move_to_end(whole_key)
+        predicate = "intersects" if source in EXACT_BBOX_SOURCES else None
+        positions = np.sort(whole.sindex.query(shapely.box(*bbox), predicate=predicate))
+        gdf = whole.gdf.iloc[positions].reset_index(drop=True)
+        return CachedDataset(gdf, estimate_nbytes(gdf))
+
+    def covering_key(self, key: Hashable) -> Hashable:
+        """Key of a cached entry holding at least the columns of key, or key itself"""
+        if not isinstance(key, tuple) or not key or not isinstance(key[-1], frozenset):
+            return key
+        for cached_key in self.entries:
+            if (
+                isinstance(cached_key, tuple)
+                and len(cached_key) == len(key)
+                and cached_key[:-1] == key[:-1]
+                and (cached_key[-1] is None or cached_key[-1] >= key[-1])
+            ):
+                return cached_key
+        return key
+
+    def put(self, key: Hashable, gdf: gpd.GeoDataFrame) -> CachedDataset:
+        entry = CachedDataset(gdf, estimate_nbytes(gdf))
+        if self.max_bytes is not None and entry.nbytes > self.max_bytes:
+            # Too large to ever fit, hand it back without evicting everything else
+            return entry
+
+        self.discard(key)
+        self.entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.max_bytes is not None and self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+        return entry
+
+    def get_or_read(self, key: Hashable, read: Callable[[], gpd.GeoDataFrame]) -> CachedDataset:
+        entry = self.get(key)
+        if entry is None:
+            entry = self.put(key, read())
+        return entry
+
+    def discard(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def discard_table(self, source: str, db_url: str, table: str) -> None:
+        """Drop every read of a table, once it has changed"""
+        for key in [key for key in self.entries if isinstance(key, tuple) and key[:3] == (source, db_url, table)]:
+            self.discard(key)
+
+    def stats(self) -> dict[str, int | None]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    @staticmethod
+    def combine_stats(all_stats: list[dict[str, int | None]]) -> dict[str, int | None]:
+        """Sum the stats of the caches of several worker processes"""
+        combined: dict[str, int | None] = {
+            key: sum(stats[key] or 0 for stats in all_stats)
+            for key in ("hits", "misses", "evictions", "entries", "bytes")
+        }
+        combined["max_bytes"] = all_stats[0]["max_bytes"]
+        combined["workers"] = len(all_stats)
+        return combined
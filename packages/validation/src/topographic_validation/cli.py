@@ -6,11 +6,13 @@ on geospatial datasets (PostGIS, GeoPackage, or Parquet files).
 """
 
 import argparse
+import importlib.util
 import os
 import sys
 from datetime import datetime
 
 from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.server import serve
 from topographic_validation.tools import TopoValidatorSettings
 
 
@@ -51,7 +53,9 @@ Examples:
 
     parser.add_argument("--config-file", help="Path to validation configuration JSON file")
 
-    parser.add_argument("--output-dir", required=True, help="Output directory for validation results")
+    parser.add_argument(
+        "--output-dir", help="Output directory for validation results, required unless serving or explaining"
+    )
 
     parser.add_argument(
         "--area-crs",
@@ -118,6 +122,116 @@ Examples:
         help="Skip self-intersection validations",
     )
 
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=0,
+        help="Memory budget in MB for datasets shared between rules, 0 disables the cache (default: 0)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes running rules in parallel (default: 1)",
+    )
+
+    parser.add_argument(
+        "--pushdown",
+        action="store_true",
+        default=False,
+        help=(
+            "Run spatial rules as SQL inside PostGIS so only violations are transferred, "
+            "or find their candidate pairs in the rtree of a GeoPackage so only their features are read"
+        ),
+    )
+
+    parser.add_argument(
+        "--binary-copy",
+        action="store_true",
+        default=False,
+        help="Read PostGIS query results through binary COPY rather than read_postgis (psycopg 3 driver only)",
+    )
+
+    parser.add_argument(
+        "--parquet-engine",
+        choices=["pandas", "duckdb"],
+        default="pandas",
+        help="Run the rules of Parquet files in pandas, or as SQL in DuckDB with its spatial extension (default: pandas)",
+    )
+
+    parser.add_argument(
+        "--persist-index",
+        action="store_true",
+        default=False,
+        help=(
+            "Save the spatial index of each intersection table as a packed R-tree next to the data, "
+            "loaded memory-mapped on later runs while the table is unchanged (GeoPackage and Parquet)"
+        ),
+    )
+
+    parser.add_argument(
+        "--tile-size",
+        type=float,
+        default=0,
+        help="Validate in square tiles of this size in area CRS units, 0 disables tiling (default: 0)",
+    )
+
+    parser.add_argument(
+        "--tile-halo",
+        type=float,
+        default=0,
+        help="Extra distance around each tile read with it, in area CRS units (default: 0)",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only validate features edited since the last run of their table, and their neighbours",
+    )
+
+    parser.add_argument(
+        "--state-file",
+        default="./validation_state.json",
+        help="File recording the last run of each table for --incremental (default: ./validation_state.json)",
+    )
+
+    parser.add_argument(
+        "--error-store",
+        help="SQLite file tracking errors between runs, the errors new or resolved since the last run are exported",
+    )
+
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        default=False,
+        help="Stop at the first violation and exit with code 1, nothing is exported",
+    )
+
+    parser.add_argument(
+        "--metrics-jsonl",
+        help="Append the timing and resource metrics of every rule run to this JSON lines file",
+    )
+
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        default=False,
+        help="Print the execution plan with the estimated cost of every rule, without running it",
+    )
+
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        default=False,
+        help="Keep the tables in memory and validate on HTTP requests to --host and --port",
+    )
+
+    parser.add_argument("--host", default="127.0.0.1", help="Address to serve on (default: 127.0.0.1)")
+
+    parser.add_argument("--port", type=int, default=8765, help="Port to serve on (default: 8765)")
+
     # Spatial and temporal filtering
     parser.add_argument(
         "--bbox",
@@ -155,6 +269,46 @@ def validate_arguments(args: argparse.Namespace) -> list[str]:
     if args.config_file and not os.path.exists(args.config_file):
         errors.append(f"Configuration file not found: {args.config_file}")
 
+    if args.cache_max_mb < 0:
+        errors.append("Cache memory budget must not be negative")
+
+    if args.jobs < 1:
+        errors.append("Number of jobs must be at least 1")
+
+    if args.parquet_engine == "duckdb":
+        if args.mode == "postgis" or args.db_path.endswith(".gpkg"):
+            errors.append("The DuckDB engine validates Parquet files")
+        elif importlib.util.find_spec("duckdb") is None:
+            errors.append("The DuckDB engine requires the duckdb package: pip install duckdb")
+
+    if args.tile_size < 0 or args.tile_halo < 0:
+        errors.append("Tile size and halo must not be negative")
+
+    if args.incremental and args.tile_size:
+        errors.append("Incremental validation cannot be combined with tiles")
+
+    if args.fail_fast and args.tile_size:
+        errors.append("Fail-fast validation cannot be combined with tiles")
+
+    if not args.output_dir and not (args.serve or args.explain):
+        errors.append("An output directory is required unless serving or explaining")
+
+    if args.serve:
+        if args.mode == "postgis":
+            errors.append("Serve mode keeps GeoPackage or Parquet tables in memory, not PostGIS")
+        if args.incremental or args.tile_size or args.error_store or args.fail_fast or args.jobs > 1:
+            errors.append(
+                "Serve mode cannot be combined with --incremental, --tile-size, --error-store, --fail-fast or --jobs"
+            )
+        if args.bbox:
+            errors.append("Serve mode takes the bbox of each request, not --bbox")
+
+    if args.error_store:
+        if args.report_only or args.no_export_gpkg or args.fail_fast:
+            errors.append("The error store is updated from the GeoPackage outputs, they must be exported")
+        if args.output_dir and os.path.dirname(os.path.abspath(args.error_store)) == os.path.abspath(args.output_dir):
+            errors.append("The error store must not be in the output directory, its files are removed on every run")
+
     # Validate bounding box
     if args.bbox and len(args.bbox) != 4:
         errors.append("Bounding box must have exactly 4 values: minx miny maxx maxy")
@@ -204,6 +358,19 @@ def setup_settings(args: argparse.Namespace) -> TopoValidatorSettings:
     settings.process_queries = not args.skip_queries
     settings.process_features_on_layer = not args.skip_features_on_layer
     settings.process_self_intersections = not args.skip_self_intersections
+    settings.cache_max_mb = args.cache_max_mb
+    settings.jobs = args.jobs
+    settings.pushdown = args.pushdown
+    settings.binary_copy = args.binary_copy
+    settings.parquet_engine = args.parquet_engine
+    settings.persist_index = args.persist_index
+    settings.tile_size = args.tile_size
+    settings.tile_halo = args.tile_halo
+    settings.incremental = args.incremental
+    settings.state_file = args.state_file
+    settings.error_store = args.error_store
+    settings.metrics_file = args.metrics_jsonl
+    settings.fail_fast = args.fail_fast
 
     # Filtering settings
     if args.bbox:
@@ -254,11 +421,25 @@ def main() -> None:
         if hasattr(settings, "weeks") and settings.weeks:
             print(f"Weeks filter: {settings.weeks}")
 
+    if args.explain:
+        print(ValidateDatasetController(settings).explain(), flush=True)
+        return
+
+    if args.serve:
+        try:
+            serve(settings, args.host, args.port)
+        except KeyboardInterrupt:
+            print("\nServer stopped", flush=True)
+        return
+
     # Run validation
     try:
         print("Starting topology validation...", flush=True)
         controller = ValidateDatasetController(settings)
         controller.run_validation()
+        if settings.fail_fast and controller.failed_rule is not None:
+            print(f"Validation failed: {controller.failed_rule} found a violation", file=sys.stderr)
+            sys.exit(1)
         print("Validation completed successfully!", flush=True)
 
     except KeyboardInterrupt:
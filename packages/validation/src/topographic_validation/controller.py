@@ -1,16 +1,65 @@
 import json
+import multiprocessing
+import os
+import shutil
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
 
+import geopandas as gpd
+
+from topographic_validation.cache import DatasetCache
+from topographic_validation.error_store import ErrorStore
 from topographic_validation.factory import TopologyValidatorFactory
+from topographic_validation.metrics import append_jsonl
+from topographic_validation.output_sink import OutputSink, concat, write_gpkg_layer, write_parquet
+from topographic_validation.planner import ExecutionPlan, RuleTask, TableEstimate, plan_rules
+from topographic_validation.run_state import RunState, utc_timestamp
+from topographic_validation.tiles import Bounds, intersect_bounds, owned_extents, tile_grid, transform_bounds
 from topographic_validation.tools import TopoValidatorSettings, TopoValidatorTools
 
+# Rule family -> log label and run_layer_intersections options
+FEATURE_ON_LAYER_RULES: dict[str, dict[str, Any]] = {
+    "feature_in_layers": {"label": "feature on layer", "options": {"intersect": True}},
+    "feature_not_on_layers": {"label": "feature not on layer", "options": {"intersect": False}},
+    "line_not_on_feature_layers": {
+        "label": "line not on feature layer",
+        "options": {"intersect": False, "buffer_lines": True},
+    },
+    "line_not_touches_feature_layers": {
+        "label": "line not touches feature layer",
+        "options": {"intersect": False, "buffer_lines": False, "predicate": "touches"},
+    },
+    "feature_not_contains_layers": {
+        "label": "feature not contains layer",
+        "options": {"intersect": False, "buffer_lines": False, "predicate": "contains"},
+    },
+}
+
+# Per-rule output folder of parallel workers, inside the output folder
+STAGING_FOLDER = "_staging"
+
+# Tasks run one after the other by a worker, and the tables to release after them
+RuleUnit = tuple[list[RuleTask], list[str]]
+
+_worker_controller: "ValidateDatasetController"
+
 
 class ValidateDatasetController:
     def __init__(self, settings: TopoValidatorSettings) -> None:
         self.settings = settings
         self.summary_report = self.default_validation_summary_dictionary()
-
-    def default_validation_summary_dictionary(self) -> dict[str, bool | str]:
+        self.tile: dict | None = None
+        self.output_sink: OutputSink | None = None
+        # One record per rule run, or per tile of a rule
+        self.rule_metrics: list[dict[str, Any]] = []
+        # The first rule, in config order, that found a violation
+        self.failed_rule: str | None = None
+        self.run_state = RunState(settings.state_file, settings.db_path) if settings.incremental else None
+        # Intersection table -> whether it was edited since its last run
+        self.changed_tables: dict[str, bool] = {}
+
+    def default_validation_summary_dictionary(self) -> dict[str, Any]:
         return {
             "feature_not_on_layers_about": "If True - a feature is found that does not lie on the specified layer.",
             "feature_not_on_layers": False,
@@ -62,239 +111,519 @@ class ValidateDatasetController:
         self.settings.output_dir = folders.prep_output_folder(
             output_dir=self.settings.output_dir, use_date=self.settings.use_date_folder
         )
-        self.validator = TopologyValidatorFactory(self.settings)
+        self.dataset_cache = self.create_dataset_cache()
+        self.validator = TopologyValidatorFactory(self.settings, self.dataset_cache)
         all_processes_start_time = time.time()
-
-        if self.settings.process_queries:
-            print("Processing query rules and null checks...", flush=True)
-            self.run_process_queries()
-
-        if self.settings.process_features_on_layer:
-            print("Processing features on layer checks...", flush=True)
-            self.run_process_features_on_layer()
-
-        if self.settings.process_self_intersections:
-            print("Processing self-intersection checks...", flush=True)
-            self.run_process_self_intersections()
+        started = utc_timestamp()
+        connections_at_start = self.validator.connections_opened()
+
+        config_tasks = self.rule_tasks()
+        self.validator.load_table_metadata(self.rule_tables(config_tasks))
+        if self.settings.jobs > 1:
+            units = self.rule_units(self.plan_rule_tasks(config_tasks))
+        else:
+            # One worker runs the rules in config order, fail-fast stops at the first failing rule of the config
+            units = self.config_units(config_tasks)
+        tasks = [task for unit_tasks, _ in units for task in unit_tasks]
+
+        if self.settings.jobs > 1 and len(tasks) > 1:
+            print(f"Processing {len(tasks)} rules with {self.settings.jobs} workers...", flush=True)
+            cache_stats, connections = self.run_rule_tasks_in_parallel(units, config_tasks)
+        else:
+            print(f"Processing {len(tasks)} rules...", flush=True)
+            # The tables of a group are released after the last of its tasks
+            release_after = {}
+            last = -1
+            for unit_tasks, release in units:
+                last += len(unit_tasks)
+                release_after[last] = release
+            if self.settings.tile_size:
+                # Tiles of a rule write the same outputs, which are merged like those of parallel workers
+                staging_root = os.path.join(self.settings.output_dir, STAGING_FOLDER)
+                results = []
+                for index, (family, rule, tile) in enumerate(tasks):
+                    results.append(self.run_staged_rule(family, rule, tile, os.path.join(staging_root, f"{index:04d}")))
+                    self.release_tables(release_after.get(index, []))
+                self.merge_rule_results(tasks, results)
+                shutil.rmtree(staging_root, ignore_errors=True)
+            else:
+                self.output_sink = OutputSink()
+                for index, (family, rule, _) in enumerate(tasks):
+                    self.run_rule(family, rule)
+                    if self.settings.fail_fast and self.rule_metrics[-1]["violations"]:
+                        print("Fail-fast: stopping at the first rule with a violation", flush=True)
+                        break
+                    self.release_tables(release_after.get(index, []))
+                self.output_sink.flush()
+                self.output_sink = None
+            cache_stats = self.dataset_cache.stats() if self.dataset_cache is not None else None
+            connections = self.validator.connections_opened()
+            if connections is not None and connections_at_start is not None:
+                connections -= connections_at_start
 
         seconds = time.time() - all_processes_start_time
         minutes = seconds / 60
         msg = f"All processes completed. Total time taken: {seconds:.2f} seconds ({minutes:.2f} minutes)"
         self.summary_report["validation_completed_message"] = msg
+        if cache_stats is not None:
+            self.summary_report["dataset_cache"] = cache_stats
+            print("Dataset cache:", cache_stats, flush=True)
+        if connections is not None:
+            print("Database connections opened:", connections, flush=True)
+        if self.settings.error_store:
+            self.update_error_store(started)
+        self.summary_report["metrics"] = self.rule_metrics
+        self.failed_rule = next((record["rule"] for record in self.rule_metrics if record["violations"]), None)
+        if self.settings.fail_fast:
+            self.summary_report["fail_fast"] = {
+                "failed_rule": self.failed_rule,
+                "rules_run": len(self.rule_metrics),
+                "rules": len(tasks),
+            }
+        if self.settings.metrics_file:
+            append_jsonl(
+                self.settings.metrics_file,
+                [{"run_started": started, "db_path": self.settings.db_path, **record} for record in self.rule_metrics],
+            )
         self.write_summary_report(summary_report_file=f"{self.settings.output_dir}/validation_summary_report.json")
+        if self.run_state is not None:
+            # Only the features of the validated tables are selected by their edits
+            tables = [table for _, rule, _ in tasks for table in (rule["table"], rule.get("intersection_table"))]
+            self.run_state.record(list(dict.fromkeys(table for table in tables if table)), started)
+            self.run_state.save()
         print(msg, flush=True)
 
-    def run_process_queries(self) -> None:
-        for null_check in self.settings.null_columns:
-            table = null_check["table"]
-            # export_layername = null_check["table"]
-            where_condition = self.build_where_statement(null_check, self.settings.date, self.settings.weeks)
-            message = null_check.get("message", "")
-
-            print(f"Running null check on {table}, column: {where_condition}", flush=True)
-
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=table,
-                export_layername=table,
-                where_condition=where_condition,
-                message=message,
-            )
-
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
+    def update_error_store(self, run_time: str) -> None:
+        """Record the errors of this run in the error store and export those new or resolved since the last run"""
+        outputs = {}
+        for entry in sorted(os.scandir(self.settings.output_dir), key=lambda entry: entry.name):
+            if entry.name.startswith("topology_") and entry.name.endswith(".gpkg"):
+                for layer in gpd.list_layers(entry.path)["name"]:
+                    outputs[layer] = gpd.read_file(entry.path, layer=layer)
+
+        # A run over part of the data cannot tell which of the other errors are resolved
+        complete = not (self.settings.incremental or self.settings.bbox or self.settings.date or self.settings.weeks)
+        store = ErrorStore(self.settings.error_store)
+        delta = store.update(outputs, self.settings.area_crs, run_time, resolve=complete)
+        self.summary_report["error_store"] = store.counts()
+        print(f"Error store: {len(delta)} errors new or resolved", store.counts(), flush=True)
+        if delta.empty:
+            return
+        if self.settings.export_gpkg:
+            delta.to_file(
+                os.path.join(self.settings.output_dir, "validation_error_delta.gpkg"),
+                layer="error_delta",
+                driver="GPKG",
             )
-            validator.run_null_column_checks(rule_name="null_columns", column_name=null_check["column"])
-            self.summary_report = validator.summary_report
-
-        for query_rule in self.settings.query_rules:
-            table = query_rule["table"]
-            # export_layername = query_rule["table"]
-            where_condition = self.build_where_statement(query_rule, self.settings.date, self.settings.weeks)
-            message = query_rule.get("message", "")
-
-            print(f"Running null check on {table}, column: {where_condition}", flush=True)
-
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=table,
-                export_layername=table,
-                where_condition=where_condition,
-                message=message,
+        if self.settings.export_parquet:
+            delta.to_parquet(
+                os.path.join(self.settings.output_dir, "validation_error_delta.parquet"),
+                engine="pyarrow",
+                compression="zstd",
+                write_covering_bbox=True,
             )
 
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-
-            validator.run_query_rule_checks(
-                rule_name="query_rule",
-                rule=query_rule["rule"],
-                column_name=query_rule["column"],
-            )
-            self.summary_report = validator.summary_report
-
-    def run_process_features_on_layer(self) -> None:
-        for layer in self.settings.feature_in_layers:
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=layer["table"],
-                table2=layer["intersection_table"],
-                export_layername=layer["layername"],
-                where_condition=self.build_where_statement(layer, self.settings.date, self.settings.weeks),
-                message=layer["message"],
-            )
-
-            print(
-                f"Running feature on layer check between {layer['table']} and {layer['intersection_table']}", flush=True
-            )
-
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_layer_intersections(rule_name="feature_in_layers", intersect=True)
-            self.summary_report = validator.summary_report
-
-        for layer in self.settings.feature_not_on_layers:
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=layer["table"],
-                table2=layer["intersection_table"],
-                export_layername=layer["layername"],
-                where_condition=self.build_where_statement(layer, self.settings.date, self.settings.weeks),
-                message=layer["message"],
-            )
-
-            print(
-                f"Running feature not on layer check between {layer['table']} and {layer['intersection_table']}",
-                flush=True,
-            )
-
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_layer_intersections(rule_name="feature_not_on_layers", intersect=False)
-            self.summary_report = validator.summary_report
-
-        for layer in self.settings.line_not_on_feature_layers:
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=layer["table"],
-                table2=layer["intersection_table"],
-                export_layername=layer["layername"],
-                where_condition=self.build_where_statement(layer, self.settings.date, self.settings.weeks),
-                message=layer["message"],
-            )
+    def create_dataset_cache(self) -> DatasetCache | None:
+        """Datasets and spatial indexes are shared by every rule in the run, within the memory budget"""
+        if not self.settings.cache_max_mb:
+            return None
+        return DatasetCache(max_bytes=self.settings.cache_max_mb * 1024 * 1024)
 
-            print(
-                f"Running line not on feature layer check between {layer['table']} and {layer['intersection_table']}",
-                flush=True,
+    def rule_tasks(self) -> list[RuleTask]:
+        """List the (rule family, rule config, tile) tasks to run, in config order grouped by family"""
+        tasks: list[RuleTask] = []
+        if self.settings.process_queries:
+            tasks += [("attribute_rules", group, None) for group in self.attribute_rule_groups()]
+        families: list[str] = []
+        if self.settings.process_features_on_layer:
+            families += list(FEATURE_ON_LAYER_RULES)
+        if self.settings.process_self_intersections:
+            families.append("self_intersect_layers")
+        return tasks + [(family, rule, None) for family in families for rule in getattr(self.settings, family)]
+
+    def plan_rule_tasks(self, tasks: list[RuleTask]) -> ExecutionPlan:
+        """Estimate the cost of every rule from the metadata of its tables, see planner"""
+        tables = self.rule_tables(tasks)
+        self.validator.load_table_metadata(tables)
+        return plan_rules(tasks, {table: self.table_estimate(table) for table in tables}, self.settings.bbox)
+
+    def table_estimate(self, table: str) -> TableEstimate:
+        """Rows and bounds of a table, unknown where its metadata cannot be read"""
+        validator = self.validator.create_validator(summary_report={}, export_validation_data=False, table=table)
+        try:
+            return validator.table_estimate(table)
+        except Exception as e:
+            # The plan is only an ordering, e.g. ST_EstimatedExtent fails on a table never analyzed
+            print(f"Could not estimate the size of {table}, planning it as the largest table: {e}", flush=True)
+            return None, None
+
+    def explain(self) -> str:
+        """The execution plan of a run, without running it"""
+        self.validator = TopologyValidatorFactory(self.settings)
+        return self.plan_rule_tasks(self.rule_tasks()).explain(self.settings.jobs)
+
+    def rule_units(self, plan: ExecutionPlan) -> list[RuleUnit]:
+        """Tasks in the order of the plan, grouped into the units run one after the other by a worker.
+
+        The tiles of a rule run in parallel, each tile is a unit of its own and
+        its tables are left to the cache to evict.
+        """
+        jobs = self.settings.jobs
+        groups = plan.units(jobs) if jobs > 1 else plan.groups
+        units = [
+            ([plan.tasks[index] for index in group.tasks], group.tables if group.release else []) for group in groups
+        ]
+        if not self.settings.tile_size:
+            return units
+        tiled = [(self.tile_tasks(unit_tasks), release) for unit_tasks, release in units]
+        if jobs == 1:
+            return tiled
+        return [([task], []) for unit_tasks, _ in tiled for task in unit_tasks]
+
+    def config_units(self, tasks: list[RuleTask]) -> list[RuleUnit]:
+        """Tasks in config order, each a unit releasing the tables no later task reads"""
+        last_use = {table: index for index, task in enumerate(tasks) for table in self.rule_tables([task])}
+        units = [
+            ([task], [table for table in self.rule_tables([task]) if last_use[table] == index])
+            for index, task in enumerate(tasks)
+        ]
+        if not self.settings.tile_size:
+            return units
+        return [(self.tile_tasks(unit_tasks), release) for unit_tasks, release in units]
+
+    def release_tables(self, tables: list[str]) -> None:
+        """Drop the cached reads of tables no rule still to run reads, to keep the peak memory down"""
+        if self.dataset_cache is None or not tables:
+            return
+        # The cache keys use the source and db_url of the validators
+        validator = self.validator.create_validator(summary_report={}, export_validation_data=False, table=tables[0])
+        for table in tables:
+            self.dataset_cache.discard_table(validator.source, validator.db_url, table)
+
+    def tile_tasks(self, tasks: list[RuleTask]) -> list[RuleTask]:
+        """Split every rule into one task per tile of the extent of its table"""
+        tiles_by_table: dict[str, list[dict]] = {}
+        tiled: list[RuleTask] = []
+        for family, rule, _ in tasks:
+            if rule["table"] not in tiles_by_table:
+                tiles_by_table[rule["table"]] = self.table_tiles(rule["table"])
+            tiled += [(family, rule, tile) for tile in tiles_by_table[rule["table"]]]
+        return tiled
+
+    def table_tiles(self, table: str) -> list[dict]:
+        """Tiles over the extent of a table, clipped to the bbox setting.
+
+        The grid is laid out in area_crs. Each tile reads its core plus the halo,
+        in the CRS of the data, and reports the results owned by its core. The
+        tiles at the edge of the grid also own the results beyond it, those of
+        features crossing the edge of the bbox.
+        """
+        validator = self.validator.create_validator(summary_report={}, export_validation_data=False, table=table)
+        extent, crs = validator.table_extent(table)
+        if extent is not None and self.settings.bbox:
+            extent = intersect_bounds(extent, tuple(self.settings.bbox))
+        if extent is None:
+            print(f"No features to tile in {table}", flush=True)
+            return []
+
+        size, halo = self.settings.tile_size, self.settings.tile_halo
+        cores = tile_grid(transform_bounds(extent, crs, self.settings.area_crs), size)
+        print(f"Validating {table} in {len(cores)} tiles of {size} x {size}", flush=True)
+        tiles: list[dict] = []
+        for core, owned in zip(cores, owned_extents(cores), strict=True):
+            bbox: Bounds | None = transform_bounds(
+                (core[0] - halo, core[1] - halo, core[2] + halo, core[3] + halo), self.settings.area_crs, crs
             )
+            if bbox is not None and self.settings.bbox:
+                # The halo and the last row and column of the grid do not read beyond the bbox either
+                bbox = intersect_bounds(bbox, tuple(self.settings.bbox))
+            if bbox is not None:
+                tiles.append({"core": core, "owned": owned, "bbox": bbox, "owns_unlocated": not tiles})
+        return tiles
+
+    @staticmethod
+    def rule_tables(tasks: list[RuleTask]) -> list[str]:
+        """All tables read by the rules, in first use order"""
+        tables: dict[str, None] = {}
+        for _, rule, _ in tasks:
+            tables[rule["table"]] = None
+            if rule.get("intersection_table"):
+                tables[rule["intersection_table"]] = None
+        return list(tables)
+
+    def attribute_rule_groups(self) -> list[dict]:
+        """Group null and query rules by (table, where) so each group is checked in one read of the table"""
+        groups: dict[tuple[str, str | None], dict] = {}
+        for family in ("null_columns", "query_rules"):
+            for rule in getattr(self.settings, family):
+                group = groups.setdefault(
+                    (rule["table"], rule.get("where")),
+                    {"table": rule["table"], "where": rule.get("where"), "null_columns": [], "query_rules": []},
+                )
+                group[family].append(rule)
+        return list(groups.values())
+
+    def run_rule(self, family: str, rule: dict, tile: dict | None = None) -> None:
+        self.tile = tile
+        if family == "attribute_rules":
+            self.run_attribute_rules(rule)
+        elif family in FEATURE_ON_LAYER_RULES:
+            self.run_feature_on_layer(family, rule)
+        elif family == "self_intersect_layers":
+            self.run_self_intersection(rule)
+        else:
+            raise ValueError(f"Unknown validation rule family: {family}")
+
+    def run_staged_rule(self, family: str, rule: dict, tile: dict | None, staging_dir: str) -> dict[str, Any]:
+        """Run one rule writing its outputs into staging_dir, to be merged by merge_rule_results"""
+        output_dir, summary_report, rule_metrics = self.settings.output_dir, self.summary_report, self.rule_metrics
+        os.makedirs(staging_dir, exist_ok=True)
+        self.settings.output_dir = staging_dir
+        self.summary_report = self.default_validation_summary_dictionary()
+        self.rule_metrics = []
+        self.output_sink = OutputSink()
+        try:
+            self.run_rule(family, rule, tile)
+            self.output_sink.flush()
+            return {
+                "pid": os.getpid(),
+                "summary_report": self.summary_report,
+                "metrics": self.rule_metrics,
+                "outputs": sorted(entry.path for entry in os.scandir(staging_dir) if entry.is_file()),
+                "dataset_cache": self.dataset_cache.stats() if self.dataset_cache is not None else None,
+                "connections_opened": self.validator.connections_opened(),
+            }
+        finally:
+            self.settings.output_dir, self.summary_report, self.rule_metrics = output_dir, summary_report, rule_metrics
+            self.output_sink = None
+
+    def rule_where(self, rule: dict) -> tuple[str | None, bool]:
+        """Where condition of the features a rule validates, and whether it selects the changed features only.
+
+        An incremental run selects the features edited since the last run of the
+        table, falling back to the date filter for a table never run before.
+        A rule whose intersection table was edited since is validated in full the
+        same way: the edits may change the result of features that were not.
+        """
+        changed_where = self.run_state.changed_where(rule["table"]) if self.run_state is not None else None
+        layer = rule.get("intersection_table")
+        if changed_where is not None and layer and self.table_changed(layer):
+            print(f"{layer} changed since the last run, validating {rule['table']} in full", flush=True)
+            changed_where = None
+        if changed_where is None:
+            where = self.build_where_statement(rule, self.settings.date, self.settings.weeks)
+            return where, where != rule.get("where")
+
+        where = f"({rule['where']}) AND ({changed_where})" if rule.get("where") else changed_where
+        print("where statement:", where, flush=True)
+        return where, True
+
+    def table_changed(self, table: str) -> bool:
+        """Whether features of a table were edited since its last run, also when that cannot be told"""
+        if table not in self.changed_tables:
+            changed_where = self.run_state.changed_where(table) if self.run_state is not None else None
+            validator = self.validator.create_validator(summary_report={}, export_validation_data=False, table=table)
+            self.changed_tables[table] = changed_where is None or validator.has_edits(table, changed_where)
+        return self.changed_tables[table]
+
+    def create_rule_validator(self, rule: dict, export_layername: str, table2: str | None = None):
+        where, changes_only = self.rule_where(rule)
+        validator = self.validator.create_validator(
+            summary_report=self.summary_report,
+            # Fail-fast rules stop at their first violations, there is nothing complete to export
+            export_validation_data=self.settings.export_validation_data and not self.settings.fail_fast,
+            table=rule["table"],
+            table2=table2,
+            export_layername=export_layername,
+            where_condition=where,
+            message=rule.get("message", ""),
+        )
+        validator.set_exports(
+            export_parquet=self.settings.export_parquet,
+            export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
+            export_gpkg=self.settings.export_gpkg,
+        )
+        validator.set_output_sink(self.output_sink)
+        validator.set_fail_fast(self.settings.fail_fast)
+        if self.tile is not None:
+            validator.set_tile(self.tile["bbox"], self.tile["owned"], self.tile["owns_unlocated"])
+        if self.run_state is not None and changes_only:
+            validator.set_incremental(rule.get("where"))
+        return validator
+
+    def run_attribute_rules(self, group: dict) -> None:
+        validator = self.create_rule_validator(group, export_layername=group["table"])
+        columns = [rule["column"] for rule in group["null_columns"] + group["query_rules"]]
+        print(
+            f"Running null and query checks on {group['table']}, columns: {columns}, where: {validator.where_condition}",
+            flush=True,
+        )
 
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_layer_intersections(
-                rule_name="line_not_on_feature_layers",
-                intersect=False,
-                buffer_lines=True,
-            )
-            self.summary_report = validator.summary_report
-
-        for layer in self.settings.line_not_touches_feature_layers:
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=layer["table"],
-                table2=layer["intersection_table"],
-                export_layername=layer["layername"],
-                where_condition=self.build_where_statement(layer, self.settings.date, self.settings.weeks),
-                message=layer["message"],
-            )
+        validator.run_rule_group_checks(group["null_columns"], group["query_rules"])
+        self.summary_report = validator.summary_report
+        self.record_metrics("attribute_rules", validator, rules=columns)
 
-            print(
-                f"Running line not touches feature layer check between {layer['table']} and {layer['intersection_table']}",
-                flush=True,
-            )
+    def run_feature_on_layer(self, family: str, layer: dict) -> None:
+        validator = self.create_rule_validator(
+            layer, export_layername=layer["layername"], table2=layer["intersection_table"]
+        )
+        print(
+            f"Running {FEATURE_ON_LAYER_RULES[family]['label']} check between "
+            f"{layer['table']} and {layer['intersection_table']}",
+            flush=True,
+        )
 
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_layer_intersections(
-                rule_name="line_not_touches_feature_layers",
-                intersect=False,
-                buffer_lines=False,
-                predicate="touches",
-            )
-            self.summary_report = validator.summary_report
-
-        for layer in self.settings.feature_not_contains_layers:
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=layer["table"],
-                table2=layer["intersection_table"],
-                export_layername=layer["layername"],
-                where_condition=self.build_where_statement(layer, self.settings.date, self.settings.weeks),
-                message=layer["message"],
-            )
+        validator.run_layer_intersections(
+            rule_name=family, tolerance=layer.get("tolerance"), **FEATURE_ON_LAYER_RULES[family]["options"]
+        )
+        self.summary_report = validator.summary_report
+        self.record_metrics(family, validator)
 
-            print(
-                f"Running feature not contains layer check between {layer['table']} and {layer['intersection_table']}",
-                flush=True,
-            )
+    def run_self_intersection(self, layer: dict) -> None:
+        # Will automatically create the appropriate validator
+        validator = self.create_rule_validator(layer, export_layername=layer["layername"])
 
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_layer_intersections(
-                rule_name="feature_not_contains_layers",
-                intersect=False,
-                buffer_lines=False,
-                predicate="contains",
-            )
-            self.summary_report = validator.summary_report
-
-    def run_process_self_intersections(self) -> None:
-        for layer in self.settings.self_intersect_layers:
-            table = layer["table"]
-            export_layername = layer["layername"]
-            where_condition = self.build_where_statement(layer, self.settings.date, self.settings.weeks)
-            message = layer.get("message", "")
-
-            # Will automatically create the appropriate validator
-            validator = self.validator.create_validator(
-                summary_report=self.summary_report,
-                export_validation_data=self.settings.export_validation_data,
-                table=table,
-                table2=None,
-                export_layername=export_layername,
-                where_condition=where_condition,
-                message=message,
-            )
-            validator.set_exports(
-                export_parquet=self.settings.export_parquet,
-                export_parquet_by_geometry_type=self.settings.export_parquet_by_geometry_type,
-                export_gpkg=self.settings.export_gpkg,
-            )
-            validator.run_self_intersections(rule_name="self_intersect_layers")
-            self.summary_report = validator.summary_report
+        validator.run_self_intersections(
+            rule_name="self_intersect_layers",
+            method=layer.get("method", "intersection"),
+            gap_width=layer.get("gap_width", 0),
+        )
+        self.summary_report = validator.summary_report
+        self.record_metrics("self_intersect_layers", validator)
+
+    def record_metrics(self, family: str, validator, rules: list[str] | None = None) -> None:
+        """Add the metrics of the rule a validator ran, with the rule and tile they belong to"""
+        record: dict[str, Any] = {"family": family, "rule": validator.layername}
+        if rules is not None:
+            record["rules"] = rules
+        record["table"] = validator.table
+        if validator.twotable:
+            record["intersection_table"] = validator.table2
+        record["where"] = validator.where_condition
+        if self.tile is not None:
+            record["tile"] = list(self.tile["core"])
+        self.rule_metrics.append({**record, **validator.metrics.as_dict()})
+
+    def run_rule_tasks_in_parallel(
+        self, units: list[RuleUnit], config_tasks: list[RuleTask]
+    ) -> tuple[dict[str, int | None] | None, int | None]:
+        """Run every rule in a process pool and merge the partial results in config order.
+
+        Each worker writes its outputs into its own staging folder, so only this
+        process ever writes to the shared topology_*.gpkg files. A fail-fast run
+        cancels the rules not started yet once a rule finds a violation. The
+        tasks of a unit run one after the other in the same worker, which then
+        releases the unit's tables.
+        Returns the dataset cache stats and database connections summed over the workers.
+        """
+        staging_root = os.path.join(self.settings.output_dir, STAGING_FOLDER)
+        shutil.rmtree(staging_root, ignore_errors=True)
+        tasks = [task for unit_tasks, _ in units for task in unit_tasks]
+        # Task index and staging folder of every task of each unit, numbered in plan order
+        indexed_units: list[tuple[list[tuple[int, RuleTask, str]], list[str]]] = []
+        for unit_tasks, release in units:
+            first = sum(len(indexed) for indexed, _ in indexed_units)
+            indexed = [
+                (index, task, os.path.join(staging_root, f"{index:04d}"))
+                for index, task in enumerate(unit_tasks, start=first)
+            ]
+            indexed_units.append((indexed, release))
+
+        # Spawn rather than fork, GDAL and Arrow thread pools may already be running in this process
+        with ProcessPoolExecutor(
+            max_workers=self.settings.jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_rule_worker,
+            initargs=(self.settings, self.rule_tables(tasks)),
+        ) as pool:
+            futures = [pool.submit(_run_rule_unit_worker, indexed, release) for indexed, release in indexed_units]
+            results_by_task: dict[int, dict[str, Any]] = {}
+            for future in as_completed(futures):
+                unit_results = future.result()
+                results_by_task.update(unit_results)
+                if self.settings.fail_fast and any(
+                    record["violations"] for _, result in unit_results for record in result["metrics"]
+                ):
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        # Tiles of a rule keep their plan order, a fail-fast run then reports the first failing rule of the config
+        config_position = {id(rule): position for position, (_, rule, _) in enumerate(config_tasks)}
+        completed = sorted(results_by_task, key=lambda index: (config_position[id(tasks[index][1])], index))
+        results = [results_by_task[index] for index in completed]
+        self.merge_rule_results([tasks[index] for index in completed], results)
+
+        cache_stats_by_worker: dict[int, dict[str, int | None]] = {}
+        connections_by_worker: dict[int, int] = {}
+        for result in results:
+            if result["dataset_cache"] is not None:
+                cache_stats_by_worker[result["pid"]] = result["dataset_cache"]
+            if result["connections_opened"] is not None:
+                connections_by_worker[result["pid"]] = result["connections_opened"]
+        shutil.rmtree(staging_root, ignore_errors=True)
+
+        cache_stats = (
+            DatasetCache.combine_stats(list(cache_stats_by_worker.values())) if cache_stats_by_worker else None
+        )
+        connections = sum(connections_by_worker.values()) if connections_by_worker else None
+        return cache_stats, connections
+
+    def merge_rule_results(self, tasks: list[RuleTask], results: list[dict[str, Any]]) -> None:
+        """Merge the summary flags and staged outputs of every task, in task order"""
+        # Output file -> the rule that wrote it, the tiles of a rule add to the same files
+        written_by: dict[str, int] = {}
+        # (GPKG file, layer) -> columns of the layer
+        layer_columns: dict[tuple[str, str], list[str]] = {}
+        for (_, rule, _), result in zip(tasks, results, strict=True):
+            for key, value in result["summary_report"].items():
+                if value is True:
+                    self.summary_report[key] = True
+            self.rule_metrics += result["metrics"]
+            self.merge_rule_outputs(result["outputs"], written_by, id(rule), layer_columns)
+
+    def merge_rule_outputs(
+        self,
+        outputs: list[str],
+        written_by: dict[str, int],
+        rule_id: int,
+        layer_columns: dict[tuple[str, str], list[str]],
+    ) -> None:
+        """Move a worker's Parquet files into the output folder and append its GPKG layers"""
+        for path in outputs:
+            target = os.path.join(self.settings.output_dir, os.path.basename(path))
+            if path.endswith(".gpkg"):
+                for layer in gpd.list_layers(path)["name"]:
+                    gdf = gpd.read_file(path, layer=layer)
+                    # Appending matches fields by position, align them with the layer
+                    columns = layer_columns.setdefault((target, layer), list(gdf.columns))
+                    gdf = gdf.reindex(columns=columns)
+                    write_gpkg_layer(gdf, target, layer)
+            elif written_by.get(target) == rule_id:
+                write_parquet(concat([gpd.read_parquet(target), gpd.read_parquet(path)]), target)
+                os.remove(path)
+            else:
+                os.replace(path, target)
+            written_by[target] = rule_id
+
+
+def _init_rule_worker(settings: TopoValidatorSettings, tables: list[str]) -> None:
+    """Each worker process keeps one controller, and so one dataset cache and engine, for all of its rules"""
+    global _worker_controller
+    _worker_controller = ValidateDatasetController(settings)
+    _worker_controller.dataset_cache = _worker_controller.create_dataset_cache()
+    _worker_controller.validator = TopologyValidatorFactory(settings, _worker_controller.dataset_cache)
+    _worker_controller.validator.load_table_metadata(tables)
+
+
+def _run_rule_unit_worker(
+    indexed_tasks: list[tuple[int, RuleTask, str]], release: list[str]
+) -> list[tuple[int, dict[str, Any]]]:
+    """Run the tasks of a unit into their staging folders, a fail-fast run stops at the first violation"""
+    results = []
+    for index, (family, rule, tile), staging_dir in indexed_tasks:
+        result = _worker_controller.run_staged_rule(family, rule, tile, staging_dir)
+        results.append((index, result))
+        if _worker_controller.settings.fail_fast and any(record["violations"] for record in result["metrics"]):
+            break
+    _worker_controller.release_tables(release)
+    return results
@@ -0,0 +1,124 @@
+"""Validation errors kept from run to run in a SQLite file.
+
+Every error is keyed by the output layer of its rule and a stable error key:
+the primary key of the feature, or the keys of both features of an
+intersecting pair, plus a hash of the error geometry. Each run marks the
+errors it reports as ``new`` or still ``open``, and the errors it no longer
+reports as ``resolved``, so only the changes need to be handed on.
+"""
+
+import hashlib
+import sqlite3
+from contextlib import closing
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+NEW = "new"
+OPEN = "open"
+RESOLVED = "resolved"
+
+# Columns of the delta of a run, besides the geometry
+DELTA_COLUMNS = ["rule", "error_key", "status", "first_seen", "last_seen", "resolved_at", "warning"]
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS validation_errors (
+    rule TEXT NOT NULL,
+    error_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    resolved_at TEXT,
+    warning TEXT,
+    geometry BLOB,
+    PRIMARY KEY (rule, error_key)
+)
+"""
+
+
+def error_keys(gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """Stable key of every error of an output: the feature keys and a hash of the geometry.
+
+    The features are identified by ``pair_keys`` in self-intersection outputs,
+    otherwise by the first attribute column, the primary key in every output.
+    """
+    attributes = [column for column in gdf.columns if column != gdf.geometry.name]
+    if "pair_keys" in gdf.columns:
+        features = gdf["pair_keys"].astype(str)
+    elif attributes:
+        features = gdf[attributes[0]].astype(str)
+    else:
+        features = pd.Series("", index=gdf.index)
+    wkb = shapely.to_wkb(shapely.normalize(gdf.geometry.values))
+    hashes = [hashlib.blake2b(geometry or b"", digest_size=8).hexdigest() for geometry in wkb]
+    return (features + ":" + pd.Series(hashes, index=gdf.index)).to_numpy(dtype=object)
+
+
+class ErrorStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with closing(sqlite3.connect(path)) as connection, connection:
+            connection.execute(CREATE_TABLE_SQL)
+
+    def update(
+        self, outputs: dict[str, gpd.GeoDataFrame], area_crs: int, run_time: str, resolve: bool = True
+    ) -> gpd.GeoDataFrame:
+        """Record the errors reported by a run, by output layer, and return the errors whose status changed.
+
+        Errors the run did not report are resolved only when ``resolve`` is set,
+        a run over part of the data cannot tell whether the others still exist.
+        Geometries are stored and returned in area_crs.
+        """
+        reported: dict[tuple[str, str], tuple[str | None, bytes | None]] = {}
+        for rule, gdf in outputs.items():
+            if gdf.empty:
+                continue
+            geometries = gdf.geometry.to_crs(area_crs) if gdf.crs is not None else gdf.geometry
+            warnings = gdf["warning"] if "warning" in gdf.columns else pd.Series(None, index=gdf.index)
+            for key, warning, wkb in zip(error_keys(gdf), warnings, shapely.to_wkb(geometries.values), strict=True):
+                reported[(rule, str(key))] = (warning, wkb)
+
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            status = {
+                (rule, key): error_status
+                for rule, key, error_status in connection.execute(
+                    "SELECT rule, error_key, status FROM validation_errors"
+                )
+            }
+            new = [key for key in reported if status.get(key, RESOLVED) == RESOLVED]
+            still_open = [key for key in reported if status.get(key, RESOLVED) != RESOLVED]
+            resolved = [key for key, error_status in status.items() if error_status != RESOLVED and key not in reported]
+            if not resolve:
+                resolved = []
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO validation_errors VALUES (?, ?, ?, ?, ?, NULL, ?, ?)",
+                [(rule, key, NEW, run_time, run_time, *reported[(rule, key)]) for rule, key in new],
+            )
+            connection.executemany(
+                "UPDATE validation_errors SET status = ?, last_seen = ?, warning = ?, geometry = ? "
+                "WHERE rule = ? AND error_key = ?",
+                [(OPEN, run_time, *reported[(rule, key)], rule, key) for rule, key in still_open],
+            )
+            connection.executemany(
+                "UPDATE validation_errors SET status = ?, resolved_at = ? WHERE rule = ? AND error_key = ?",
+                [(RESOLVED, run_time, rule, key) for rule, key in resolved],
+            )
+            rows = connection.execute(
+                f"SELECT {', '.join(DELTA_COLUMNS)}, geometry FROM validation_errors "
+                "WHERE (status = ? AND first_seen = ?) OR (status = ? AND resolved_at = ?) ORDER BY rule, error_key",
+                (NEW, run_time, RESOLVED, run_time),
+            ).fetchall()
+
+        delta = pd.DataFrame([row[:-1] for row in rows], columns=DELTA_COLUMNS)
+        return gpd.GeoDataFrame(
+            delta, geometry=gpd.GeoSeries.from_wkb([row[-1] for row in rows], crs=area_crs), crs=area_crs
+        )
+
+    def counts(self) -> dict[str, int]:
+        """Number of errors by status"""
+        with closing(sqlite3.connect(self.path)) as connection:
+            rows = connection.execute("SELECT status, count(*) FROM validation_errors GROUP BY status").fetchall()
+        return {NEW: 0, OPEN: 0, RESOLVED: 0} | dict(rows)
@@ -1,18 +1,38 @@
+import os
+from typing import Any
+
+from topographic_validation.cache import DatasetCache
+from topographic_validation.packed_index import INDEX_FOLDER, IndexStore
 from topographic_validation.tools import TopoValidatorSettings
+from topographic_validation.validators.base import AbstractTopologyValidator
 from topographic_validation.validators.gpkg import GpkgTopologyValidator
 from topographic_validation.validators.parquet import ParquetTopologyValidator
-from topographic_validation.validators.postgis import PostgisTopologyValidator
+from topographic_validation.validators.postgis import PostgisTopologyValidator, connections_opened, load_table_metadata
 
 """Factory class to create the appropriate TopologyValidator based on db_path"""
 
 
 class TopologyValidatorFactory:
-    def __init__(self, settings: TopoValidatorSettings) -> None:
+    def __init__(self, settings: TopoValidatorSettings, dataset_cache: DatasetCache | None = None) -> None:
         self.settings = settings
+        self.dataset_cache = dataset_cache
+
+    @property
+    def is_postgis(self) -> bool:
+        return str(self.settings.db_path).startswith("postgresql")
+
+    def load_table_metadata(self, tables: list[str]) -> None:
+        """Preload the key and geometry columns of every table in one catalog query (PostGIS only)"""
+        if self.is_postgis:
+            load_table_metadata(self.settings.db_path, tables)
+
+    def connections_opened(self) -> int | None:
+        """Database connections opened by this process, None when not using a database"""
+        return connections_opened() if self.is_postgis else None
 
     def create_validator(
         self,
-        summary_report: dict[str, bool | str],
+        summary_report: dict[str, Any],
         export_validation_data: bool,
         table: str,
         table2: str | None = None,
@@ -36,14 +56,17 @@ class TopologyValidatorFactory:
             output_dir: Output directory for validation results (optional)
             area_crs: CRS for area calculations (optional)
 
+        The validator shares the factory's dataset cache, if any.
+
         Returns:
             Appropriate TopologyValidator instance
 
         Raises:
             ValueError: If db_path format is not recognized
         """
-        if self.settings.db_path.startswith("postgresql"):
-            return PostgisTopologyValidator(
+        validator: AbstractTopologyValidator
+        if self.is_postgis:
+            validator = PostgisTopologyValidator(
                 summary_report,
                 export_validation_data,
                 self.settings.db_path,
@@ -56,8 +79,10 @@ class TopologyValidatorFactory:
                 self.settings.output_dir,
                 self.settings.area_crs,
             )
+            validator.set_pushdown(self.settings.pushdown)
+            validator.set_binary_copy(self.settings.binary_copy)
         elif self.settings.db_path.endswith(".gpkg"):
-            return GpkgTopologyValidator(
+            validator = GpkgTopologyValidator(
                 summary_report,
                 export_validation_data,
                 self.settings.db_path,
@@ -70,8 +95,20 @@ class TopologyValidatorFactory:
                 self.settings.output_dir,
                 self.settings.area_crs,
             )
+            validator.set_pushdown(self.settings.pushdown)
         elif self.settings.db_path.endswith(".parquet") or "parquet" in self.settings.db_path:
-            return ParquetTopologyValidator(
+            parquet_validator: type[ParquetTopologyValidator] = ParquetTopologyValidator
+            if self.settings.parquet_engine == "duckdb":
+                # DuckDB is an optional dependency, only imported when selected
+                try:
+                    from topographic_validation.validators.duckdb_parquet import DuckdbParquetTopologyValidator
+                except ModuleNotFoundError as error:
+                    if error.name != "duckdb":
+                        raise
+                    raise ValueError("The DuckDB engine requires the duckdb package: pip install duckdb") from error
+
+                parquet_validator = DuckdbParquetTopologyValidator
+            validator = parquet_validator(
                 summary_report,
                 export_validation_data,
                 self.settings.db_path,
@@ -89,3 +126,9 @@ class TopologyValidatorFactory:
                 "db_path must be a PostgreSQL connection string, "
                 "a GeoPackage file path (.gpkg), or a Parquet file path (.parquet)"
             )
+
+        validator.set_dataset_cache(self.dataset_cache)
+        if self.settings.persist_index and not self.is_postgis:
+            data_folder = os.path.dirname(os.path.abspath(self.settings.db_path))
+            validator.set_index_store(IndexStore(os.path.join(data_folder, INDEX_FOLDER)))
+        return validator
@@ -0,0 +1,91 @@
+"""Timing and resource metrics of the rule runs.
+
+Each validator records the time its rule spends reading the data, building
+and querying the spatial index, computing the errors and writing them, with
+the rows read, the candidate pairs and the violations found. The controller
+adds the rule to each record and reports them in the ``metrics`` section of
+the summary report, and optionally appends them to a JSON lines file.
+"""
+
+import json
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None  # type: ignore[assignment]
+
+PHASES = ("read", "index", "compute", "write")
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, None where it is not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class RuleMetrics:
+    """Phase durations and counts of one rule run.
+
+    Phases may nest, the time of an inner phase only counts towards that phase.
+    """
+
+    def __init__(self) -> None:
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rows: dict[str, int] = {}
+        self.candidate_pairs: int | None = None
+        self.violations = 0
+        self.started = time.perf_counter()
+        self._active: list[str] = []
+        self._since = self.started
+
+    def _stop_active(self) -> float:
+        now = time.perf_counter()
+        if self._active:
+            self.phases[self._active[-1]] += now - self._since
+        self._since = now
+        return now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._stop_active()
+        self._active.append(name)
+        try:
+            yield
+        finally:
+            self._stop_active()
+            self._active.pop()
+
+    def add_candidate_pairs(self, pairs: int) -> None:
+        self.candidate_pairs = (self.candidate_pairs or 0) + pairs
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def describe(self) -> str:
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        return f"{self.seconds:.2f}s ({phases})"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "rows": self.rows,
+            "candidate_pairs": self.candidate_pairs,
+            "violations": self.violations,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def append_jsonl(path: str, records: list[dict[str, Any]]) -> None:
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
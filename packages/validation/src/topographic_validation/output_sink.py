@@ -0,0 +1,48 @@
+"""Buffer the validation outputs of a run and write every file once.
+
+Rules hand their results to the sink instead of appending to the shared
+GeoPackages one rule at a time. On flush the results of each GPKG layer are
+concatenated and written with one call through the Arrow write path, and every
+Parquet file is written once. Each layer is still written on its own, opening
+the GeoPackage and updating its spatial index as GDAL does for any write.
+"""
+
+import geopandas as gpd
+import pandas as pd
+
+
+class OutputSink:
+    def __init__(self) -> None:
+        # GPKG file -> layer -> results, in the order they were added
+        self.layers: dict[str, dict[str, list[gpd.GeoDataFrame]]] = {}
+        # Parquet file -> results
+        self.parquet: dict[str, list[gpd.GeoDataFrame]] = {}
+
+    def add_layer(self, path: str, layer: str, gdf: gpd.GeoDataFrame) -> None:
+        self.layers.setdefault(path, {}).setdefault(layer, []).append(gdf)
+
+    def add_parquet(self, path: str, gdf: gpd.GeoDataFrame) -> None:
+        self.parquet.setdefault(path, []).append(gdf)
+
+    def flush(self) -> None:
+        """Write every buffered output and empty the sink"""
+        for path, layers in self.layers.items():
+            for layer, frames in layers.items():
+                write_gpkg_layer(concat(frames), path, layer)
+        for path, frames in self.parquet.items():
+            write_parquet(concat(frames), path)
+        self.layers, self.parquet = {}, {}
+
+
+def concat(frames: list[gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=frames[0].crs)
+
+
+def write_gpkg_layer(gdf: gpd.GeoDataFrame, path: str, layer: str, append: bool = True) -> None:
+    gdf.to_file(path, layer=layer, driver="GPKG", append=append, use_arrow=True)
+
+
+def write_parquet(gdf: gpd.GeoDataFrame, path: str) -> None:
+    gdf.to_parquet(path, engine="pyarrow", compression="zstd", write_covering_bbox=True, row_group_size=50000)
@@ -0,0 +1,253 @@
+"""A packed Hilbert R-tree kept in flat NumPy arrays, saved next to the data between runs.
+
+The features are sorted by the Hilbert distance of the centre of their envelope
+and packed NODE_SIZE to a node. The tree is three arrays: the envelopes of the
+leaves, the envelopes of the nodes and the position in the table of each leaf.
+Saved as .npy files they are loaded memory-mapped, so a run only reads the
+pages of the leaves its queries meet. The nodes, a sixteenth of the features,
+are indexed by a GEOS STRtree on load, which finds the nodes a query meets
+faster than NumPy can walk the levels above them.
+
+A query returns the same pairs as the STRtree of geopandas: the envelopes
+intersect, then the predicate is evaluated on the geometries.
+"""
+
+import glob
+import hashlib
+import os
+from typing import Any
+
+import numpy as np
+import shapely
+
+# Folder of the saved trees, next to the GeoPackage or Parquet files
+INDEX_FOLDER = ".topographic_index"
+
+NODE_SIZE = 16
+
+# Hilbert distance on a grid of 2**HILBERT_ORDER cells a side
+HILBERT_ORDER = 16
+
+# Input geometries queried at a time, bounding the candidate pairs held at once
+QUERY_BATCH_SIZE = 65_536
+
+PREDICATES = {
+    "intersects": shapely.intersects,
+    "within": shapely.within,
+    "contains": shapely.contains,
+    "overlaps": shapely.overlaps,
+    "crosses": shapely.crosses,
+    "touches": shapely.touches,
+    "covers": shapely.covers,
+    "covered_by": shapely.covered_by,
+    "contains_properly": shapely.contains_properly,
+}
+
+
+def hilbert_distance(x: np.ndarray, y: np.ndarray, order: int = HILBERT_ORDER) -> np.ndarray:
+    """Distance along the Hilbert curve of the integer cells x, y of a grid of 2**order a side"""
+    x, y = x.astype(np.int64), y.astype(np.int64)
+    side = 1 << order
+    distance = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        distance += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotate the quadrant so the curve continues from the previous one
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return distance
+
+
+def envelopes_intersect(boxes: np.ndarray, query_boxes: np.ndarray) -> np.ndarray:
+    """Whether envelopes intersect query envelopes, both as columns of bounds; never for a NaN (empty) envelope"""
+    intersect: np.ndarray = (
+        (boxes[0] <= query_boxes[2])
+        & (boxes[2] >= query_boxes[0])
+        & (boxes[1] <= query_boxes[3])
+        & (boxes[3] >= query_boxes[1])
+    )
+    return intersect
+
+
+class PackedRTree:
+    """A static R-tree over the geometries of a table, queried like the spatial index of a GeoDataFrame.
+
+    ``leaves`` are the envelopes of the features in Hilbert order, padded with
+    NaN to whole nodes, and ``nodes`` the envelope of every NODE_SIZE of them,
+    both a row per bound. The few node envelopes are indexed by a GEOS tree
+    built on load; the leaves of the nodes a query meets are scanned in NumPy.
+    """
+
+    def __init__(self, leaves: np.ndarray, nodes: np.ndarray, order: np.ndarray, geometries: Any) -> None:
+        self.leaves = leaves
+        self.nodes = nodes
+        self.order = order
+        self.geometries = np.asarray(geometries, dtype=object)
+        # Nodes of only missing and empty geometries are left out
+        self.node_positions = np.flatnonzero(~np.isnan(nodes[0]))
+        self.node_index = shapely.STRtree(shapely.box(*nodes[:, self.node_positions]))
+
+    @classmethod
+    def build(cls, geometries: Any) -> "PackedRTree":
+        geometries = np.asarray(geometries, dtype=object)
+        bounds = shapely.bounds(geometries)
+        valid = ~np.isnan(bounds[:, 0])
+        # Missing and empty geometries sort last, they never match
+        hilbert = np.full(len(bounds), np.iinfo(np.int64).max)
+        if valid.any():
+            centres_x = (bounds[valid, 0] + bounds[valid, 2]) / 2
+            centres_y = (bounds[valid, 1] + bounds[valid, 3]) / 2
+            cells = (1 << HILBERT_ORDER) - 1
+            width = max(float(np.ptp(centres_x)), np.finfo(float).tiny)
+            height = max(float(np.ptp(centres_y)), np.finfo(float).tiny)
+            hilbert[valid] = hilbert_distance(
+                np.floor((centres_x - centres_x.min()) / width * cells),
+                np.floor((centres_y - centres_y.min()) / height * cells),
+            )
+        order = np.argsort(hilbert, kind="stable")
+
+        leaves = np.full((4, -(-len(bounds) // NODE_SIZE) * NODE_SIZE), np.nan)
+        leaves[:, : len(bounds)] = bounds[order].T
+        groups = leaves.reshape(4, -1, NODE_SIZE)
+        # fmin and fmax skip the NaN envelopes of empty geometries and padding
+        with np.errstate(invalid="ignore"):
+            nodes = np.stack(
+                [
+                    np.fmin.reduce(groups[0], axis=1),
+                    np.fmin.reduce(groups[1], axis=1),
+                    np.fmax.reduce(groups[2], axis=1),
+                    np.fmax.reduce(groups[3], axis=1),
+                ]
+            )
+        return cls(leaves, nodes, order, geometries)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.leaves[0])))
+
+    def candidates(self, geometries: np.ndarray, distance: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Pairs of input positions and table positions whose envelopes intersect, within distance when given"""
+        query_boxes = shapely.bounds(geometries)
+        if distance is None:
+            queries, nodes = self.node_index.query(geometries)
+        else:
+            query_boxes += np.column_stack([-distance, -distance, distance, distance])
+            # The diagonal of an envelope has the same envelope and is quicker to create than a box
+            valid = np.flatnonzero(~np.isnan(query_boxes[:, 0]))
+            queries, nodes = self.node_index.query(shapely.linestrings(query_boxes[valid].reshape(-1, 2, 2)))
+            queries = valid[queries]
+        nodes = self.node_positions[nodes]
+        # The leaves of a node are contiguous, gathered a node at a time
+        leaves = self.leaves.reshape(4, -1, NODE_SIZE)[:, nodes]
+        # Padding never matches, its envelope is NaN
+        rows, columns = np.nonzero(envelopes_intersect(leaves, query_boxes[queries].T[:, :, np.newaxis]))
+        return queries[rows], self.order[nodes[rows] * NODE_SIZE + columns]
+
+    def query(
+        self,
+        geometry: Any,
+        predicate: str | None = None,
+        sort: bool = False,
+        distance: Any = None,
+        output_format: str = "indices",
+    ) -> np.ndarray:
+        """Positions of the tree geometries matching the input geometries, as ``SpatialIndex.query``.
+
+        An array of input geometries returns an array of two rows, the input
+        positions and the tree positions; a single geometry the tree positions.
+        """
+        if output_format != "indices":
+            raise ValueError("Only the indices output format is supported")
+        single = geometry is None or isinstance(geometry, shapely.Geometry)
+        inputs = np.array([geometry], dtype=object) if single else np.asarray(geometry, dtype=object)
+
+        left_parts, right_parts = [], []
+        for start in range(0, len(inputs), QUERY_BATCH_SIZE):
+            batch = inputs[start : start + QUERY_BATCH_SIZE]
+            batch_distance = None
+            if predicate == "dwithin":
+                if distance is None:
+                    raise ValueError("The dwithin predicate requires a distance")
+                batch_distance = np.broadcast_to(np.asarray(distance, dtype=float), len(inputs))[
+                    start : start + QUERY_BATCH_SIZE
+                ]
+            left, right = self.candidates(batch, batch_distance)
+            if batch_distance is not None:
+                keep = shapely.dwithin(batch[left], self.geometries[right], batch_distance[left])
+                left, right = left[keep], right[keep]
+            elif predicate is not None:
+                if predicate not in PREDICATES:
+                    raise ValueError(f"Unsupported spatial predicate: {predicate}")
+                keep = PREDICATES[predicate](batch[left], self.geometries[right])
+                left, right = left[keep], right[keep]
+            left_parts.append(left + start)
+            right_parts.append(right)
+
+        left = np.concatenate(left_parts) if left_parts else np.empty(0, dtype=np.intp)
+        right = np.concatenate(right_parts) if right_parts else np.empty(0, dtype=np.intp)
+        if sort:
+            order = np.lexsort((right, left))
+            left, right = left[order], right[order]
+        if single:
+            return np.sort(right) if sort else right
+        return np.vstack([left, right])
+
+
+class IndexStore:
+    """Packed R-trees of tables saved as .npy files in a folder, tagged with a hash of the table snapshot.
+
+    A snapshot describes the table as it was read, so a tree is only loaded for
+    the same data: the size and modification time of its file.
+    """
+
+    ARRAYS = ("leaves", "nodes", "order")
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+
+    @staticmethod
+    def snapshot_hash(snapshot: str) -> str:
+        return hashlib.sha256(snapshot.encode()).hexdigest()[:16]
+
+    def prefix(self, name: str) -> str:
+        return os.path.join(self.folder, name.replace(os.sep, "_"))
+
+    def load(self, name: str, snapshot: str, geometries: Any) -> PackedRTree | None:
+        """The saved tree of a table, memory-mapped, None when not saved for this snapshot and row count"""
+        files = [f"{self.prefix(name)}.{self.snapshot_hash(snapshot)}.{array}.npy" for array in self.ARRAYS]
+        if not all(os.path.exists(file) for file in files):
+            return None
+        leaves, nodes, order = (np.load(file, mmap_mode="r") for file in files)
+        if len(order) != len(geometries):
+            return None
+        return PackedRTree(leaves, nodes, order, geometries)
+
+    def save(self, name: str, snapshot: str, tree: PackedRTree) -> None:
+        """Save the tree of a table, replacing those of earlier snapshots"""
+        os.makedirs(self.folder, exist_ok=True)
+        prefix = self.prefix(name)
+        for stale in glob.glob(f"{glob.escape(prefix)}.*.npy"):
+            os.remove(stale)
+        tag = self.snapshot_hash(snapshot)
+        for array, values in zip(self.ARRAYS, (tree.leaves, tree.nodes, tree.order), strict=True):
+            # Written under a temporary name, a worker loading the tree never sees a partial file
+            temporary = f"{prefix}.{tag}.{array}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                np.save(file, values)
+            os.replace(temporary, f"{prefix}.{tag}.{array}.npy")
+
+    def load_or_build(self, name: str, snapshot: str, geometries: Any) -> tuple[PackedRTree, bool]:
+        """The saved tree of a table, or a tree built and saved, and whether it was loaded"""
+        tree = self.load(name, snapshot, geometries)
+        if tree is not None:
+            return tree, True
+        tree = PackedRTree.build(geometries)
+        try:
+            self.save(name, snapshot, tree)
+        except OSError as e:
+            print(f"Spatial index of {name} not saved: {e}", flush=True)
+        return tree, False
@@ -0,0 +1,184 @@
+"""Order and group the rules of a run by their estimated cost.
+
+The cost of a rule is estimated from the rows of its tables, read from
+metadata rather than the data: the GeoPackage feature count, the Parquet row
+group statistics or the PostGIS planner statistics, scaled to the share of the
+table extent within the bbox setting. Where conditions and date filters are
+not accounted for.
+
+Rules reading a table in common, directly or through other rules, form a group.
+The rules of a group run one after the other, in config order, so their tables
+are read once and released once the group is done. Groups run longest first:
+a pool of workers then ends close to the longest group, rather than waiting
+on a long rule started last.
+"""
+
+import heapq
+import math
+
+from topographic_validation.tiles import Bounds
+
+# (rule family, rule config, tile or None), as in the controller
+RuleTask = tuple[str, dict, dict | None]
+
+# Rows and bounds of a table, None where unknown
+TableEstimate = tuple[int | None, Bounds | None]
+
+
+def rule_tables(rule: dict) -> list[str]:
+    return [rule["table"], rule["intersection_table"]] if rule.get("intersection_table") else [rule["table"]]
+
+
+def rule_cost(family: str, rule: dict, rows: dict[str, float]) -> float:
+    """Relative cost of a rule: the rows it reads plus its spatial index queries"""
+    features = rows[rule["table"]]
+    if family == "attribute_rules":
+        return features
+    if family == "self_intersect_layers":
+        # Every feature queries the index of its own table, then intersects its candidates
+        return features + 2 * features * math.log2(features + 2)
+    layer_features = rows[rule["intersection_table"]]
+    return features + layer_features + features * math.log2(layer_features + 2)
+
+
+def bbox_share(bounds: Bounds | None, bbox: Bounds | None) -> float:
+    """Share of a table extent within bbox, along each axis for an extent without width or height"""
+    if bounds is None or bbox is None:
+        return 1.0
+    share = 1.0
+    for low, high, bbox_low, bbox_high in (
+        (bounds[0], bounds[2], bbox[0], bbox[2]),
+        (bounds[1], bounds[3], bbox[1], bbox[3]),
+    ):
+        overlap = min(high, bbox_high) - max(low, bbox_low)
+        if overlap < 0:
+            return 0.0
+        if high > low:
+            share *= overlap / (high - low)
+    return share
+
+
+class RuleGroup:
+    """Tasks run one after the other, which may release their tables once done"""
+
+    def __init__(self, tasks: list[int], tables: list[str], cost: float, release: bool = True) -> None:
+        self.tasks = tasks
+        self.tables = tables
+        self.cost = cost
+        self.release = release
+
+
+class ExecutionPlan:
+    def __init__(
+        self,
+        tasks: list[RuleTask],
+        estimates: dict[str, TableEstimate],
+        rows: dict[str, float],
+        costs: list[float],
+        groups: list[RuleGroup],
+    ) -> None:
+        self.tasks = tasks
+        self.estimates = estimates
+        self.rows = rows
+        self.costs = costs
+        self.groups = groups
+
+    @property
+    def order(self) -> list[int]:
+        """Task indexes in the order they run"""
+        return [index for group in self.groups for index in group.tasks]
+
+    def units(self, jobs: int) -> list[RuleGroup]:
+        """Groups to hand to a pool of workers, longest first.
+
+        A group estimated to take longer than its fair share of the workers is
+        split into its rules, which may then run at the same time. Their tables
+        are shared with other workers' rules and are left to the cache to evict.
+        """
+        share = sum(self.costs) / jobs
+        units: list[RuleGroup] = []
+        for group in self.groups:
+            if len(group.tasks) > 1 and group.cost > share:
+                units += [
+                    RuleGroup([index], rule_tables(self.tasks[index][1]), self.costs[index], release=False)
+                    for index in group.tasks
+                ]
+            else:
+                units.append(group)
+        return sorted(units, key=lambda unit: -unit.cost)
+
+    def worker_loads(self, jobs: int) -> list[float]:
+        """Estimated cost run by each worker, each unit going to the first worker free"""
+        loads = [0.0] * jobs
+        for unit in self.units(jobs):
+            heapq.heapreplace(loads, loads[0] + unit.cost)
+        return sorted(loads, reverse=True)
+
+    def explain(self, jobs: int = 1) -> str:
+        total = sum(self.costs)
+        lines = [f"Execution plan: {len(self.tasks)} rules in {len(self.groups)} groups, estimated cost {total:,.0f}"]
+        for number, group in enumerate(self.groups, start=1):
+            tables = ", ".join(f"{table} ({self.describe_rows(table)} rows)" for table in group.tables)
+            lines.append(f"Group {number}: cost {group.cost:,.0f}, tables {tables}")
+            for index in group.tasks:
+                family, rule, _ = self.tasks[index]
+                name = rule.get("layername") or rule["table"]
+                lines.append(f"  {self.costs[index]:>16,.0f}  {family}: {name}")
+        if jobs > 1 and total:
+            loads = self.worker_loads(jobs)
+            lines.append(
+                f"{jobs} workers, estimated cost per worker: {', '.join(f'{load:,.0f}' for load in loads)}, "
+                f"the longest {loads[0] / total:.0%} of the total"
+            )
+        return "\n".join(lines)
+
+    def describe_rows(self, table: str) -> str:
+        rows = self.estimates[table][0]
+        if rows is None:
+            return f"unknown, taken as {self.rows[table]:,.0f}"
+        if self.rows[table] != rows:
+            return f"{self.rows[table]:,.0f} of {rows:,}"
+        return f"{rows:,}"
+
+
+def plan_rules(tasks: list[RuleTask], estimates: dict[str, TableEstimate], bbox: Bounds | None = None) -> ExecutionPlan:
+    """Group the tasks reading the same tables and order the groups by decreasing estimated cost.
+
+    A table of unknown size is taken as large as the largest known table, so
+    its rules are not left for last.
+    """
+    known = [rows for rows, _ in estimates.values() if rows is not None]
+    largest = max(known, default=0)
+    rows = {
+        table: (largest if table_rows is None else table_rows) * bbox_share(bounds, bbox)
+        for table, (table_rows, bounds) in estimates.items()
+    }
+    costs = [rule_cost(family, rule, rows) for family, rule, _ in tasks]
+
+    # Union the tables of each rule, a group is the tasks of one set of tables
+    parent: dict[str, str] = {}
+
+    def root(table: str) -> str:
+        while parent.setdefault(table, table) != table:
+            table = parent[table]
+        return table
+
+    for _, rule, _ in tasks:
+        first, *others = rule_tables(rule)
+        for table in others:
+            parent[root(table)] = root(first)
+
+    members: dict[str, list[int]] = {}
+    for index, (_, rule, _) in enumerate(tasks):
+        members.setdefault(root(rule["table"]), []).append(index)
+    groups = [
+        RuleGroup(
+            indexes,
+            list(dict.fromkeys(table for index in indexes for table in rule_tables(tasks[index][1]))),
+            sum(costs[index] for index in indexes),
+        )
+        for indexes in members.values()
+    ]
+    # sorted is stable, groups of the same cost keep their config order
+    groups.sort(key=lambda group: -group.cost)
+    return ExecutionPlan(tasks, estimates, rows, costs, groups)
@@ -0,0 +1,53 @@
+"""Time of the last validation run of each table, for incremental runs.
+
+The state file is JSON mapping a database path to the tables validated in it,
+as the table of a rule or its intersection table, and the UTC time their last
+run started, e.g. ``{"data.gpkg": {"buildings": "2026-10-17T02:00:00"}}``.
+A run started at that time picks up every feature edited since, so no edit is
+missed while the previous run was reading. The layers may record ``updated_at``
+as a date only, which sorts before any time of that day: the features edited on
+the day of the last run are selected again rather than missed.
+"""
+
+import datetime
+import json
+import os
+
+
+def utc_timestamp() -> str:
+    """The current UTC time as compared with updated_at"""
+    return datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class RunState:
+    def __init__(self, path: str, db_path: str) -> None:
+        self.path = path
+        self.db_path = str(db_path)
+        self.tables: dict[str, dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.tables = json.load(f)
+
+    def since(self, table: str) -> str | None:
+        """Start of the last run that validated table, None if it never was"""
+        return self.tables.get(self.db_path, {}).get(table)
+
+    def changed_where(self, table: str) -> str | None:
+        """Where condition selecting the features of table edited since its last run"""
+        since = self.since(table)
+        if since is None:
+            return None
+        # A date only updated_at equal to the day of the last run may have been edited after it
+        return f"(updated_at >= '{since}' OR updated_at = '{since[:10]}')"
+
+    def record(self, tables: list[str], started: str) -> None:
+        self.tables.setdefault(self.db_path, {}).update(dict.fromkeys(tables, started))
+
+    def save(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Write then rename, an interrupted run must not leave a truncated state behind
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(self.tables, f, indent=4)
+        os.replace(f"{self.path}.tmp", self.path)
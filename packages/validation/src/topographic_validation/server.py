@@ -0,0 +1,259 @@
+"""Serve validation requests from layers kept in memory between requests.
+
+``topographic_validation --serve`` reads the tables of the configured rules once
+into the dataset cache and answers HTTP requests on localhost:
+
+    GET  /rules      the rules that can be run
+    POST /validate   {"rule": "building-validation", "bbox": [minx, miny, maxx, maxy]}
+    GET  /validate?rule=building-validation&bbox=minx,miny,maxx,maxy
+
+A request runs the rules with the given layer name, table or rule family, or
+every rule when none is given, within the optional bbox in the CRS of the data.
+Reads within the bbox are clipped from the cached tables with their spatial
+index. The source files are polled before each request and only the tables
+that changed are read again. The violations are returned as GeoJSON, nothing
+is written to the output directory.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import traceback
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from topographic_validation.cache import DatasetCache
+from topographic_validation.controller import RuleTask, ValidateDatasetController
+from topographic_validation.factory import TopologyValidatorFactory
+from topographic_validation.output_sink import OutputSink, concat
+from topographic_validation.tools import TopoValidatorSettings
+
+
+class UnknownRuleError(KeyError):
+    pass
+
+
+def rule_name(rule: dict) -> str:
+    """Layer name of a rule, or the table of a group of attribute rules"""
+    return str(rule.get("layername") or rule["table"])
+
+
+class SourceWatcher:
+    """Poll the versions of the tables of a GeoPackage or a folder of Parquet files.
+
+    A Parquet table is versioned by the modification time of its file. The
+    GeoPackage is only looked into when the file changed: a table changed when
+    its last_change in gpkg_contents did, and every table when none did.
+    """
+
+    def __init__(self, db_path: str, tables: list[str]) -> None:
+        self.db_path = db_path
+        self.tables = tables
+        self.file_version: int | None = None
+        self.versions = self.poll()
+
+    def poll(self) -> dict[str, Any]:
+        if not self.db_path.endswith(".gpkg"):
+            folder = self.db_path.replace("files.parquet", "")
+            return {table: os.stat(os.path.join(folder, f"{table}.parquet")).st_mtime_ns for table in self.tables}
+
+        file_version = os.stat(self.db_path).st_mtime_ns
+        if file_version == self.file_version:
+            return self.versions
+        self.file_version = file_version
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            last_change = dict(connection.execute("SELECT table_name, last_change FROM gpkg_contents").fetchall())
+        return {table: (last_change.get(table), file_version) for table in self.tables}
+
+    def changed(self) -> list[str]:
+        """Tables changed since the last poll"""
+        versions = self.poll()
+        changed = [table for table in self.tables if versions[table] != self.versions[table]]
+        if self.db_path.endswith(".gpkg") and changed:
+            changed_content = [table for table in changed if versions[table][0] != self.versions[table][0]]
+            changed = changed_content or changed
+        self.versions = versions
+        return changed
+
+
+class ValidationService:
+    """Run the rules of the config on request, from tables read once and kept in the dataset cache"""
+
+    def __init__(self, settings: TopoValidatorSettings) -> None:
+        # The violations are collected from the output sink, never written
+        settings.output_dir = ""
+        settings.export_validation_data = True
+        settings.export_gpkg = True
+        settings.export_parquet = False
+        settings.export_parquet_by_geometry_type = False
+        self.settings = settings
+        self.controller = ValidateDatasetController(settings)
+        # Cache everything it is given the budget for, bbox reads are clipped from the whole tables
+        self.dataset_cache = DatasetCache(
+            max_bytes=settings.cache_max_mb * 1024 * 1024 if settings.cache_max_mb else None, clip_to_bbox=True
+        )
+        self.controller.dataset_cache = self.dataset_cache
+        self.controller.validator = TopologyValidatorFactory(settings, self.dataset_cache)
+        self.tasks = self.controller.rule_tasks()
+        self.watcher = SourceWatcher(settings.db_path, self.controller.rule_tables(self.tasks))
+        self.warm(self.tasks)
+
+    def rules(self) -> list[dict[str, str | None]]:
+        return [
+            {"family": family, "rule": rule_name(rule), "table": rule["table"], "where": rule.get("where")}
+            for family, rule, _ in self.tasks
+        ]
+
+    def warm(self, tasks: list[RuleTask]) -> None:
+        """Read the whole tables of the rules into the cache, with the spatial index of the spatial rules.
+
+        The attribute rules of a GeoPackage are queried in SQLite on each request, through its rtree within a bbox.
+        """
+        start = time.perf_counter()
+        bbox, self.settings.bbox = self.settings.bbox, None
+        try:
+            for family, rule, _ in tasks:
+                if family == "attribute_rules":
+                    if self.settings.db_path.endswith(".gpkg"):
+                        continue
+                    validator = self.controller.create_rule_validator(rule, export_layername=rule["table"])
+                    validator.read_rule_masks(
+                        [null_check["column"] for null_check in rule["null_columns"]],
+                        [query_rule["rule"] for query_rule in rule["query_rules"]],
+                    )
+                else:
+                    validator = self.controller.create_rule_validator(
+                        rule, export_layername=rule["layername"], table2=rule.get("intersection_table")
+                    )
+                    validator.read_datasets()
+        finally:
+            self.settings.bbox = bbox
+        print(f"Read the tables of {len(tasks)} rules in {time.perf_counter() - start:.2f} seconds", flush=True)
+
+    def reload_changed_tables(self) -> list[str]:
+        changed = self.watcher.changed()
+        if not changed:
+            return []
+        print(f"Reading changed tables again: {changed}", flush=True)
+        self.controller.release_tables(changed)
+        self.warm([task for task in self.tasks if set(self.controller.rule_tables([task])) & set(changed)])
+        return changed
+
+    def select(self, rule: str | None) -> list[RuleTask]:
+        if rule is None:
+            return self.tasks
+        tasks = [task for task in self.tasks if rule in (task[0], rule_name(task[1]), task[1]["table"])]
+        if not tasks:
+            raise UnknownRuleError(rule)
+        return tasks
+
+    def validate(
+        self, rule: str | None = None, bbox: tuple[float, float, float, float] | None = None
+    ) -> dict[str, Any]:
+        """Run the selected rules within bbox, returns the summary flags, metrics and violations of each layer"""
+        start = time.perf_counter()
+        reloaded = self.reload_changed_tables()
+        tasks = self.select(rule)
+
+        controller = self.controller
+        controller.summary_report = controller.default_validation_summary_dictionary()
+        controller.rule_metrics = []
+        controller.output_sink = OutputSink()
+        self.settings.bbox = bbox
+        try:
+            for family, task_rule, _ in tasks:
+                controller.run_rule(family, task_rule)
+            layers = {
+                layer: concat(frames)
+                for file_layers in controller.output_sink.layers.values()
+                for layer, frames in file_layers.items()
+            }
+        finally:
+            controller.output_sink = None
+            self.settings.bbox = None
+
+        return {
+            "rules": [rule_name(task_rule) for _, task_rule, _ in tasks],
+            "bbox": list(bbox) if bbox else None,
+            "reloaded_tables": reloaded,
+            "seconds": round(time.perf_counter() - start, 4),
+            "summary": {key: value for key, value in controller.summary_report.items() if isinstance(value, bool)},
+            "metrics": controller.rule_metrics,
+            "violations": {
+                layer: {**json.loads(gdf.to_json(drop_id=True)), "crs": gdf.crs.to_string() if gdf.crs else None}
+                for layer, gdf in layers.items()
+            },
+        }
+
+
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    server: "ValidationServer"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/rules":
+            self.send_json(200, self.server.service.rules())
+        elif url.path == "/validate":
+            params = parse_qs(url.query)
+            bbox = params["bbox"][0].split(",") if "bbox" in params else None
+            self.validate(params["rule"][0] if "rule" in params else None, bbox)
+        else:
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/validate":
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except json.JSONDecodeError as e:
+            self.send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        self.validate(body.get("rule"), body.get("bbox"))
+
+    def validate(self, rule: str | None, bbox: list | None) -> None:
+        try:
+            bounds = None
+            if bbox is not None:
+                if len(bbox) != 4:
+                    raise ValueError("bbox must be minx, miny, maxx, maxy")
+                bounds = (float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        try:
+            self.send_json(200, self.server.service.validate(rule, bounds))
+        except UnknownRuleError:
+            self.send_json(404, {"error": f"Unknown rule: {rule}"})
+        except Exception as e:
+            # Keep serving, a failed rule or an unreadable table only fails its request
+            self.log_error("Validation failed:\n%s", traceback.format_exc())
+            self.send_json(500, {"error": f"Validation failed: {e}"})
+
+    def send_json(self, status: int, body: Any) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class ValidationServer(HTTPServer):
+    """Answers one request at a time, the service and its cache are not shared between threads"""
+
+    def __init__(self, address: tuple[str, int], service: ValidationService) -> None:
+        super().__init__(address, ValidationRequestHandler)
+        self.service = service
+
+
+def serve(settings: TopoValidatorSettings, host: str = "127.0.0.1", port: int = 8765) -> None:
+    server = ValidationServer((host, port), ValidationService(settings))
+    print(f"Serving validation of {settings.db_path} on http://{host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,87 @@
+"""Square tiles for validating large extents piece by piece.
+
+Tiles are laid out in the area CRS. Each tile reads the features intersecting
+its core plus a halo, and only reports the results it owns: those whose
+reference point, a point on the result geometry, lies in its core. Cores
+partition the extent and the tiles at its edges also own the points beyond it,
+so a result straddling a tile edge is reported once and none is left without
+an owner, like those of features crossing the edge of a bbox.
+"""
+
+import math
+from typing import Any
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS
+from shapely import box
+
+Bounds = tuple[float, float, float, float]
+
+
+def tile_grid(extent: Bounds, tile_size: float) -> list[Bounds]:
+    """Cores of the tiles covering extent, row by row from the lower left corner"""
+    minx, miny, maxx, maxy = extent
+    columns = math.floor((maxx - minx) / tile_size) + 1
+    rows = math.floor((maxy - miny) / tile_size) + 1
+    return [
+        (minx + i * tile_size, miny + j * tile_size, minx + (i + 1) * tile_size, miny + (j + 1) * tile_size)
+        for j in range(rows)
+        for i in range(columns)
+    ]
+
+
+def owned_extents(cores: list[Bounds]) -> list[Bounds]:
+    """Extents owned by the tiles of a grid: their cores, unbounded on the sides at the edge of the grid"""
+    minx, miny = min(core[0] for core in cores), min(core[1] for core in cores)
+    maxx, maxy = max(core[2] for core in cores), max(core[3] for core in cores)
+    return [
+        (
+            -math.inf if core[0] == minx else core[0],
+            -math.inf if core[1] == miny else core[1],
+            math.inf if core[2] == maxx else core[2],
+            math.inf if core[3] == maxy else core[3],
+        )
+        for core in cores
+    ]
+
+
+def transform_bounds(bounds: Bounds, from_crs: Any, to_crs: Any) -> Bounds:
+    """Bounds in to_crs of the box bounds in from_crs"""
+    if from_crs is None or to_crs is None or CRS.from_user_input(from_crs) == CRS.from_user_input(to_crs):
+        return bounds
+    # Densify the edges, a projected straight edge is curved in the other CRS
+    outline = shapely.segmentize(box(*bounds), max((bounds[2] - bounds[0]), (bounds[3] - bounds[1])) / 16)
+    minx, miny, maxx, maxy = gpd.GeoSeries([outline], crs=from_crs).to_crs(to_crs).total_bounds
+    return (float(minx), float(miny), float(maxx), float(maxy))
+
+
+def intersect_bounds(a: Bounds, b: Bounds) -> Bounds | None:
+    minx, miny, maxx, maxy = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    if minx > maxx or miny > maxy:
+        return None
+    return (minx, miny, maxx, maxy)
+
+
+def reference_points(geometries: gpd.GeoSeries, area_crs: int) -> np.ndarray:
+    """(x, y) in the area CRS of a point on each geometry, the same whichever tile computes it"""
+    points = gpd.GeoSeries(shapely.point_on_surface(geometries.values), crs=geometries.crs)
+    if geometries.crs is not None:
+        points = points.to_crs(area_crs)
+    # Empty and missing geometries give NaN
+    return np.column_stack([shapely.get_x(points.values), shapely.get_y(points.values)])
+
+
+def in_core(gdf: gpd.GeoDataFrame, core: Bounds, area_crs: int, owns_unlocated: bool = False) -> np.ndarray:
+    """Mask of the rows of gdf owned by the tile with this core.
+
+    Rows without a geometry to locate are owned by the tile flagged ``owns_unlocated``.
+    """
+    if gdf.empty:
+        return np.zeros(0, dtype=bool)
+    x, y = reference_points(gdf.geometry, area_crs).T
+    owned: np.ndarray = (x >= core[0]) & (x < core[2]) & (y >= core[1]) & (y < core[3])
+    if owns_unlocated:
+        owned |= np.isnan(x) | np.isnan(y)
+    return owned
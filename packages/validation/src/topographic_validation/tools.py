@@ -58,6 +58,19 @@ class TopoValidatorSettings:
         date: str | None = None,
         weeks: int | None = None,
         bbox: tuple[float, float, float, float] | None = None,
+        cache_max_mb: int = 0,
+        jobs: int = 1,
+        pushdown: bool = False,
+        binary_copy: bool = False,
+        parquet_engine: str = "pandas",
+        persist_index: bool = False,
+        tile_size: float = 0,
+        tile_halo: float = 0,
+        incremental: bool = False,
+        state_file: str = "./validation_state.json",
+        error_store: str | None = None,
+        metrics_file: str | None = None,
+        fail_fast: bool = False,
     ) -> None:
         self.validation_config_file = validation_config_file
         self.db_path = db_path
@@ -74,6 +87,19 @@ class TopoValidatorSettings:
         self.date = date
         self.weeks = weeks
         self.bbox = bbox
+        self.cache_max_mb = cache_max_mb
+        self.jobs = jobs
+        self.pushdown = pushdown
+        self.binary_copy = binary_copy
+        self.parquet_engine = parquet_engine
+        self.persist_index = persist_index
+        self.tile_size = tile_size
+        self.tile_halo = tile_halo
+        self.incremental = incremental
+        self.state_file = state_file
+        self.error_store = error_store
+        self.metrics_file = metrics_file
+        self.fail_fast = fail_fast
 
     def load_validation_config(self) -> None:
         with open(self.validation_config_file) as f:
@@ -264,3 +290,99 @@ class TopoValidatorSettings:
     @bbox.setter
     def bbox(self, value):
         self._bbox = value
+
+    @property
+    def cache_max_mb(self):
+        return self._cache_max_mb
+
+    @cache_max_mb.setter
+    def cache_max_mb(self, value):
+        self._cache_max_mb = value
+
+    @property
+    def jobs(self):
+        return self._jobs
+
+    @jobs.setter
+    def jobs(self, value):
+        self._jobs = value
+
+    @property
+    def pushdown(self):
+        return self._pushdown
+
+    @pushdown.setter
+    def pushdown(self, value):
+        self._pushdown = value
+
+    @property
+    def parquet_engine(self):
+        return self._parquet_engine
+
+    @parquet_engine.setter
+    def parquet_engine(self, value):
+        self._parquet_engine = value
+
+    @property
+    def persist_index(self):
+        return self._persist_index
+
+    @persist_index.setter
+    def persist_index(self, value):
+        self._persist_index = value
+
+    @property
+    def tile_size(self):
+        return self._tile_size
+
+    @tile_size.setter
+    def tile_size(self, value):
+        self._tile_size = value
+
+    @property
+    def tile_halo(self):
+        return self._tile_halo
+
+    @tile_halo.setter
+    def tile_halo(self, value):
+        self._tile_halo = value
+
+    @property
+    def incremental(self):
+        return self._incremental
+
+    @incremental.setter
+    def incremental(self, value):
+        self._incremental = value
+
+    @property
+    def state_file(self):
+        return self._state_file
+
+    @state_file.setter
+    def state_file(self, value):
+        self._state_file = value
+
+    @property
+    def error_store(self):
+        return self._error_store
+
+    @error_store.setter
+    def error_store(self, value):
+        self._error_store = value
+
+    @property
+    def metrics_file(self):
+        return self._metrics_file
+
+    @metrics_file.setter
+    def metrics_file(self, value):
+        self._metrics_file = value
+
+    @property
+    def fail_fast(self):
+        return self._fail_fast
+
+    @fail_fast.setter
+    def fail_fast(self, value):
+        self._fail_fast = value
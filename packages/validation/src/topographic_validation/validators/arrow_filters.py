@@ -0,0 +1,200 @@
+"""Compile the SQL where conditions of the validation config into pyarrow filter expressions.
+
+Only simple conditions are supported: comparisons of a column with a literal,
+IS [NOT] NULL, [NOT] IN, BETWEEN, combined with AND, OR, NOT and parentheses.
+Anything else raises UnsupportedFilterError so the caller can filter in memory.
+"""
+
+import re
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.compute as pc  # type: ignore[import-untyped]
+
+TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>'(?:[^']|'')*')
+        |(?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+        |(?P<operator><=|>=|<>|!=|=|<|>)
+        |(?P<punctuation>[(),])
+        |(?P<quoted>"[^"]+")
+        |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""",
+    re.VERBOSE,
+)
+
+KEYWORDS = {"AND", "OR", "NOT", "IS", "NULL", "IN", "BETWEEN", "TRUE", "FALSE", "LIKE"}
+
+
+class UnsupportedFilterError(ValueError):
+    """The where condition cannot be compiled into a pyarrow filter"""
+
+
+def tokenize(where: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    where = where.rstrip()
+    while position < len(where):
+        match = TOKEN.match(where, position)
+        if match is None or match.end() == position:
+            raise UnsupportedFilterError(f"Cannot parse where condition at: {where[position:]}")
+        kind = match.lastgroup
+        value = match.group(kind)  # type: ignore[arg-type]
+        if kind == "word" and value.upper() in KEYWORDS:
+            kind, value = "keyword", value.upper()
+        tokens.append((str(kind), value))
+        position = match.end()
+    return tokens
+
+
+class WhereParser:
+    """Recursive descent parser turning a where condition into a pyarrow expression"""
+
+    def __init__(self, where: str, schema: pa.Schema) -> None:
+        self.tokens = tokenize(where)
+        self.position = 0
+        self.schema = schema
+
+    def parse(self) -> pc.Expression:
+        expression = self.parse_or()
+        if self.position != len(self.tokens):
+            raise UnsupportedFilterError(f"Unexpected token: {self.tokens[self.position][1]}")
+        return expression
+
+    def peek(self, value: str | None = None, kind: str | None = None) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.position]
+        return (value is None or token_value == value) and (kind is None or token_kind == kind)
+
+    def take(self, value: str | None = None, kind: str | None = None) -> tuple[str, str]:
+        if not self.peek(value, kind):
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "end of condition"
+            raise UnsupportedFilterError(f"Expected {value or kind}, found {found}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse_or(self) -> pc.Expression:
+        expression = self.parse_and()
+        while self.peek("OR", "keyword"):
+            self.take()
+            expression = expression | self.parse_and()
+        return expression
+
+    def parse_and(self) -> pc.Expression:
+        expression = self.parse_not()
+        while self.peek("AND", "keyword"):
+            self.take()
+            expression = expression & self.parse_not()
+        return expression
+
+    def parse_not(self) -> pc.Expression:
+        if self.peek("NOT", "keyword"):
+            self.take()
+            return ~self.parse_not()
+        if self.peek("(", "punctuation"):
+            self.take()
+            expression = self.parse_or()
+            self.take(")", "punctuation")
+            return expression
+        return self.parse_condition()
+
+    def parse_condition(self) -> pc.Expression:
+        column = self.parse_column()
+        field = pc.field(column)
+        data_type = self.schema.field(column).type
+
+        if self.peek("IS", "keyword"):
+            self.take()
+            negate = self.peek("NOT", "keyword")
+            if negate:
+                self.take()
+            self.take("NULL", "keyword")
+            return field.is_valid() if negate else field.is_null()
+
+        negate = self.peek("NOT", "keyword")
+        if negate:
+            self.take()
+        if self.peek("IN", "keyword"):
+            self.take()
+            self.take("(", "punctuation")
+            values = [self.parse_literal(data_type)]
+            while self.peek(",", "punctuation"):
+                self.take()
+                values.append(self.parse_literal(data_type))
+            self.take(")", "punctuation")
+            # Like SQL, a null value gives null, so it is neither IN nor NOT IN the list
+            expression = pc.if_else(
+                field.is_valid(), field.isin(pa.array(values, type=data_type)), pa.scalar(None, pa.bool_())
+            )
+            return ~expression if negate else expression
+        if self.peek("BETWEEN", "keyword"):
+            self.take()
+            low = self.parse_literal(data_type)
+            self.take("AND", "keyword")
+            high = self.parse_literal(data_type)
+            expression = (field >= low) & (field <= high)
+            return ~expression if negate else expression
+        if negate:
+            raise UnsupportedFilterError("NOT must be followed by IN or BETWEEN after a column")
+
+        _, operator = self.take(kind="operator")
+        value = self.parse_literal(data_type)
+        if operator == "=":
+            return field == value
+        if operator in ("!=", "<>"):
+            return field != value
+        if operator == "<":
+            return field < value
+        if operator == "<=":
+            return field <= value
+        if operator == ">":
+            return field > value
+        return field >= value
+
+    def parse_column(self) -> str:
+        if self.peek(kind="quoted"):
+            column = self.take()[1][1:-1]
+        else:
+            column = self.take(kind="word")[1]
+        if column not in self.schema.names:
+            raise UnsupportedFilterError(f"Unknown column: {column}")
+        return column
+
+    def parse_literal(self, data_type: pa.DataType) -> pa.Scalar:
+        kind, value = self.take()
+        literal: Any
+        if kind == "string":
+            literal = value[1:-1].replace("''", "'")
+        elif kind == "number":
+            literal = float(value) if any(c in value for c in ".eE") else int(value)
+        elif kind == "keyword" and value in ("TRUE", "FALSE"):
+            literal = value == "TRUE"
+        else:
+            raise UnsupportedFilterError(f"Expected a literal, found {value}")
+        return cast_literal(literal, data_type)
+
+
+def cast_literal(literal: Any, data_type: pa.DataType) -> pa.Scalar:
+    """Cast a SQL literal to the type of the column it is compared with"""
+    try:
+        if pa.types.is_timestamp(data_type) or pa.types.is_date(data_type):
+            timestamp = pd.Timestamp(literal)
+            if pa.types.is_timestamp(data_type) and data_type.tz is not None and timestamp.tzinfo is None:
+                timestamp = timestamp.tz_localize(data_type.tz)
+            return pa.scalar(timestamp.date() if pa.types.is_date(data_type) else timestamp, type=data_type)
+        if pa.types.is_string(data_type) or pa.types.is_large_string(data_type) or pa.types.is_string_view(data_type):
+            return pa.scalar(str(literal), type=data_type)
+        if pa.types.is_integer(data_type) and isinstance(literal, float):
+            # Keep the literal as a float so 2.5 is not truncated to 2
+            return pa.scalar(literal, type=pa.float64())
+        return pa.scalar(literal).cast(data_type)
+    except (ValueError, TypeError, pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise UnsupportedFilterError(f"Cannot compare {literal!r} with a {data_type} column") from e
+
+
+def where_to_expression(where: str, schema: pa.Schema) -> pc.Expression:
+    """Compile a where condition for the columns of ``schema``, raises UnsupportedFilterError"""
+    return WhereParser(where, schema).parse()
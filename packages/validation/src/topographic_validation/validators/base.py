@@ -1,14 +1,128 @@
 import datetime
 import os
+import re
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from typing import Any
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
 from geopandas.sindex import SpatialIndex
+from pyproj import CRS
 from shapely import Point
 
+from topographic_validation.cache import DatasetCache
+from topographic_validation.metrics import RuleMetrics
+from topographic_validation.output_sink import OutputSink, concat, write_gpkg_layer, write_parquet
+from topographic_validation.packed_index import IndexStore, PackedRTree
+from topographic_validation.tiles import Bounds, in_core
+
+GEOS_POLYGON = 3
+GEOS_MULTIPOLYGON = 6
+GEOS_GEOMETRYCOLLECTION = 7
+
+# Output group of an intersection by GEOS type id (Point, LineString, LinearRing,
+# Polygon, MultiPoint, MultiLineString, MultiPolygon, GeometryCollection)
+INTERSECTION_GROUP_BY_TYPE_ID = np.array(["point", "line", "line", "area", "point", "line", "multipolygon", "area"])
+COLLECTION_PART_GROUP_BY_TYPE_ID = np.array(["point", "line", "line", "area", "point", "line", "area", "area"])
+
+# Output group -> (GPKG layer suffix, Parquet file suffix)
+INTERSECTION_OUTPUTS = {
+    "area": ("errors_areas", "poly"),
+    "point": ("errors_points", "point"),
+    "line": ("errors_lines", "line"),
+    "multipolygon": ("errors_multipolygon", "multipolygon"),
+}
+
+# Default distance in metres within which a feature lies on a line of the intersection table,
+# about what buffering the lines by 0.000001 degrees allowed
+LINE_TOLERANCE_METRES = 0.1
+
+# Metres per degree of latitude, and of longitude at the equator
+METRES_PER_DEGREE = 111_320
+
+# How self_intersect_layers rules find overlaps: intersecting every candidate pair,
+# or validating the layer as a polygon coverage
+SELF_INTERSECTION_METHODS = ("intersection", "coverage")
+
+# Features checked at a time by fail-fast runs, which stop at the first chunk with a violation
+FAIL_FAST_CHUNK_SIZE = 10_000
+
+# Column name prefix of the per-rule masks returned by read_rule_masks
+RULE_MASK_PREFIX = "_rule_"
+
+# Attributes the rules and their outputs use, besides the primary key and geometry
+RULE_COLUMNS = ("id", "name", "feature_type")
+
+SQL_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+SQL_IDENTIFIER = re.compile(r'"([^"]+)"|\b([A-Za-z_][A-Za-z0-9_]*)\b')
+
+
+def referenced_identifiers(expressions: list[str | None]) -> list[str]:
+    """Names that may be columns in SQL expressions, keywords included, string literals skipped"""
+    identifiers: dict[str, None] = {}
+    for expression in expressions:
+        if not expression:
+            continue
+        for quoted, bare in SQL_IDENTIFIER.findall(SQL_STRING_LITERAL.sub("''", expression)):
+            identifiers[quoted or bare] = None
+    return list(identifiers)
+
+
+def _column_values(gdf: gpd.GeoDataFrame, column: str, default: str) -> np.ndarray:
+    if column in gdf.columns:
+        return gdf[column].to_numpy(dtype=object)
+    return np.full(len(gdf), default, dtype=object)
+
+
+def _stable_rank(gdf: gpd.GeoDataFrame, pkey: str) -> np.ndarray:
+    """Rank of the rows of gdf by key, then by geometry WKB, the same whatever order they were read in"""
+    keys = pd.Series(_column_values(gdf, pkey, "")).rank(method="dense", na_option="bottom").to_numpy()
+    rows = pd.DataFrame({"key": keys, "wkb": gdf.geometry.to_wkb().to_numpy()})
+    order = rows.sort_values(["key", "wkb"], kind="stable").index.to_numpy()
+    rank = np.empty(len(gdf), dtype=np.int64)
+    rank[order] = np.arange(len(gdf))
+    return rank
+
+
+def tolerance_in_degrees(tolerance: float, bounds: Bounds) -> float:
+    """A tolerance in metres in degrees of longitude, at least as long as the tolerance anywhere in bounds"""
+    # A degree of longitude is shortest at the latitude furthest from the equator
+    latitude = min(max(abs(bounds[1]), abs(bounds[3])), 89.0)
+    return tolerance / (METRES_PER_DEGREE * float(np.cos(np.radians(latitude))))
+
+
+def is_metric(crs: Any) -> bool:
+    """Whether distances in crs are in metres, assumed when the CRS is unknown"""
+    if crs is None:
+        return True
+    crs = CRS.from_user_input(crs)
+    return bool(crs.is_projected and crs.axis_info[0].unit_name in ("metre", "meter"))
+
+
+def _join_values(values: np.ndarray, owners: list[np.ndarray]) -> np.ndarray:
+    """Join the values of the features owning each result as "first-second-..."."""
+    return np.array(["-".join(str(value) for value in values[positions]) for positions in owners], dtype=object)
+
+
+def _group_values(keys: np.ndarray, values: np.ndarray, count: int) -> list[np.ndarray]:
+    """The sorted values of each key in range(count), grouped with one sort rather than a mask per key"""
+    if count == 0:
+        return []
+    order = np.lexsort((values, keys))
+    return np.split(values[order], np.searchsorted(keys[order], np.arange(1, count)))
+
+
+def _join_pair(values1: np.ndarray, values2: np.ndarray) -> np.ndarray:
+    """Join the values of both features of each pair as "first-second"."""
+    joined = pd.Series(values1, dtype=object).astype(str) + "-" + pd.Series(values2, dtype=object).astype(str)
+    return joined.to_numpy(dtype=object)
+
 
 class AbstractTopologyValidator(ABC):
-    summary_report: dict[str, bool | str]
+    summary_report: dict[str, Any]
     export_validation_data: bool
     db_url: str
     table: str
@@ -20,7 +134,7 @@ class AbstractTopologyValidator(ABC):
     area_crs: int
     message: str
     gdf: gpd.GeoDataFrame
-    sindex: SpatialIndex | None
+    sindex: SpatialIndex | PackedRTree | None
     gdf2: gpd.GeoDataFrame
     bbox: tuple[float, float, float, float] | None
     export_parquet: bool
@@ -29,10 +143,21 @@ class AbstractTopologyValidator(ABC):
     pkey: str
     source: str
     geom_column: str
+    dataset_cache: DatasetCache | None
+    index_store: IndexStore | None
+    tile_core: Bounds | None
+    incremental: bool
+    neighbour_where: str | None
+    changed_mask: np.ndarray | None
+    output_sink: OutputSink | None
+    self_intersection_method: str
+    tolerance: float
+    metrics: RuleMetrics
+    fail_fast: bool
 
     def __init__(
         self,
-        summary_report: dict[str, bool | str],
+        summary_report: dict[str, Any],
         export_validation_data: bool,
         db_url: str,
         table: str,
@@ -63,6 +188,18 @@ class AbstractTopologyValidator(ABC):
         self.sindex = None
         self.gdf2 = gpd.GeoDataFrame()
         self.bbox = bbox
+        self.dataset_cache = None
+        self.index_store = None
+        self.tile_core = None
+        self.owns_unlocated = False
+        self.incremental = False
+        self.neighbour_where = None
+        self.changed_mask = None
+        self.output_sink = None
+        self.self_intersection_method = "intersection"
+        self.tolerance = LINE_TOLERANCE_METRES
+        self.metrics = RuleMetrics()
+        self.fail_fast = False
         self.set_exports(True, False, True)
 
     @property
@@ -79,32 +216,126 @@ class AbstractTopologyValidator(ABC):
         self.export_parquet_by_geometry_type = export_parquet_by_geometry_type
         self.export_gpkg = export_gpkg
 
-    def get_names(self, gdf: gpd.GeoDataFrame, idx1: int, idx2: int) -> tuple[str, str]:
-        if hasattr(gdf, "name"):
-            return gdf.name.iloc[idx1], gdf.name.iloc[idx2]
+    def set_dataset_cache(self, dataset_cache: DatasetCache | None) -> None:
+        self.dataset_cache = dataset_cache
+
+    def set_index_store(self, index_store: IndexStore | None) -> None:
+        """Save the spatial index of each intersection table read whole, and load it on later runs"""
+        self.index_store = index_store
+
+    def set_output_sink(self, output_sink: OutputSink | None) -> None:
+        """Hand the outputs to a sink writing them at the end of the run, instead of writing them right away"""
+        self.output_sink = output_sink
+
+    def write_layer(self, path: str, layer: str, gdf: gpd.GeoDataFrame) -> None:
+        if self.output_sink is not None:
+            self.output_sink.add_layer(path, layer, gdf)
         else:
-            return "noname", "noname"
+            write_gpkg_layer(gdf, path, layer)
 
-    def get_feature_types(self, gdf: gpd.GeoDataFrame, idx1: int, idx2: int) -> tuple[str, str]:
-        if hasattr(gdf, "feature_type"):
-            return gdf.feature_type.iloc[idx1], gdf.feature_type.iloc[idx2]
+    def write_parquet(self, path: str, gdf: gpd.GeoDataFrame) -> None:
+        if self.output_sink is not None:
+            self.output_sink.add_parquet(path, gdf)
         else:
-            return "nofeaturetype", "nofeaturetype"
+            write_parquet(gdf, path)
 
-    def get_keys(self, gdf: gpd.GeoDataFrame, idx1: int, idx2: int) -> tuple[int | str, int | str]:
-        return gdf[self.pkey].iloc[idx1], gdf[self.pkey].iloc[idx2]
+    def set_tile(self, bbox: Bounds, core: Bounds, owns_unlocated: bool = False) -> None:
+        """Validate one tile: read the features within bbox and only report results owned by core.
 
-    def get_valid_geometries(self, geometries: list[dict]) -> list[dict]:
-        all_intersection_geometries_valid: list[dict] = []
-        for item in geometries:
-            geom = item["geometry"]
-            if isinstance(geom, str):
-                continue
-            if geom.is_valid:
-                all_intersection_geometries_valid.append(item)
-            else:
-                continue
-        return all_intersection_geometries_valid
+        ``core`` is in the area CRS, see topographic_validation.tiles.
+        """
+        self.bbox = bbox
+        self.tile_core = core
+        self.owns_unlocated = owns_unlocated
+
+    def set_fail_fast(self, fail_fast: bool) -> None:
+        """Only find whether the rule is violated, stopping at the first violation found"""
+        self.fail_fast = fail_fast
+
+    def first_violations(self, find: Callable[[np.ndarray], gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+        """The violations of the first chunk of features of gdf with any, for fail-fast runs.
+
+        ``find`` returns the violations of the features at the given positions of
+        gdf. An incremental run only searches the changed features.
+        """
+        positions = np.flatnonzero(self.changed_mask) if self.changed_mask is not None else np.arange(len(self.gdf))
+        violations = self.owned(find(positions[:FAIL_FAST_CHUNK_SIZE]))
+        for start in range(FAIL_FAST_CHUNK_SIZE, len(positions), FAIL_FAST_CHUNK_SIZE):
+            if not violations.empty:
+                break
+            violations = self.owned(find(positions[start : start + FAIL_FAST_CHUNK_SIZE]))
+        return violations
+
+    def set_incremental(self, neighbour_where: str | None) -> None:
+        """Validate only the changed features, those matching where_condition, and their neighbourhood.
+
+        A self-intersection rule also reads the features matching ``neighbour_where``
+        within the envelope of the changed features, and reports the pairs with
+        a changed feature. The other rules read the intersection table around the
+        changed features.
+        """
+        self.incremental = True
+        self.neighbour_where = neighbour_where
+
+    def has_edits(self, table: str, changed_where: str) -> bool:
+        """Whether features of table match changed_where, always for a table without updated_at to tell"""
+        if "updated_at" not in self._table_columns(table):
+            return True
+        return not self._read_table(table, changed_where, columns=[]).empty
+
+    def owned(self, gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """The results reported by this validator, all of them unless it validates a tile"""
+        if self.tile_core is None:
+            return gdf
+        return gdf[in_core(gdf, self.tile_core, self.area_crs, self.owns_unlocated)]
+
+    def secondary_bbox(self) -> Bounds | None:
+        """Bbox to read the intersection table with.
+
+        A tile reads every layer feature the features of the tile may relate to,
+        also those beyond the tile.
+        """
+        if (self.tile_core is None and not self.incremental) or self.gdf.empty:
+            return self.bbox
+        return self.envelope(self.gdf, self.tolerance_in_crs_units())
+
+    def tolerance_in_crs_units(self) -> float:
+        """The line tolerance in units of the CRS of gdf, at least as long as the tolerance anywhere in gdf"""
+        if is_metric(self.gdf.crs) or self.gdf.empty:
+            return self.tolerance
+        return tolerance_in_degrees(self.tolerance, self.envelope(self.gdf))
+
+    @staticmethod
+    def envelope(gdf: gpd.GeoDataFrame, distance: float = 0) -> Bounds:
+        minx, miny, maxx, maxy = gdf.total_bounds
+        return (float(minx) - distance, float(miny) - distance, float(maxx) + distance, float(maxy) + distance)
+
+    def load_intersection_table(self) -> gpd.GeoDataFrame:
+        """Read the intersection table, only around the features of gdf when validating a tile or changes"""
+        if self.incremental and self.gdf.empty:
+            # Nothing changed, there is nothing to relate the layer to
+            return gpd.GeoDataFrame(geometry=gpd.GeoSeries([], crs=self.gdf.crs))
+        return self.load_table(self.table2, columns=self.rule_columns(self.table2, []), bbox=self.secondary_bbox())
+
+    def read_neighbourhood(self) -> None:
+        """Replace the changed features in gdf with every feature around them, flagged by changed_mask"""
+        changed = self.gdf
+        if changed.empty:
+            self.changed_mask = np.zeros(0, dtype=bool)
+            return
+        self.gdf = self.load_table(
+            self.table,
+            self.neighbour_where,
+            self.rule_columns(self.table, [self.neighbour_where]),
+            bbox=self.envelope(changed),
+        )
+        self.changed_mask = np.isin(self.feature_keys(self.gdf), self.feature_keys(changed))
+
+    def feature_keys(self, gdf: gpd.GeoDataFrame) -> np.ndarray:
+        """Primary key of every feature, or its geometry as WKB for a table without the key column"""
+        if self.pkey in gdf.columns:
+            return gdf[self.pkey].to_numpy(dtype=object)
+        return np.asarray(shapely.to_wkb(gdf.geometry.values), dtype=object)
 
     @staticmethod
     def get_first_last(geom) -> tuple[Point | None, Point | None]:
@@ -126,6 +357,39 @@ class AbstractTopologyValidator(ABC):
             return s, "", ""
         return s[:first], s[first + 1 : second], s[second + 1 :]
 
+    @abstractmethod
+    def _read_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read one table filtered by where condition and bbox - to be implemented by concrete classes.
+
+        ``columns`` limits the attribute columns read, the geometry is always read.
+        """
+        pass
+
+    @abstractmethod
+    def table_extent(self, table: str) -> tuple[Bounds | None, Any]:
+        """Bounds of a table in its CRS and the CRS, from metadata where possible - to be implemented by concrete classes"""
+        pass
+
+    @abstractmethod
+    def table_estimate(self, table: str) -> tuple[int | None, Bounds | None]:
+        """Rows and bounds of a table from its metadata, None where unknown - to be implemented by concrete classes"""
+        pass
+
+    def table_snapshot(self, table: str) -> tuple[str, str] | None:
+        """Name and version of the file holding a table, tagging its saved spatial index; None when not a file"""
+        return None
+
+    @abstractmethod
+    def _table_columns(self, table: str) -> list[str]:
+        """Column names of a table, read from its schema - to be implemented by concrete classes"""
+        pass
+
     @abstractmethod
     def _read_data(self) -> None:
         """Read the main dataset(s) - to be implemented by concrete classes"""
@@ -136,149 +400,352 @@ class AbstractTopologyValidator(ABC):
         """Read dataset filtered by a rule - to be implemented by concrete classes"""
         pass
 
+    def rule_columns(self, table: str, expressions: list[str | None]) -> list[str]:
+        """The attribute columns of a table a rule needs, including those its expressions reference"""
+        available = set(self._table_columns(table))
+        wanted = [self.pkey, *RULE_COLUMNS, *referenced_identifiers(expressions)]
+        return [column for column in dict.fromkeys(wanted) if column in available and column != self.geom_column]
+
+    def load_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read a table through the run-scoped dataset cache when one is set.
+
+        ``bbox`` defaults to the bbox of the validator.
+        The returned GeoDataFrame may be shared with other rules and must not be mutated.
+        It may hold more than the requested ``columns`` when a wider read was cached.
+        """
+        if bbox is None:
+            bbox = self.bbox
+        if self.dataset_cache is None:
+            return self._read_table(table, where_condition, columns, bbox)
+
+        key = (
+            self.source,
+            self.db_url,
+            table,
+            where_condition,
+            bbox,
+            frozenset(columns) if columns is not None else None,
+        )
+        return self.dataset_cache.get_or_read(key, lambda: self._read_table(table, where_condition, columns, bbox)).gdf
+
+    @abstractmethod
+    def _read_rule_masks(self, rule_expressions: list[str], limit: int | None = None) -> gpd.GeoDataFrame:
+        """Read the features failing any rule, with one mask column per rule - to be implemented by concrete classes.
+
+        With a ``limit`` the read may stop once that many failing features are found.
+        """
+        pass
+
+    def _read_rule_mask_chunks(
+        self, rule_expressions: list[str], limit: int | None = None
+    ) -> Iterator[gpd.GeoDataFrame]:
+        """The features failing any rule, as _read_rule_masks, in chunks for sources streaming their results"""
+        yield self._read_rule_masks(rule_expressions, limit)
+
+    @staticmethod
+    def rule_expressions(null_columns: list[str], query_rules: list[str]) -> list[str]:
+        """SQL expressions that are true for a failing feature, null checks first"""
+        return [f"{column_name} IS NULL" for column_name in null_columns] + list(query_rules)
+
+    def read_rule_masks(self, null_columns: list[str], query_rules: list[str]) -> gpd.GeoDataFrame:
+        """Public method to evaluate several null and query rules in one read of the table.
+
+        Returns the features failing at least one rule with a boolean column
+        ``RULE_MASK_PREFIX + n`` for the n-th rule, null checks first.
+        """
+        return concat(list(self.read_rule_mask_chunks(null_columns, query_rules)))
+
+    def read_rule_mask_chunks(self, null_columns: list[str], query_rules: list[str]) -> Iterator[gpd.GeoDataFrame]:
+        """The features failing any rule as read_rule_masks, one chunk at a time where the source streams them"""
+        chunks = self._read_rule_mask_chunks(
+            self.rule_expressions(null_columns, query_rules), limit=1 if self.fail_fast else None
+        )
+        self.metrics.rows[self.table] = 0
+        while True:
+            with self.metrics.phase("read"):
+                gdf = next(chunks, None)
+            if gdf is None:
+                return
+            self.metrics.rows[self.table] += len(gdf)
+            for i in range(len(null_columns) + len(query_rules)):
+                # SQL NULL results (e.g. a rule on a null column) do not select the feature
+                gdf[f"{RULE_MASK_PREFIX}{i}"] = gdf[f"{RULE_MASK_PREFIX}{i}"].fillna(False).astype(bool)
+            yield gdf
+
     def read_datasets(self) -> None:
         """Public method to read datasets"""
-        self._read_data()
-
+        with self.metrics.phase("read"):
+            self._read_data()
+            self.changed_mask = None
+            if self.incremental and not self.twotable:
+                self.read_neighbourhood()
+        self.metrics.rows[self.table] = len(self.gdf)
         if self.twotable:
-            self.sindex = self.gdf2.sindex
-        else:
-            self.sindex = self.gdf.sindex
+            self.metrics.rows[self.table2] = len(self.gdf2)
+
+        with self.metrics.phase("index"):
+            if self.twotable:
+                self.sindex = self.layer_sindex()
+            else:
+                self.sindex = self.gdf.sindex
+
+    def layer_sindex(self) -> SpatialIndex | PackedRTree:
+        """Spatial index of gdf2, the packed R-tree saved for the table when it is read whole and an index store is set.
+
+        The tree is only held by this validator, the rules query it through layer_index.
+        gdf2 may be shared through the dataset cache and keeps the spatial index of geopandas.
+        """
+        if self.index_store is None or self.gdf2.empty or self.gdf2.has_sindex or self.secondary_bbox() is not None:
+            return self.gdf2.sindex
+        snapshot = self.table_snapshot(self.table2)
+        if snapshot is None:
+            return self.gdf2.sindex
+        name, version = snapshot
+        tree, _ = self.index_store.load_or_build(name, version, self.gdf2.geometry.values)
+        return tree
+
+    def layer_index(self) -> SpatialIndex | PackedRTree:
+        """The spatial index of gdf2 the rules query: the one read_datasets chose, otherwise that of gdf2"""
+        if self.twotable and self.sindex is not None:
+            return self.sindex
+        return self.gdf2.sindex
 
     def read_dataset_by_rule(self, rule_is_null: bool = True, rule: str = "") -> None:
         """Public method to read dataset by rule"""
-        self._read_data_by_rule(rule_is_null, rule)
-        self.sindex = self.gdf.sindex
+        with self.metrics.phase("read"):
+            self._read_data_by_rule(rule_is_null, rule)
+        self.metrics.rows[self.table] = len(self.gdf)
+        with self.metrics.phase("index"):
+            self.sindex = self.gdf.sindex
 
-    def find_self_intersecting(
-        self,
-    ) -> tuple[bool, list[dict], list[dict], list[dict], list[dict], list[str]]:
+    def find_candidate_pairs(
+        self, positions: np.ndarray | None = None, predicate: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Bulk query the spatial index with the geometries of gdf, all of them or those at ``positions``.
+
+        Returns two aligned arrays of positional indices: ``left`` into gdf and
+        ``right`` into the indexed frame (gdf2 for two tables, otherwise gdf).
+        Pairs are sorted so results are deterministic between runs.
+        With a changed_mask only the pairs with a changed feature are returned.
+        A ``predicate`` is evaluated by the tree, otherwise the envelopes intersect.
+        """
         if self.sindex is None:
             raise ValueError("Spatial index is not initialized.")
 
-        candidate_pairs = set()
-        starttime = datetime.datetime.now()
+        if positions is None and self.changed_mask is not None:
+            positions = np.flatnonzero(self.changed_mask)
+        if positions is None:
+            left, right = self.sindex.query(self.gdf.geometry.values, predicate=predicate)
+        else:
+            left, right = self.sindex.query(self.gdf.geometry.values[positions], predicate=predicate)
+            left = positions[left]
+        if self.changed_mask is not None:
+            # Drop self matches, and the mirrored copy of a pair of two changed features
+            keep = (left != right) & (~self.changed_mask[right] | (left < right))
+            left, right = np.minimum(left[keep], right[keep]), np.maximum(left[keep], right[keep])
+        elif not self.twotable:
+            # Drop self matches and the mirrored (j, i) copy of every (i, j) pair
+            if self.tile_core is None:
+                keep = left < right
+            else:
+                # Tiles read features in a different order, orient pairs by key and geometry so every tile agrees
+                rank = _stable_rank(self.gdf, self.pkey)
+                keep = rank[left] < rank[right]
+            left, right = left[keep], right[keep]
 
-        for label, row in self.gdf.iterrows():
-            idx1 = self.gdf.index.get_loc(label)
-            if not isinstance(idx1, int):
-                raise ValueError("Duplicate index labels are not supported")
-            geom = row.get("geom", None) or row.get("geometry", None)
-            if not geom:
-                raise ValueError("Geometry column not found in GeoDataFrame")
+        order = np.lexsort((right, left))
+        return left[order], right[order]
 
-            for idx2 in self.sindex.query(geom):
-                if idx1 < idx2:
-                    candidate_pairs.add((idx1, idx2))
+    def find_self_intersecting(self) -> gpd.GeoDataFrame:
+        if self.fail_fast:
+            return self.first_violations(self.self_intersections_of)
 
+        starttime = datetime.datetime.now()
+        with self.metrics.phase("index"):
+            left, right = self.find_candidate_pairs()
+        self.metrics.add_candidate_pairs(len(left))
         endtime = datetime.datetime.now()
-        print("Time taken for spatial index query:", endtime - starttime)
-
-        intersection_geometries = []
-        intersection_geometries_point = []
-        intersection_geometries_line = []
-        intersection_geometries_multipolygon = []
-        geomtypes = []
+        print(f"Time taken for spatial index query: {endtime - starttime} ({len(left)} candidate pairs)", flush=True)
+
+        return self.evaluate_candidate_pairs(left, right)
+
+    def self_intersections_of(self, positions: np.ndarray) -> gpd.GeoDataFrame:
+        """Intersections of the features at positions of gdf, the tree only returns intersecting pairs"""
+        with self.metrics.phase("index"):
+            left, right = self.find_candidate_pairs(positions, predicate="intersects")
+        self.metrics.add_candidate_pairs(len(left))
+        return self.evaluate_candidate_pairs(left, right)
+
+    def evaluate_candidate_pairs(self, left: np.ndarray, right: np.ndarray) -> gpd.GeoDataFrame:
+        """Intersect every candidate pair in bulk and return one row per intersection part.
+
+        ``left`` indexes gdf and ``right`` indexes gdf2 (or gdf for a single table).
+        """
+        other = self.gdf2 if self.twotable else self.gdf
+        geoms1 = np.asarray(self.gdf.geometry.values)[left]
+        geoms2 = np.asarray(other.geometry.values)[right]
+
+        hits = shapely.intersects(geoms1, geoms2)
+        left, right = left[hits], right[hits]
+        intersections = shapely.intersection(geoms1[hits], geoms2[hits])
+
+        not_empty = ~shapely.is_empty(intersections)
+        left, right, intersections = left[not_empty], right[not_empty], intersections[not_empty]
+
+        return self.build_intersection_frame(
+            intersections,
+            {
+                "pair_names": (
+                    _column_values(self.gdf, "name", "noname")[left],
+                    _column_values(other, "name", "noname")[right],
+                ),
+                "pair_keys": (
+                    _column_values(self.gdf, self.pkey, "")[left],
+                    _column_values(other, self.pkey, "")[right],
+                ),
+                "pair_feature_types": (
+                    _column_values(self.gdf, "feature_type", "nofeaturetype")[left],
+                    _column_values(other, "feature_type", "nofeaturetype")[right],
+                ),
+            },
+            crs=self.gdf.crs,
+        )
 
-        for idx1, idx2 in candidate_pairs:
-            geom1 = self.gdf.geometry.iloc[idx1]
-            if self.twotable:
-                geom2 = self.gdf2.geometry.iloc[idx2]
-            else:
-                geom2 = self.gdf.geometry.iloc[idx2]
-            if geom1.intersects(geom2):
-                intersection_geom = geom1.intersection(geom2)
-                geomtypes.append(intersection_geom.geom_type)
-                if not intersection_geom.is_empty:
-                    original_names = self.get_names(self.gdf, idx1, idx2)
-                    original_keys = self.get_keys(self.gdf, idx1, idx2)
-                    original_feature_types = self.get_feature_types(self.gdf, idx1, idx2)
-                    if intersection_geom.geom_type in ["Point", "MultiPoint"]:
-                        intersection_geometries_point.append(
-                            {
-                                "geometry": intersection_geom,
-                                "pair_names": f"{original_names[0]}-{original_names[1]}",
-                                "pair_keys": f"{original_keys[0]}-{original_keys[1]}",
-                                "pair_feature_types": f"{original_feature_types[0]}-{original_feature_types[1]}",
-                            }
-                        )
-                    elif intersection_geom.geom_type in [
-                        "LineString",
-                        "MultiLineString",
-                    ]:
-                        intersection_geometries_line.append(
-                            {
-                                "geometry": intersection_geom,
-                                "pair_names": f"{original_names[0]}-{original_names[1]}",
-                                "pair_keys": f"{original_keys[0]}-{original_keys[1]}",
-                                "pair_feature_types": f"{original_feature_types[0]}-{original_feature_types[1]}",
-                            }
-                        )
-                    elif intersection_geom.geom_type == "GeometryCollection":
-                        for geom_type, entry in self.handle_geometry_collection(
-                            intersection_geom, original_names, original_feature_types
-                        ):
-                            if geom_type in ["Point", "MultiPoint"]:
-                                intersection_geometries_point.append(entry)
-                            elif geom_type in ["LineString", "MultiLineString"]:
-                                intersection_geometries_line.append(entry)
-                            else:
-                                intersection_geometries.append(entry)
-                    elif intersection_geom.geom_type == "MultiPolygon":
-                        for geom in intersection_geom.geoms:
-                            entry = {
-                                "geometry": geom,
-                                "pair_names": f"{original_names[0]}-{original_names[1]}",
-                                "pair_keys": f"{original_keys[0]}-{original_keys[1]}",
-                                "pair_feature_types": f"{original_feature_types[0]}-{original_feature_types[1]}",
-                            }
-                            intersection_geometries_multipolygon.append(entry)
-                    else:
-                        intersection_geometries.append(
-                            {
-                                "geometry": intersection_geom,
-                                "pair_names": f"{original_names[0]}-{original_names[1]}",
-                                "pair_keys": f"{original_keys[0]}-{original_keys[1]}",
-                                "pair_feature_types": f"{original_feature_types[0]}-{original_feature_types[1]}",
-                            }
-                        )
-
-        has_validation_errors = (
-            len(intersection_geometries) > 0
-            or len(intersection_geometries_point) > 0
-            or len(intersection_geometries_line) > 0
-            or len(intersection_geometries_multipolygon) > 0
+    def build_intersection_frame(
+        self, intersections: np.ndarray, pair_values: dict[str, tuple[np.ndarray, np.ndarray]], crs: Any
+    ) -> gpd.GeoDataFrame:
+        """Build the self-intersection output from intersection geometries and the attributes of each pair.
+
+        ``pair_values`` maps an output column to the values of the first and second
+        feature of every pair, which are joined as "first-second". The
+        ``geometry_type`` column holds the output group of each row, one of
+        ``INTERSECTION_OUTPUTS``.
+        """
+        geoms, pair_idx, groups = self.classify_intersections(intersections)
+        columns = {
+            column: _join_pair(values1[pair_idx], values2[pair_idx])
+            for column, (values1, values2) in pair_values.items()
+        }
+        return gpd.GeoDataFrame(
+            {"geometry": geoms, **columns, "geometry_type": groups},
+            geometry="geometry",
+            crs=crs,
         )
-        return (
-            has_validation_errors,
-            intersection_geometries,
-            intersection_geometries_point,
-            intersection_geometries_line,
-            intersection_geometries_multipolygon,
-            geomtypes,
+
+    @staticmethod
+    def classify_intersections(intersections: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Split intersection geometries into output groups using their GEOS type id.
+
+        MultiPolygons and GeometryCollections are exploded into their parts.
+        Returns the resulting geometries, the index of the intersection each came
+        from and the output group of each geometry.
+        """
+        type_ids = shapely.get_type_id(intersections)
+        explode = np.isin(type_ids, (GEOS_MULTIPOLYGON, GEOS_GEOMETRYCOLLECTION))
+
+        kept_idx = np.flatnonzero(~explode)
+        parts, part_of = shapely.get_parts(intersections[explode], return_index=True)
+        parts_idx = np.flatnonzero(explode)[part_of]
+
+        kept_groups = INTERSECTION_GROUP_BY_TYPE_ID[type_ids[kept_idx]]
+        parts_groups = np.where(
+            type_ids[parts_idx] == GEOS_MULTIPOLYGON,
+            "multipolygon",
+            COLLECTION_PART_GROUP_BY_TYPE_ID[shapely.get_type_id(parts)],
         )
 
-    def handle_geometry_collection(
-        self,
-        intersection_geom,
-        original_names: tuple[str, str],
-        original_feature_types: tuple[str, str],
-    ) -> list[tuple[str, dict]]:
-        geoms: list[tuple[str, dict]] = []
-        for geom in intersection_geom.geoms:
-            entry = {
-                "geometry": self.geom_column,
-                "pair_names": f"{original_names[0]}-{original_names[1]}",
-                "pair_feature_types": f"{original_feature_types[0]}-{original_feature_types[1]}",
-            }
-            geoms.append((geom.geom_type, entry))
-        return geoms
+        pair_idx = np.concatenate([kept_idx, parts_idx])
+        order = np.argsort(pair_idx, kind="stable")
+        geoms = np.concatenate([intersections[kept_idx], parts])[order]
+        groups = np.concatenate([kept_groups, parts_groups])[order]
+        return geoms, pair_idx[order], groups
+
+    def find_coverage_errors(self, gap_width: float = 0) -> gpd.GeoDataFrame:
+        """Validate the polygons of gdf as a coverage with the GEOS coverage operations, in one pass.
+
+        Returns the invalid edges of each polygon, where it overlaps or does not
+        match its neighbours or leaves a gap narrower than gap_width, as lines. The
+        overlaps those edges enclose, and the enclosed gaps along them, are returned
+        as areas with the polygons covering or surrounding them. The columns are those
+        of find_self_intersecting plus ``coverage_error``.
+        """
+        if self.sindex is None:
+            raise ValueError("Spatial index is not initialized.")
+        geoms = np.asarray(self.gdf.geometry.values)
+        polygons = np.flatnonzero(np.isin(shapely.get_type_id(geoms), (GEOS_POLYGON, GEOS_MULTIPOLYGON)))
+        edges = shapely.coverage_invalid_edges(geoms[polygons], gap_width=gap_width)
+        invalid = ~shapely.is_empty(edges)
+        edges, edge_owners = edges[invalid], polygons[invalid]
+
+        # The edges of overlapping polygons enclose the overlaps
+        faces = np.empty(0, dtype=object)
+        if len(edges):
+            faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(shapely.union_all(edges))))
+        point_idx, covering = self.sindex.query(shapely.point_on_surface(faces), predicate="within")
+        overlaps = np.flatnonzero(np.bincount(point_idx, minlength=len(faces)) >= 2)
+
+        # A gap is a hole in the union of the polygons around the edges, along an edge
+        gaps = np.empty(0, dtype=object)
+        if gap_width and len(edges):
+            near = np.intersect1d(self.sindex.query(edges, predicate="intersects")[1], polygons)
+            holes = [
+                shapely.Polygon(ring)
+                for part in shapely.get_parts(shapely.union_all(geoms[near]))
+                for ring in part.interiors
+            ]
+            gaps = np.array(holes, dtype=object)
+            gaps = gaps[np.unique(shapely.STRtree(gaps).query(edges, predicate="intersects")[1])] if holes else gaps
+        gap_idx, around = self.sindex.query(gaps, predicate="intersects")
+
+        covering_faces = _group_values(point_idx, covering, len(faces))
+        owners = [np.array([owner]) for owner in edge_owners]
+        owners += [covering_faces[face] for face in overlaps]
+        owners += _group_values(gap_idx, around, len(gaps))
+        result = gpd.GeoDataFrame(
+            {
+                "geometry": np.concatenate([edges, faces[overlaps], gaps]),
+                "pair_names": _join_values(_column_values(self.gdf, "name", "noname"), owners),
+                "pair_keys": _join_values(_column_values(self.gdf, self.pkey, ""), owners),
+                "pair_feature_types": _join_values(_column_values(self.gdf, "feature_type", "nofeaturetype"), owners),
+                "coverage_error": ["invalid_edge"] * len(edges) + ["overlap"] * len(overlaps) + ["gap"] * len(gaps),
+                "geometry_type": ["line"] * len(edges) + ["area"] * (len(overlaps) + len(gaps)),
+            },
+            geometry="geometry",
+            crs=self.gdf.crs,
+        )
+        if self.changed_mask is not None:
+            result = result[[bool(self.changed_mask[positions].any()) for positions in owners]]
+        return result
 
     def find_intersections_features_between_layers(self) -> gpd.GeoDataFrame:
         starttime = datetime.datetime.now()
 
-        intersecting_features = gpd.sjoin(self.gdf, self.gdf2, how="inner")
-        intersecting_features.columns = [col.replace("_left", "") for col in intersecting_features.columns]
+        if self.fail_fast:
+
+            def intersecting(positions: np.ndarray) -> gpd.GeoDataFrame:
+                matches = self.layer_index().query(self.gdf.geometry.values[positions], predicate="intersects")[0]
+                features: gpd.GeoDataFrame = self.gdf.iloc[positions[np.unique(matches)]]
+                return features
+
+            intersecting_features = self.first_violations(intersecting)
+        else:
+            # As an inner sjoin: once per intersecting layer feature, layer columns missing from gdf come from it
+            left, right = self.layer_index().query(self.gdf.geometry.values, predicate="intersects")
+            order = np.lexsort((right, left))
+            left, right = left[order], right[order]
+            intersecting_features = self.gdf.iloc[left].assign(
+                **{
+                    col: self.gdf2[col].to_numpy()[right]
+                    for col in ("id", "name")
+                    if col not in self.gdf.columns and col in self.gdf2.columns
+                }
+            )
         columns: list[str] = [self.pkey, self.geom_column]
         if self.pkey != "id":
             columns.append("id")
@@ -290,34 +757,69 @@ class AbstractTopologyValidator(ABC):
             self.update_summary_report("feature_in_layers")
 
         endtime = datetime.datetime.now()
-        print("Time taken for spatial index query:", endtime - starttime, flush=True)
+        print("Time taken for feature in layer join:", endtime - starttime, flush=True)
 
         return intersecting_features
 
+    def find_features_near_lines(self, positions: np.ndarray | None = None) -> np.ndarray:
+        """Positions in gdf of the features within the tolerance, in metres, of a feature of gdf2.
+
+        Only the features at ``positions`` are checked when given.
+        The STRtree dwithin query finds them directly in a metric CRS. Otherwise it
+        only prefilters with the tolerance in degrees, and the candidate pairs are
+        checked again, also projected to area_crs. No geometry is buffered.
+        """
+        if positions is None:
+            positions = np.arange(len(self.gdf))
+        with self.metrics.phase("index"):
+            left, right = self.layer_index().query(
+                self.gdf.geometry.values[positions], predicate="dwithin", distance=self.tolerance_in_crs_units()
+            )
+        left = positions[left]
+        self.metrics.add_candidate_pairs(len(left))
+        if len(left) and not is_metric(self.gdf.crs):
+            features, feature_idx = np.unique(left, return_inverse=True)
+            lines, line_idx = np.unique(right, return_inverse=True)
+            projected_features = gpd.GeoSeries(self.gdf.geometry.values[features]).to_crs(self.area_crs).values
+            projected_lines = gpd.GeoSeries(self.gdf2.geometry.values[lines]).to_crs(self.area_crs).values
+            # A degree is at most METRES_PER_DEGREE long, so this close in degrees is within the tolerance.
+            # It keeps features on a line that projects to a slightly different curve, like part of a parallel.
+            within = shapely.dwithin(
+                self.gdf.geometry.values[left], self.gdf2.geometry.values[right], self.tolerance / METRES_PER_DEGREE
+            )
+            within |= shapely.dwithin(projected_features[feature_idx], projected_lines[line_idx], self.tolerance)
+            left = left[within]
+        return np.unique(left)
+
     def find_not_intersections_features_between_layers(
         self, predicate: str = "intersects", buffer_lines: bool = True
     ) -> gpd.GeoDataFrame:
-        if self.gdf.empty or self.gdf2.empty:
-            return self.gdf
-
-        if buffer_lines and self.gdf2.geom_type.iloc[0] in [
-            "LineString",
-            "MultiLineString",
-        ]:
-            buffer_distance = 0.000001
-            self.gdf2[self.geom_column] = self.gdf2.geometry.buffer(
-                buffer_distance
-            )  # TODO: Should this be in 2193? Note that gdf2 is being mutated here.
-
-        intersecting_features = gpd.sjoin(self.gdf, self.gdf2, how="left", predicate=predicate)
-        non_intersecting_features = intersecting_features[intersecting_features["index_right"].isna()]
-        non_intersecting_features.columns = [col.replace("_left", "") for col in non_intersecting_features.columns]
         wanted = [self.pkey, self.geom_column, "id", "name"]
-        columns = list(dict.fromkeys(col for col in wanted if col in non_intersecting_features.columns))
-
-        non_intersecting_features = non_intersecting_features[columns]
+        if self.gdf.empty:
+            return self.gdf[list(dict.fromkeys(col for col in wanted if col in self.gdf.columns))]
+
+        # Features within the tolerance of a line lie on it
+        near_lines = (
+            buffer_lines
+            and predicate == "intersects"
+            and not self.gdf2.empty
+            and self.gdf2.geom_type.iloc[0] in ["LineString", "MultiLineString"]
+        )
 
-        return non_intersecting_features
+        def unmatched(positions: np.ndarray) -> gpd.GeoDataFrame:
+            if near_lines:
+                matched = self.find_features_near_lines(positions)
+            else:
+                matches = self.layer_index().query(self.gdf.geometry.values[positions], predicate=predicate)[0]
+                matched = positions[matches]
+            return self.gdf.iloc[positions[~np.isin(positions, matched)]]
+
+        features = self.first_violations(unmatched) if self.fail_fast else unmatched(np.arange(len(self.gdf)))
+        # As a left sjoin, whatever the layer holds: layer attributes are null for unmatched features
+        features = features.assign(
+            **{col: None for col in wanted if col not in self.gdf.columns and col in self.gdf2.columns}
+        )
+        return features[list(dict.fromkeys(col for col in wanted if col in features.columns))]
 
     def update_summary_report(self, rule: str) -> None:
         self.summary_report[rule] = True
@@ -327,6 +829,7 @@ class AbstractTopologyValidator(ABC):
         gdf: gpd.GeoDataFrame,
         validation_type: str = "topology",
         extended_name: str = "",
+        message: str | None = None,
     ) -> None:
         if self.export_validation_data is False:
             return
@@ -336,199 +839,83 @@ class AbstractTopologyValidator(ABC):
         if len(extended_name) > 0:
             extended_name = f"_{extended_name}"
 
-        gdf["warning"] = self.message
-        gdf["open"] = True
-        gdf["val_date"] = datetime.datetime.now().strftime("%Y-%m-%d")
-        gdf["notes"] = ""
+        gdf = gdf.assign(
+            warning=self.message if message is None else message,
+            open=True,
+            val_date=datetime.datetime.now().strftime("%Y-%m-%d"),
+            notes="",
+        )
 
         if self.export_parquet:
             export_file = os.path.join(
                 self.output_dir,
                 f"{self.layername}_{validation_type}{extended_name}.parquet",
             )
-            gdf.to_parquet(
-                f"{export_file}",
-                engine="pyarrow",
-                compression="zstd",
-                write_covering_bbox=True,
-                row_group_size=50000,
-            )
+            self.write_parquet(export_file, gdf)
         if self.export_gpkg:
             export_file = os.path.join(self.output_dir, f"topology_{validation_type}.gpkg")
-            layer_name = f"{self.layername}_{validation_type}{extended_name}"
-            gdf.to_file(f"{export_file}", layer=layer_name, driver="GPKG", append=True)
+            self.write_layer(export_file, f"{self.layername}_{validation_type}{extended_name}", gdf)
 
-    def save_intersection_outputs(
-        self,
-        intersection_geometries: list[dict],
-        intersection_geometries_point: list[dict],
-        intersection_geometries_line: list[dict],
-        intersection_geometries_multipolygon: list[dict],
-    ) -> None:
+    def save_intersection_outputs(self, intersections: gpd.GeoDataFrame) -> None:
         if self.export_validation_data is False:
             return
-        # Combine all intersection geometries into a single list
-        intersection_geometries = self.get_valid_geometries(intersection_geometries)
-        intersection_geometries_point = self.get_valid_geometries(intersection_geometries_point)
-        intersection_geometries_line = self.get_valid_geometries(intersection_geometries_line)
-        intersection_geometries_multipolygon = self.get_valid_geometries(intersection_geometries_multipolygon)
-
-        validation_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        all_intersection_geometries: list[dict] = []
-
-        if intersection_geometries:
-            all_intersection_geometries += intersection_geometries
-        if intersection_geometries_point:
-            all_intersection_geometries += intersection_geometries_point
-        if intersection_geometries_line:
-            all_intersection_geometries += intersection_geometries_line
-        if intersection_geometries_multipolygon:
-            all_intersection_geometries += intersection_geometries_multipolygon
-        if len(all_intersection_geometries) == 0:
+        intersections = intersections[shapely.is_valid(intersections.geometry.values)].copy()
+        if intersections.empty:
             print("No topology errors found", flush=True)
             return
 
+        # The output group only selects the per geometry type outputs, it is not written
+        groups = intersections.pop("geometry_type")
+        intersections["warning"] = self.message
+        intersections["open"] = True
+        intersections["val_date"] = datetime.datetime.now().strftime("%Y-%m-%d")
+        intersections["notes"] = ""
+
         if self.export_parquet:
-            intersections_gdf = gpd.GeoDataFrame(all_intersection_geometries, crs=self.gdf.crs)
-            intersections_gdf["warning"] = self.message
-            intersections_gdf["open"] = True
-            intersections_gdf["val_date"] = validation_date
-            intersections_gdf["notes"] = ""
-
-            intersections_gdf.to_parquet(
-                os.path.join(self.output_dir, f"{self.layername}_topology_self_intersect.parquet"),
-                engine="pyarrow",
-                compression="zstd",
-                write_covering_bbox=True,
-                row_group_size=50000,
+            self.write_parquet(
+                os.path.join(self.output_dir, f"{self.layername}_topology_self_intersect.parquet"), intersections
             )
 
-        if self.export_gpkg or self.export_parquet_by_geometry_type:
-            if len(intersection_geometries) > 0:
-                intersections_gdf = gpd.GeoDataFrame(intersection_geometries, geometry="geometry", crs=self.gdf.crs)
-                projected_gdf = intersections_gdf.to_crs(epsg=self.area_crs)
-                intersections_gdf["warning"] = self.message
-                intersections_gdf["open"] = True
-                intersections_gdf["val_date"] = validation_date
-                intersections_gdf["notes"] = ""
-                intersections_gdf["Area"] = projected_gdf.geometry.area
-                if self.export_gpkg:
-                    intersections_gdf.to_file(
-                        os.path.join(self.output_dir, "topology_self_intersect.gpkg"),
-                        layer=f"{self.layername}_errors_areas",
-                        driver="GPKG",
-                    )
-                if self.export_parquet_by_geometry_type:
-                    intersections_gdf.to_parquet(
-                        os.path.join(
-                            self.output_dir,
-                            f"{self.layername}_topology_self_intersect_poly.parquet",
-                        ),
-                        engine="pyarrow",
-                        compression="zstd",
-                        write_covering_bbox=True,
-                        row_group_size=50000,
-                    )
-
-            if len(intersection_geometries_point) > 0:
-                intersections_gdf = gpd.GeoDataFrame(intersection_geometries_point, crs=self.gdf.crs)
-                intersections_gdf["warning"] = self.message
-                intersections_gdf["open"] = True
-                intersections_gdf["val_date"] = validation_date
-                intersections_gdf["notes"] = ""
-
-                if self.export_gpkg:
-                    intersections_gdf.to_file(
-                        os.path.join(self.output_dir, "topology_self_intersect.gpkg"),
-                        layer=f"{self.layername}_errors_points",
-                        driver="GPKG",
-                    )
-                if self.export_parquet_by_geometry_type:
-                    intersections_gdf.to_parquet(
-                        os.path.join(
-                            self.output_dir,
-                            f"{self.layername}_topology_self_intersect_point.parquet",
-                        ),
-                        engine="pyarrow",
-                        compression="zstd",
-                        write_covering_bbox=True,
-                        row_group_size=50000,
-                    )
-
-            if len(intersection_geometries_line) > 0:
-                intersections_gdf = gpd.GeoDataFrame(intersection_geometries_line, crs=self.gdf.crs)
-                intersections_gdf["warning"] = self.message
-                intersections_gdf["open"] = True
-                intersections_gdf["val_date"] = validation_date
-                intersections_gdf["notes"] = ""
-
-                if self.export_gpkg:
-                    intersections_gdf.to_file(
-                        os.path.join(self.output_dir, "topology_self_intersect.gpkg"),
-                        layer=f"{self.layername}_errors_lines",
-                        driver="GPKG",
-                    )
-                if self.export_parquet_by_geometry_type:
-                    intersections_gdf.to_parquet(
-                        os.path.join(
-                            self.output_dir,
-                            f"{self.layername}_topology_self_intersect_line.parquet",
-                        ),
-                        engine="pyarrow",
-                        compression="zstd",
-                        write_covering_bbox=True,
-                        row_group_size=50000,
-                    )
-
-            # Save multipolygon intersections if any
-            if len(intersection_geometries_multipolygon) > 0:
-                intersections_gdf = gpd.GeoDataFrame(intersection_geometries_multipolygon, crs=self.gdf.crs)
-                intersections_gdf["warning"] = self.message
-                intersections_gdf["open"] = True
-                intersections_gdf["val_date"] = validation_date
-                intersections_gdf["notes"] = ""
-
-                if self.export_gpkg:
-                    intersections_gdf.to_file(
-                        os.path.join(self.output_dir, "topology_self_intersect.gpkg"),
-                        layer=f"{self.layername}_errors_multipolygon",
-                        driver="GPKG",
-                    )
-                if self.export_parquet_by_geometry_type:
-                    intersections_gdf.to_parquet(
-                        os.path.join(
-                            self.output_dir,
-                            f"{self.layername}_topology_self_intersect_multipolygon.parquet",
-                        ),
-                        engine="pyarrow",
-                        compression="zstd",
-                        write_covering_bbox=True,
-                        row_group_size=50000,
-                    )
-
-    def run_self_intersections(self, rule_name: str = "") -> None:
-        starttime = datetime.datetime.now()
+        if not (self.export_gpkg or self.export_parquet_by_geometry_type):
+            return
 
+        for group, (layer_suffix, parquet_suffix) in INTERSECTION_OUTPUTS.items():
+            intersections_gdf = intersections[groups == group]
+            if intersections_gdf.empty:
+                continue
+            if group == "area":
+                intersections_gdf = intersections_gdf.assign(Area=intersections_gdf.to_crs(epsg=self.area_crs).area)
+
+            if self.export_gpkg:
+                self.write_layer(
+                    os.path.join(self.output_dir, "topology_self_intersect.gpkg"),
+                    f"{self.layername}_{layer_suffix}",
+                    intersections_gdf,
+                )
+            if self.export_parquet_by_geometry_type:
+                self.write_parquet(
+                    os.path.join(self.output_dir, f"{self.layername}_topology_self_intersect_{parquet_suffix}.parquet"),
+                    intersections_gdf,
+                )
+
+    def run_self_intersections(self, rule_name: str = "", method: str = "intersection", gap_width: float = 0) -> None:
+        if method not in SELF_INTERSECTION_METHODS:
+            raise ValueError(f"Unknown self-intersection method: {method}")
+        self.self_intersection_method = method
         self.read_datasets()
-        (
-            has_validation_errors,
-            intersection_geometries,
-            intersection_geometries_point,
-            intersection_geometries_line,
-            intersection_geometries_multipolygon,
-            geomtypes,
-        ) = self.find_self_intersecting()
-        print("Unique intersection geometry types:", list(set(geomtypes)), flush=True)
-
-        if has_validation_errors:
+        with self.metrics.phase("compute"):
+            if method == "coverage":
+                intersections = self.owned(self.find_coverage_errors(gap_width))
+            else:
+                intersections = self.owned(self.find_self_intersecting())
+        print("Unique intersection geometry types:", sorted(intersections.geom_type.unique()), flush=True)
+
+        self.metrics.violations += len(intersections)
+        if not intersections.empty:
             self.update_summary_report("self_intersect_layers")
-        self.save_intersection_outputs(
-            intersection_geometries,
-            intersection_geometries_point,
-            intersection_geometries_line,
-            intersection_geometries_multipolygon,
-        )
-        print("Time taken for read_datasets:", datetime.datetime.now() - starttime, flush=True)
+        with self.metrics.phase("write"):
+            self.save_intersection_outputs(intersections)
+        print("Time taken for self intersections:", self.metrics.describe(), flush=True)
 
     def run_layer_intersections(
         self,
@@ -536,37 +923,80 @@ class AbstractTopologyValidator(ABC):
         intersect: bool = True,
         buffer_lines: bool = True,
         predicate: str = "intersects",
+        tolerance: float | None = None,
     ) -> None:
-        starttime = datetime.datetime.now()
+        """Run a feature on layer rule, ``tolerance`` in metres defaults to LINE_TOLERANCE_METRES"""
+        self.tolerance = LINE_TOLERANCE_METRES if tolerance is None else tolerance
 
         self.read_datasets()
 
-        if intersect:
-            gdf = self.find_intersections_features_between_layers()
-            val_type = "intersect"
-        else:
-            gdf = self.find_not_intersections_features_between_layers(predicate=predicate, buffer_lines=buffer_lines)
-            val_type = "not_intersect"
+        with self.metrics.phase("compute"):
+            if intersect:
+                gdf = self.find_intersections_features_between_layers()
+                val_type = "intersect"
+            else:
+                gdf = self.find_not_intersections_features_between_layers(
+                    predicate=predicate, buffer_lines=buffer_lines
+                )
+                val_type = "not_intersect"
+            gdf = self.owned(gdf)
 
+        self.metrics.violations += len(gdf)
         if not gdf.empty:
             self.update_summary_report(rule_name)
-        self.save_gdf(gdf, validation_type=val_type, extended_name=self.table2.replace(".", "_"))
-        print("Time taken to process layer intersections:", datetime.datetime.now() - starttime, flush=True)
+        with self.metrics.phase("write"):
+            self.save_gdf(gdf, validation_type=val_type, extended_name=self.table2.replace(".", "_"))
+        print("Time taken to process layer intersections:", self.metrics.describe(), flush=True)
+
+    def run_rule_group_checks(self, null_checks: list[dict], query_rules: list[dict]) -> None:
+        """Run every null and query rule on this table and where condition from a single read.
+
+        The failing features are evaluated and written a chunk at a time where the source streams them.
+        """
+        checks = [("null_columns", "null", null_check) for null_check in null_checks]
+        checks += [("query_rule", "query", query_rule) for query_rule in query_rules]
+        violations = [0] * len(checks)
+        chunks = self.read_rule_mask_chunks(
+            [null_check["column"] for null_check in null_checks],
+            [query_rule["rule"] for query_rule in query_rules],
+        )
+        for gdf in chunks:
+            gdf = self.owned(gdf)
+            for i, (rule_name, validation_type, check) in enumerate(checks):
+                with self.metrics.phase("compute"):
+                    failed = gdf.loc[gdf[f"{RULE_MASK_PREFIX}{i}"], [self.pkey, gdf.geometry.name]]
+                if failed.empty:
+                    continue
+                violations[i] += len(failed)
+                self.update_summary_report(rule_name)
+                with self.metrics.phase("write"):
+                    self.save_gdf(
+                        failed,
+                        validation_type=validation_type,
+                        extended_name=check["column"],
+                        message=check.get("message", ""),
+                    )
+        for i, (_, validation_type, check) in enumerate(checks):
+            if not violations[i]:
+                # Reports the rule found no errors
+                self.save_gdf(gpd.GeoDataFrame(), validation_type=validation_type, extended_name=check["column"])
+        self.metrics.violations += sum(violations)
+        print(f"Time taken for process {len(checks)} null and query checks:", self.metrics.describe(), flush=True)
 
     def run_null_column_checks(self, rule_name: str = "", column_name: str = "") -> None:
-        starttime = datetime.datetime.now()
-
         self.read_dataset_by_rule(rule_is_null=True, rule=column_name)
+        self.metrics.violations += len(self.gdf)
         if not self.gdf.empty:
             self.update_summary_report(rule_name)
-        self.save_gdf(self.gdf, validation_type="null", extended_name=column_name)
-        print("Time taken for process null column check:", datetime.datetime.now() - starttime, flush=True)
+        with self.metrics.phase("write"):
+            self.save_gdf(self.gdf, validation_type="null", extended_name=column_name)
+        print("Time taken for process null column check:", self.metrics.describe(), flush=True)
 
     def run_query_rule_checks(self, rule_name: str, rule: str, column_name: str) -> None:
-        starttime = datetime.datetime.now()
-
         self.read_dataset_by_rule(rule_is_null=False, rule=rule)
+        self.metrics.violations += len(self.gdf)
         if not self.gdf.empty:
             self.update_summary_report(rule_name)
-        self.save_gdf(self.gdf, validation_type="query", extended_name=column_name)
-        print("Time taken for process query rule check:", datetime.datetime.now() - starttime, flush=True)
+        with self.metrics.phase("write"):
+            self.save_gdf(self.gdf, validation_type="query", extended_name=column_name)
+        print("Time taken for process query rule check:", self.metrics.describe(), flush=True)
@@ -0,0 +1,243 @@
+"""Read the result of a PostGIS query with COPY ... TO STDOUT (FORMAT binary).
+
+The binary COPY stream is a header followed by one tuple per row: the number
+of fields, then the length and the bytes of each field, -1 for a null. The
+geometry is sent as EWKB and decoded with one ``shapely.from_wkb`` call per
+chunk, rather than parsing a hex string per row. Fixed width columns (booleans,
+integers, floats, dates and timestamps) are decoded with one ``np.frombuffer``
+call per chunk on their joined values, to the dtypes ``gpd.read_postgis`` gives.
+Numeric columns are sent as text and decoded as floats, as ``read_postgis``
+coerces the Decimal values of psycopg. Columns of other types are cast to text
+by the server.
+
+Only the psycopg 3 driver exposes COPY to SQLAlchemy connections, other
+drivers read through ``gpd.read_postgis``.
+"""
+
+import datetime
+import struct
+from collections.abc import Iterator
+from typing import Any
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from sqlalchemy.engine import Engine
+
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+HEADER_SIZE = len(COPY_SIGNATURE) + 8
+
+# Blocks received from the server are parsed once this many bytes are buffered
+PARSE_BUFFER_SIZE = 1 << 22
+
+# 2000-01-01, the epoch of PostgreSQL dates and timestamps
+POSTGRES_EPOCH = np.datetime64("2000-01-01T00:00:00", "us")
+POSTGRES_EPOCH_DATE = datetime.date(2000, 1, 1)
+
+# read_postgis builds its frames from the datetime objects of the driver, in the unit pandas infers for them
+PANDAS_DATETIME_DTYPE = pd.Series([datetime.datetime(2000, 1, 1)]).dtype
+
+_unpack_int16 = struct.Struct("!h").unpack_from
+_unpack_int32 = struct.Struct("!i").unpack_from
+
+# Type OID -> big endian dtype of the binary send format
+FIXED_WIDTH_TYPES = {
+    16: np.dtype("?"),  # bool
+    20: np.dtype(">i8"),  # int8
+    21: np.dtype(">i2"),  # int2
+    23: np.dtype(">i4"),  # int4
+    26: np.dtype(">u4"),  # oid
+    700: np.dtype(">f4"),  # float4
+    701: np.dtype(">f8"),  # float8
+    1082: np.dtype(">i4"),  # date, days since 2000-01-01
+    1114: np.dtype(">i8"),  # timestamp, microseconds since 2000-01-01
+    1184: np.dtype(">i8"),  # timestamptz, microseconds since 2000-01-01 UTC
+}
+TEXT_TYPES = {19, 25, 1042, 1043}  # name, text, bpchar, varchar
+BYTEA_TYPE = 17
+NUMERIC_TYPE = 1700
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class CopyColumn:
+    """A column of the query, how the server sends it and how it is decoded"""
+
+    def __init__(self, name: str, type_code: int, geom_col: str) -> None:
+        self.name = name
+        self.type_code = type_code
+        self.is_geometry = name == geom_col
+        column = f"q.{quote_identifier(name)}"
+        if self.is_geometry:
+            self.select = f"ST_AsEWKB({column})"
+        elif type_code in FIXED_WIDTH_TYPES or type_code in TEXT_TYPES or type_code == BYTEA_TYPE:
+            self.select = column
+        else:
+            # numeric has no fixed width, its text is decoded as a float
+            self.select = f"{column}::text"
+
+    def decode(self, values: list[bytes | None]) -> Any:
+        if self.is_geometry:
+            return shapely.from_wkb(np.array(values, dtype=object))
+        if self.type_code in FIXED_WIDTH_TYPES:
+            return decode_fixed_width(values, self.type_code)
+        if self.type_code == BYTEA_TYPE:
+            return np.array(values, dtype=object)
+        if self.type_code == NUMERIC_TYPE:
+            return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+        return np.array([None if value is None else value.decode() for value in values], dtype=object)
+
+
+def decode_fixed_width(values: list[bytes | None], type_code: int) -> Any:
+    """Decode the values of a fixed width column at once, nulls as NaN, NaT or None as pandas reads them"""
+    dtype = FIXED_WIDTH_TYPES[type_code]
+    nulls = [value is None for value in values]
+    has_nulls = any(nulls)
+    if has_nulls:
+        empty = bytes(dtype.itemsize)
+        values = [empty if value is None else value for value in values]
+    array = np.frombuffer(b"".join(values), dtype=dtype).astype(dtype.newbyteorder("="))  # type: ignore[arg-type]
+
+    if type_code == 1082:
+        # psycopg returns datetime.date objects, which pandas keeps as objects
+        dates = np.array(
+            [POSTGRES_EPOCH_DATE + datetime.timedelta(days=int(days)) for days in array.tolist()], dtype=object
+        )
+        if has_nulls:
+            dates[np.array(nulls)] = None
+        return dates
+    if type_code in (1114, 1184):
+        timestamps = POSTGRES_EPOCH + array.astype("timedelta64[us]")
+        if has_nulls:
+            timestamps[np.array(nulls)] = np.datetime64("NaT")
+        series = pd.Series(timestamps).astype(PANDAS_DATETIME_DTYPE)
+        return series.dt.tz_localize("UTC") if type_code == 1184 else series
+    if not has_nulls:
+        return array
+    if dtype.kind == "b":
+        objects = array.astype(object)
+        objects[np.array(nulls)] = None
+        return objects
+    floats = array.astype(np.float64)
+    floats[np.array(nulls)] = np.nan
+    return floats
+
+
+class BinaryCopyParser:
+    """Parse a binary COPY stream fed in blocks of any size into lists of field values per column"""
+
+    def __init__(self, column_count: int) -> None:
+        self.values: list[list[bytes | None]] = [[] for _ in range(column_count)]
+        self.pending = b""
+        self.header_read = False
+        self.finished = False
+
+    @property
+    def row_count(self) -> int:
+        return len(self.values[0]) if self.values else 0
+
+    def feed(self, data: bytes) -> None:
+        """Parse the complete rows of the data received so far, keeping an incomplete last row for the next block"""
+        buffer = self.pending + data if self.pending else bytes(data)
+        position = 0
+        if not self.header_read:
+            if len(buffer) < HEADER_SIZE:
+                self.pending = buffer
+                return
+            if buffer[: len(COPY_SIGNATURE)] != COPY_SIGNATURE:
+                raise ValueError("Not a binary COPY stream")
+            (extension_size,) = _unpack_int32(buffer, HEADER_SIZE - 4)
+            if len(buffer) < HEADER_SIZE + extension_size:
+                self.pending = buffer
+                return
+            position = HEADER_SIZE + extension_size
+            self.header_read = True
+
+        columns = self.values
+        field_count = len(columns)
+        size = len(buffer)
+        while position + 2 <= size:
+            (count,) = _unpack_int16(buffer, position)
+            if count == -1:
+                self.finished = True
+                position += 2
+                break
+            if count != field_count:
+                raise ValueError(f"Expected {field_count} fields in a row of the COPY stream, got {count}")
+            cursor = position + 2
+            parsed = 0
+            for values in columns:
+                if cursor + 4 > size:
+                    break
+                (length,) = _unpack_int32(buffer, cursor)
+                cursor += 4
+                if length == -1:
+                    values.append(None)
+                elif cursor + length > size:
+                    break
+                else:
+                    values.append(buffer[cursor : cursor + length])
+                    cursor += length
+                parsed += 1
+            if parsed < field_count:
+                # The rest of the row is in the next block
+                for values in columns[:parsed]:
+                    values.pop()
+                break
+            position = cursor
+        self.pending = buffer[position:]
+
+    def take(self, count: int | None = None) -> list[list[bytes | None]]:
+        """The field values of the first count rows parsed, or of every row, which are then cleared"""
+        taken = [values[:count] for values in self.values]
+        self.values = [values[len(taken[0]) :] for values in self.values]
+        return taken
+
+
+def copy_frame(columns: list[CopyColumn], values: list[list[bytes | None]], geom_col: str) -> gpd.GeoDataFrame:
+    data = {column.name: column.decode(column_values) for column, column_values in zip(columns, values, strict=True)}
+    geometry = data[geom_col]
+    srids = shapely.get_srid(geometry[~shapely.is_missing(geometry)][:1])
+    # As read_postgis, the CRS is the SRID of the first geometry
+    crs = f"epsg:{srids[0]}" if len(srids) and srids[0] > 0 else None
+    return gpd.GeoDataFrame(pd.DataFrame(data), geometry=geom_col, crs=crs)
+
+
+def copy_postgis_chunks(engine: Engine, query: str, geom_col: str, chunksize: int) -> Iterator[gpd.GeoDataFrame]:
+    """Read the result of a query through binary COPY, chunksize rows at a time"""
+    connection = engine.raw_connection()
+    try:
+        driver_connection: Any = connection.driver_connection
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+            columns = [CopyColumn(column.name, column.type_code, geom_col) for column in cursor.description]
+            if not any(column.is_geometry for column in columns):
+                raise ValueError(f"Geometry column {geom_col} not in the result of the query")
+
+            select = ", ".join(f"{column.select} AS {quote_identifier(column.name)}" for column in columns)
+            parser = BinaryCopyParser(len(columns))
+            emitted = False
+            with cursor.copy(f"COPY (SELECT {select} FROM ({query}) AS q) TO STDOUT (FORMAT binary)") as copy:
+                blocks: list[bytes] = []
+                buffered = 0
+                for block in copy:
+                    blocks.append(bytes(block))
+                    buffered += len(block)
+                    if buffered < PARSE_BUFFER_SIZE:
+                        continue
+                    parser.feed(b"".join(blocks))
+                    blocks, buffered = [], 0
+                    while parser.row_count >= chunksize:
+                        yield copy_frame(columns, parser.take(chunksize), geom_col)
+                        emitted = True
+                parser.feed(b"".join(blocks))
+            if not parser.finished:
+                raise ValueError("The binary COPY stream ended without its trailer")
+            while parser.row_count or not emitted:
+                yield copy_frame(columns, parser.take(chunksize), geom_col)
+                emitted = True
+    finally:
+        connection.close()
@@ -0,0 +1,152 @@
+"""Validate a folder of Parquet files inside an embedded DuckDB with the spatial extension.
+
+Every Parquet file of the folder is a view of the same name, read straight from
+the file by each query. The where conditions, the null and query rules and the
+spatial rules all run as SQL, in the dialect of the PostGIS config, with the
+joins of the sql_rules module. DuckDB runs them on all cores and spills to disk
+past its memory limit.
+
+DuckDB is an optional dependency, installed separately from the package. Its
+spatial extension is installed on first use when it is not already.
+"""
+
+import os
+from typing import Any
+
+import duckdb  # type: ignore[import-not-found, unused-ignore]
+import geopandas as gpd
+from pyproj import CRS
+
+from topographic_validation.tiles import Bounds
+from topographic_validation.validators.base import RULE_MASK_PREFIX
+from topographic_validation.validators.parquet import ParquetTopologyValidator
+from topographic_validation.validators.sql_pushdown import SqlPushdownTopologyValidator
+from topographic_validation.validators.sql_rules import filtered_table_sql
+
+# (process id, folder) -> connection with a view for each Parquet file of the folder
+_connections: dict[tuple[int, str], Any] = {}
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def get_connection(folder: str) -> Any:
+    """The DuckDB connection of a folder of Parquet files, created on first use in each process"""
+    key = (os.getpid(), folder)
+    connection = _connections.get(key)
+    if connection is None:
+        connection = duckdb.connect()
+        try:
+            connection.execute("LOAD spatial")
+        except duckdb.Error:
+            connection.execute("INSTALL spatial")
+            connection.execute("LOAD spatial")
+        for file in sorted(os.listdir(folder or ".")):
+            if file.endswith(".parquet"):
+                path = os.path.join(folder, file).replace("'", "''")
+                connection.execute(
+                    f"CREATE VIEW {quote_identifier(file.removesuffix('.parquet'))} AS "
+                    f"SELECT * FROM read_parquet('{path}')"
+                )
+        _connections[key] = connection
+    return connection
+
+
+class DuckdbParquetTopologyValidator(SqlPushdownTopologyValidator, ParquetTopologyValidator):
+    def __init__(
+        self,
+        summary_report: dict[str, Any],
+        export_validation_data: bool,
+        db_url: str,
+        table: str,
+        export_layername: str,
+        table2: str | None = None,
+        where_condition: str | None = None,
+        bbox: tuple[float, float, float, float] | None = None,
+        message: str | None = None,
+        output_dir: str = "./topoedit/validation-data",
+        area_crs: int = 2193,
+    ) -> None:
+        super().__init__(
+            summary_report,
+            export_validation_data,
+            db_url,
+            table,
+            export_layername,
+            table2,
+            where_condition,
+            bbox,
+            message,
+            output_dir,
+            area_crs,
+        )
+        self.connection = get_connection(self.db_url)
+        # The spatial rules always run in DuckDB
+        self.pushdown = True
+        self.crs = self.table_extent(table)[1]
+
+    def read_query(self, query: str) -> gpd.GeoDataFrame:
+        """Run a query in DuckDB, the geometries are returned as WKB and decoded in bulk"""
+        geom = quote_identifier(self.geom_column)
+        df = self.connection.sql(f"SELECT * REPLACE (ST_AsWKB({geom}) AS {geom}) FROM ({query})").df()
+        return gpd.GeoDataFrame(
+            df, geometry=gpd.GeoSeries.from_wkb(df[self.geom_column].map(bytes, na_action="ignore"), crs=self.crs)
+        )
+
+    def get_columns(self, table: str) -> list[str]:
+        return self._table_columns(table)
+
+    def bbox_condition(self, bbox: Bounds | None = None) -> str | None:
+        """SQL condition selecting the features whose envelope intersects bbox, the validator bbox by default"""
+        if bbox is None:
+            bbox = self.bbox
+        if not bbox:
+            return None
+        return f"ST_Intersects_Extent({self.geom_column}, ST_MakeEnvelope({bbox[0]}, {bbox[1]}, {bbox[2]}, {bbox[3]}))"
+
+    def transform_sql(self, geom: str, crs: Any) -> str:
+        """DuckDB geometries carry no CRS, both are given, in x/y order like GeoParquet"""
+        source = CRS.from_user_input(crs).to_string().replace("'", "''")
+        return f"ST_Transform({geom}, '{source}', 'EPSG:{self.area_crs}', true)"
+
+    def is_line_layer(self, layer_sql: str) -> bool:
+        """Check the geometry type of the first feature, like the in-memory rule does"""
+        row = self.connection.sql(f"SELECT ST_GeometryType({self.geom_column}) FROM ({layer_sql}) LIMIT 1").fetchone()
+        return row is not None and row[0] in ("LINESTRING", "MULTILINESTRING")
+
+    def _read_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read one table, filtered in DuckDB"""
+        select = [*columns, self.geom_column] if columns is not None else ["*"]
+        conditions = [where_condition, self.bbox_condition(bbox) if bbox else None]
+        return self.read_query(filtered_table_sql(quote_identifier(table), select, conditions))
+
+    def _read_data_by_rule(self, rule_is_null: bool = True, rule: str = "") -> None:
+        """Read the features failing one rule"""
+        condition = f"{rule} IS NULL" if rule_is_null else rule
+        self.gdf = self.read_query(
+            filtered_table_sql(
+                quote_identifier(self.table),
+                [self.pkey, self.geom_column],
+                [condition, self.where_condition, self.bbox_condition()],
+            )
+        )
+
+    def _read_rule_masks(self, rule_expressions: list[str], limit: int | None = None) -> gpd.GeoDataFrame:
+        """Evaluate all rules in one query, only failing features are returned"""
+        masks = ", ".join(f"({expression}) AS {RULE_MASK_PREFIX}{i}" for i, expression in enumerate(rule_expressions))
+        failing = " OR ".join(f"({expression})" for expression in rule_expressions)
+        query = filtered_table_sql(
+            quote_identifier(self.table),
+            [self.pkey, self.geom_column, masks],
+            [failing, self.where_condition, self.bbox_condition()],
+        )
+        if limit is not None:
+            query += f" LIMIT {limit}"
+        return self.read_query(query)
@@ -1,12 +1,40 @@
+import datetime
+import os
+import sqlite3
+from contextlib import closing
+from typing import Any
+
 import geopandas as gpd
+import numpy as np
+
+from topographic_validation.output_sink import concat
+from topographic_validation.tiles import Bounds
+from topographic_validation.validators.base import RULE_MASK_PREFIX, AbstractTopologyValidator
+
+# Features of the candidate pairs read per query, selected by fid
+FID_BATCH_SIZE = 10_000
+
+
+def rtree_overlap_sql(left: str, right: str, distance: float = 0) -> str:
+    """The rtree entry right within distance of the rtree entry left"""
+    return (
+        f"{right}.minx <= {left}.maxx + {distance} AND {right}.maxx >= {left}.minx - {distance} "
+        f"AND {right}.miny <= {left}.maxy + {distance} AND {right}.maxy >= {left}.miny - {distance}"
+    )
+
 
-from topographic_validation.validators.base import AbstractTopologyValidator
+def rtree_bbox_sql(alias: str, bbox: Bounds) -> str:
+    """The rtree entry alias intersecting bbox"""
+    return (
+        f"{alias}.minx <= {bbox[2]} AND {alias}.maxx >= {bbox[0]} "
+        f"AND {alias}.miny <= {bbox[3]} AND {alias}.maxy >= {bbox[1]}"
+    )
 
 
 class GpkgTopologyValidator(AbstractTopologyValidator):
     def __init__(
         self,
-        summary_report: dict[str, bool | str],
+        summary_report: dict[str, Any],
         export_validation_data: bool,
         db_url: str,
         table: str,
@@ -39,17 +67,233 @@ class GpkgTopologyValidator(AbstractTopologyValidator):
         self.pkey = "id"
         self.source = "gpkg"
         self.geom_column = "geometry"
+        self.pushdown = False
+        # Layer rules reporting the features without a match need every feature of the table
+        self.unmatched_features = False
+        # Positions in gdf of the self-intersection candidate pairs found in the rtree
+        self.candidate_pairs: tuple[np.ndarray, np.ndarray] | None = None
+
+    def set_pushdown(self, pushdown: bool) -> None:
+        """Find the candidate pairs of the spatial rules with the rtree of the GeoPackage, only their features are read"""
+        self.pushdown = pushdown
+
+    def _read_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read one layer from GeoPackage file"""
+        return gpd.read_file(
+            self.db_url,
+            layer=table,
+            columns=columns,
+            where=where_condition,
+            bbox=bbox,
+        )
+
+    def _table_columns(self, table: str) -> list[str]:
+        """Column names of a layer, from the SQLite schema of the GeoPackage"""
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            return [row[1] for row in connection.execute("SELECT * FROM pragma_table_info(?)", (table,))]
+
+    def table_snapshot(self, table: str) -> tuple[str, str] | None:
+        """The GeoPackage file as it is now, and the last change of the table it records"""
+        stat = os.stat(self.db_url)
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            row = connection.execute("SELECT last_change FROM gpkg_contents WHERE table_name = ?", (table,)).fetchone()
+        version = f"{os.path.abspath(self.db_url)}:{stat.st_size}:{stat.st_mtime_ns}:{row[0] if row else ''}"
+        return f"{os.path.basename(self.db_url)}.{table}", version
+
+    def table_extent(self, table: str) -> tuple[Bounds | None, Any]:
+        """Bounds from the layer's rtree index, which the GeoPackage keeps up to date"""
+        geometry_column = self.geometry_column_name(table)
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            srs = connection.execute(
+                "SELECT s.organization, s.organization_coordsys_id, s.definition "
+                "FROM gpkg_geometry_columns g JOIN gpkg_spatial_ref_sys s ON g.srs_id = s.srs_id "
+                "WHERE g.table_name = ?",
+                (table,),
+            ).fetchone()
+            try:
+                bounds = connection.execute(
+                    f'SELECT min(minx), min(miny), max(maxx), max(maxy) FROM "rtree_{table}_{geometry_column}"'
+                ).fetchone()
+            except sqlite3.OperationalError:
+                bounds = None
+
+        crs = None
+        if srs is not None and srs[1] > 0:
+            crs = f"{srs[0]}:{srs[1]}" if srs[0] else srs[2]
+        if bounds is None:
+            # No spatial index, read the geometries
+            bounds = tuple(gpd.read_file(self.db_url, layer=table, columns=[]).total_bounds)
+        if bounds[0] is None or any(value != value for value in bounds):
+            return None, crs
+        return (float(bounds[0]), float(bounds[1]), float(bounds[2]), float(bounds[3])), crs
+
+    def table_estimate(self, table: str) -> tuple[int | None, Bounds | None]:
+        """Feature count kept by GDAL in gpkg_ogr_contents, or counted, and the bounds of the rtree"""
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            try:
+                row = connection.execute(
+                    "SELECT feature_count FROM gpkg_ogr_contents WHERE table_name = ?", (table,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None or row[0] is None:
+                row = connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()
+        bounds, _ = self.table_extent(table)
+        return int(row[0]), bounds
+
+    def geometry_column_name(self, table: str) -> str:
+        """Name of the geometry column of a layer in the GeoPackage file"""
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            row = connection.execute(
+                "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?", (table,)
+            ).fetchone()
+        return str(row[0]) if row else "geom"
+
+    def rtree_table(self, table: str) -> str | None:
+        """Name of the rtree spatial index of a layer, None when the layer has none"""
+        name = f"rtree_{table}_{self.geometry_column_name(table)}"
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            row = connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        return name if row else None
+
+    def fid_column(self, table: str) -> str:
+        """The integer primary key of a layer, which the rtree entries are keyed by"""
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            row = connection.execute("SELECT name FROM pragma_table_info(?) WHERE pk = 1", (table,)).fetchone()
+        return str(row[0]) if row else "fid"
+
+    @property
+    def rtree_pushdown(self) -> bool:
+        """Tiles, changed features and coverage checks read every feature, also with pushdown"""
+        if not self.pushdown or self.tile_core is not None or self.incremental:
+            return False
+        if self.self_intersection_method == "coverage" and not self.twotable:
+            return False
+        return all(self.rtree_table(table) for table in dict.fromkeys([self.table, self.table2]))
+
+    def read_candidate_pairs(self, distance: float = 0) -> np.ndarray:
+        """Join the rtree entries of the features of the rule within distance, returns the fids of each pair.
+
+        Both features are within the bbox, and those of the table also match the
+        where condition. A pair of a single table is returned once, the lower fid first.
+        """
+        conditions = [rtree_overlap_sql("a", "b", distance)]
+        if not self.twotable:
+            conditions.append("a.id < b.id")
+        if self.where_condition:
+            eligible = f'SELECT "{self.fid_column(self.table)}" FROM "{self.table}" WHERE {self.where_condition}'
+            conditions += [f"{alias}.id IN ({eligible})" for alias in (("a",) if self.twotable else ("a", "b"))]
+        if self.bbox:
+            conditions += [rtree_bbox_sql("a", self.bbox), rtree_bbox_sql("b", self.bbox)]
+        sql = (
+            f'SELECT a.id, b.id FROM "{self.rtree_table(self.table)}" AS a, "{self.rtree_table(self.table2)}" AS b '
+            f"WHERE {' AND '.join(conditions)} ORDER BY a.id, b.id"
+        )
+        starttime = datetime.datetime.now()
+        with closing(sqlite3.connect(self.db_url)) as connection:
+            pairs = np.array(connection.execute(sql).fetchall(), dtype=np.int64).reshape(-1, 2)
+        print(
+            f"Time taken for rtree query: {datetime.datetime.now() - starttime} ({len(pairs)} candidate pairs)",
+            flush=True,
+        )
+        return pairs
+
+    def read_features(
+        self, table: str, fids: np.ndarray, where_condition: str | None, columns: list[str]
+    ) -> gpd.GeoDataFrame:
+        """Read the features of a layer with the given fids, in batches, indexed by fid"""
+        fids = np.unique(fids)
+        fid_column = self.fid_column(table)
+        frames = []
+        # An empty batch reads no feature but the columns and CRS of the layer
+        for start in range(0, max(len(fids), 1), FID_BATCH_SIZE):
+            where = f'"{fid_column}" IN ({", ".join(map(str, fids[start : start + FID_BATCH_SIZE]))})'
+            if where_condition:
+                where += f" AND ({where_condition})"
+            frames.append(
+                gpd.read_file(
+                    self.db_url,
+                    layer=table,
+                    columns=columns,
+                    where=where,
+                    bbox=self.bbox,
+                    fid_as_index=True,
+                    use_arrow=True,
+                )
+            )
+        return concat(frames).sort_index()
+
+    def read_candidate_datasets(self) -> None:
+        """Read the features of the candidate pairs of the rtree into gdf and gdf2"""
+        columns = self.rule_columns(self.table, [self.where_condition])
+        if self.unmatched_features:
+            # The features without a pair are the violations, the pairs are those within the line tolerance
+            self.gdf = self.load_table(self.table, self.where_condition, columns)
+            pairs = self.read_candidate_pairs(self.tolerance_in_crs_units())
+        else:
+            pairs = self.read_candidate_pairs()
+            # The second fid of a pair is of table2 when the rule has two tables
+            fids = pairs[:, 0] if self.twotable else pairs.ravel()
+            self.gdf = self.read_features(self.table, fids, self.where_condition, columns)
+
+        if self.twotable:
+            gdf2 = self.read_features(self.table2, pairs[:, 1], None, self.rule_columns(self.table2, []))
+            self.gdf2 = gdf2.reset_index(drop=True)
+            self.gdf = self.gdf.reset_index(drop=True)
+            return
+
+        fids = self.gdf.index.to_numpy()
+        self.gdf = self.gdf.reset_index(drop=True)
+        # The rtree entry of a feature of a pair may intersect the bbox when the feature does not
+        read = np.isin(pairs[:, 0], fids) & np.isin(pairs[:, 1], fids)
+        self.candidate_pairs = (np.searchsorted(fids, pairs[read, 0]), np.searchsorted(fids, pairs[read, 1]))
+
+    def read_datasets(self) -> None:
+        """With pushdown only the features of the candidate pairs found in the rtree are read"""
+        if not self.rtree_pushdown:
+            super().read_datasets()
+            return
+        with self.metrics.phase("read"):
+            self.changed_mask = None
+            self.read_candidate_datasets()
+        self.metrics.rows[self.table] = len(self.gdf)
+        if self.twotable:
+            self.metrics.rows[self.table2] = len(self.gdf2)
+        with self.metrics.phase("index"):
+            # Self-intersections take their pairs from the rtree, fail-fast runs query pairs a batch at a time
+            self.sindex = self.gdf2.sindex if self.twotable else self.gdf.sindex if self.fail_fast else None
+
+    def find_self_intersecting(self) -> gpd.GeoDataFrame:
+        if self.candidate_pairs is None or self.fail_fast:
+            return super().find_self_intersecting()
+        left, right = self.candidate_pairs
+        self.metrics.add_candidate_pairs(len(left))
+        return self.evaluate_candidate_pairs(left, right)
+
+    def run_layer_intersections(
+        self,
+        rule_name: str = "",
+        intersect: bool = True,
+        buffer_lines: bool = True,
+        predicate: str = "intersects",
+        tolerance: float | None = None,
+    ) -> None:
+        self.unmatched_features = not intersect
+        super().run_layer_intersections(rule_name, intersect, buffer_lines, predicate, tolerance)
 
     def _read_data(self) -> None:
         """Read data from GeoPackage file"""
-        self.gdf = gpd.read_file(
-            self.db_url,
-            layer=self.table,
-            where=self.where_condition,
-            bbox=self.bbox,
+        self.gdf = self.load_table(
+            self.table, self.where_condition, self.rule_columns(self.table, [self.where_condition])
         )
         if self.table2 != self.table:
-            self.gdf2 = gpd.read_file(self.db_url, layer=self.table2, bbox=self.bbox)
+            self.gdf2 = self.load_intersection_table()
 
     def _read_data_by_rule(self, rule_is_null: bool = True, rule: str = "") -> None:
         """Read data from GeoPackage file filtered by rule"""
@@ -71,3 +315,17 @@ class GpkgTopologyValidator(AbstractTopologyValidator):
             where=where,
             bbox=self.bbox,
         )
+
+    def _read_rule_masks(self, rule_expressions: list[str], limit: int | None = None) -> gpd.GeoDataFrame:
+        """Evaluate all rules in one SQL query against the GeoPackage layer, SQLite stops at the limit"""
+        masks = ", ".join(f"({expression}) AS {RULE_MASK_PREFIX}{i}" for i, expression in enumerate(rule_expressions))
+        where = " OR ".join(f"({expression})" for expression in rule_expressions)
+        if self.where_condition:
+            where = f"({self.where_condition}) AND ({where})"
+
+        columns = ", ".join([*self.rule_columns(self.table, []), self.geometry_column_name(self.table)])
+        sql = f"SELECT {columns}, {masks} FROM {self.table} WHERE {where}"
+        if limit is not None and not self.bbox:
+            # The bbox is applied to the result of the query, the limit could drop the features within it
+            sql += f" LIMIT {limit}"
+        return gpd.read_file(self.db_url, sql=sql, bbox=self.bbox)
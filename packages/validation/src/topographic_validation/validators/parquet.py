@@ -1,14 +1,21 @@
+import json
 import os
+from typing import Any
 
 import geopandas as gpd
+import pandas as pd
+import pyarrow.compute as pc  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
 
-from topographic_validation.validators.base import AbstractTopologyValidator
+from topographic_validation.tiles import Bounds
+from topographic_validation.validators.arrow_filters import UnsupportedFilterError, where_to_expression
+from topographic_validation.validators.base import RULE_MASK_PREFIX, AbstractTopologyValidator
 
 
 class ParquetTopologyValidator(AbstractTopologyValidator):
     def __init__(
         self,
-        summary_report: dict[str, bool | str],
+        summary_report: dict[str, Any],
         export_validation_data: bool,
         db_url: str,
         table: str,
@@ -45,21 +52,76 @@ class ParquetTopologyValidator(AbstractTopologyValidator):
         self.source = "parquet"
         self.geom_column = "geometry"
 
+    def _read_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read one table from its Parquet file"""
+        file = os.path.join(self.db_url, f"{table}.parquet")
+
+        if columns is not None:
+            columns = [*columns, self.geom_column]
+        filters = self.where_filter(file, where_condition) if where_condition else None
+        if filters is not None:
+            # Row groups are skipped using their statistics, together with the covering bbox column
+            gdf = gpd.read_parquet(file, columns=columns, bbox=bbox, filters=filters)
+        else:
+            gdf = gpd.read_parquet(file, columns=columns, bbox=bbox)
+            if where_condition:
+                gdf = gdf.query(self.to_pandas_query(where_condition))
+        return gdf
+
+    @staticmethod
+    def where_filter(file: str, where_condition: str) -> pc.Expression | None:
+        """The where condition as a pyarrow filter, None when it has to be applied in memory"""
+        try:
+            return where_to_expression(where_condition, pq.read_schema(file))
+        except UnsupportedFilterError as e:
+            print(f"Where condition filtered in memory, {e}", flush=True)
+            return None
+
+    def table_snapshot(self, table: str) -> tuple[str, str] | None:
+        """The Parquet file of the table as it is now"""
+        file = os.path.join(self.db_url, f"{table}.parquet")
+        stat = os.stat(file)
+        return table, f"{os.path.abspath(file)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def table_extent(self, table: str) -> tuple[Bounds | None, Any]:
+        """Bounds and CRS from the GeoParquet metadata of the file"""
+        file = os.path.join(self.db_url, f"{table}.parquet")
+        geo = json.loads(pq.read_schema(file).metadata[b"geo"])
+        column = geo["columns"][geo["primary_column"]]
+        # GeoParquet: a missing crs means OGC:CRS84
+        crs = column.get("crs", "OGC:CRS84")
+        if "bbox" in column:
+            return tuple(column["bbox"][:4]), crs
+        bounds = gpd.read_parquet(file, columns=[geo["primary_column"]]).total_bounds
+        if bounds[0] != bounds[0]:  # NaN for an empty table
+            return None, crs
+        return (float(bounds[0]), float(bounds[1]), float(bounds[2]), float(bounds[3])), crs
+
+    def table_estimate(self, table: str) -> tuple[int | None, Bounds | None]:
+        """Rows from the row group statistics of the file footer, and the GeoParquet bounds"""
+        rows = pq.ParquetFile(os.path.join(self.db_url, f"{table}.parquet")).metadata.num_rows
+        bounds, _ = self.table_extent(table)
+        return rows, bounds
+
+    def _table_columns(self, table: str) -> list[str]:
+        """Column names of a table, from the Parquet file schema"""
+        return list(pq.read_schema(os.path.join(self.db_url, f"{table}.parquet")).names)
+
     def _read_data(self) -> None:
         """Read data from Parquet files"""
         print(f"Reading data from Parquet files in: {self.db_url}", flush=True)
-        file = os.path.join(self.db_url, f"{self.table}.parquet")
-
-        gdf = gpd.read_parquet(file, bbox=self.bbox)
-        if self.where_condition:
-            # Note: read_parquet does not support where directly
-            where = self.where_condition.replace("=", "==").replace("AND", "&").replace("OR", "|")
-            gdf = gdf.query(where)
-        self.gdf = gdf
+        self.gdf = self.load_table(
+            self.table, self.where_condition, self.rule_columns(self.table, [self.where_condition])
+        )
 
         if self.table2 != self.table:
-            file = os.path.join(self.db_url, f"{self.table2}.parquet")
-            self.gdf2 = gpd.read_parquet(file, bbox=self.bbox)
+            self.gdf2 = self.load_intersection_table()
 
     def _read_data_by_rule(self, rule_is_null: bool = True, rule: str = "") -> None:
         """Read data from Parquet file filtered by rule"""
@@ -73,21 +135,71 @@ class ParquetTopologyValidator(AbstractTopologyValidator):
             null_gdf = gdf
 
         if self.where_condition:
-            where = self.where_condition
-            # Convert SQL-style conditions to pandas query format
-            if "OR" in where or "AND" in where:
-                where = where.replace("(", "").replace(")", "")
-            where = where.replace("=", "==").replace("AND", "&").replace("OR", "|")
-            where = where.replace("IN", "in").replace("NOT", "not").replace("IS", "is")
-
-            if "is not null" in where:
-                where = "~" + where.replace("is not null", ".isnull()")
-            elif "is null" in where:
-                where = where.replace("is null", ".isnull()")
+            null_gdf = null_gdf.query(self.to_pandas_query(self.where_condition))
 
-            if " in " in where:
-                where = where.replace("(", "[").replace(")", "]")
+        self.gdf = null_gdf[[self.pkey, self.geom_column]]
 
-            null_gdf = null_gdf.query(where)
+    def _read_rule_masks(self, rule_expressions: list[str], limit: int | None = None) -> gpd.GeoDataFrame:
+        """Evaluate all rules in one pass over the table, read once through the dataset cache"""
+        columns = self.rule_columns(self.table, [self.where_condition, *rule_expressions])
+        if limit is not None:
+            return self._first_rule_failures(rule_expressions, columns)
+        gdf = self.load_table(self.table, self.where_condition, columns=columns)
+        return self._rule_failures(gdf, rule_expressions)
 
-        self.gdf = null_gdf[[self.pkey, self.geom_column]]
+    def _first_rule_failures(self, rule_expressions: list[str], columns: list[str]) -> gpd.GeoDataFrame:
+        """Scan the table one row group at a time, stopping at the first row group with a failing feature"""
+        file = os.path.join(self.db_url, f"{self.table}.parquet")
+        parquet_file = pq.ParquetFile(file)
+        filters = self.where_filter(file, self.where_condition) if self.where_condition else None
+        _, crs = self.table_extent(self.table)
+        failures = None
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group, columns=[*columns, self.geom_column])
+            if filters is not None:
+                table = table.filter(filters)
+            df = table.to_pandas()
+            gdf = gpd.GeoDataFrame(df, geometry=gpd.GeoSeries.from_wkb(df[self.geom_column]), crs=crs)
+            if self.where_condition and filters is None:
+                gdf = gdf.query(self.to_pandas_query(self.where_condition))
+            if self.bbox:
+                # Features whose envelope intersects the bbox, like the bbox of a full read
+                bounds = gdf.bounds
+                minx, miny, maxx, maxy = self.bbox
+                gdf = gdf[(bounds.minx <= maxx) & (bounds.maxx >= minx) & (bounds.miny <= maxy) & (bounds.maxy >= miny)]
+            failures = self._rule_failures(gdf, rule_expressions)
+            if not failures.empty:
+                break
+        if failures is None:
+            return self._rule_failures(self.load_table(self.table, self.where_condition, columns), rule_expressions)
+        return failures
+
+    def _rule_failures(self, gdf: gpd.GeoDataFrame, rule_expressions: list[str]) -> gpd.GeoDataFrame:
+        masks = {
+            f"{RULE_MASK_PREFIX}{i}": self._rule_mask(gdf, expression) for i, expression in enumerate(rule_expressions)
+        }
+        failed = pd.concat([pd.Series(False, index=gdf.index), *masks.values()], axis=1).any(axis=1)
+        return gdf.loc[failed, [self.pkey, self.geom_column]].assign(**{k: v[failed] for k, v in masks.items()})
+
+    def _rule_mask(self, gdf: gpd.GeoDataFrame, expression: str) -> pd.Series:
+        column_name, operator, value = self.split_first_two_spaces(expression)
+        if operator == "IS" and value == "NULL":
+            return gdf[column_name].isna()
+        return pd.Series(gdf.eval(self.to_pandas_query(expression)), index=gdf.index).astype(bool)
+
+    @staticmethod
+    def to_pandas_query(where: str) -> str:
+        """Convert SQL-style conditions to pandas query format"""
+        if "OR" in where or "AND" in where:
+            where = where.replace("(", "").replace(")", "")
+        where = where.replace("=", "==").replace("AND", "&").replace("OR", "|")
+        where = where.replace("IN", "in").replace("NOT", "not").replace("IS", "is")
+
+        if "is not null" in where:
+            where = "~" + where.replace("is not null", ".isnull()")
+        elif "is null" in where:
+            where = where.replace("is null", ".isnull()")
+
+        if " in " in where:
+            where = where.replace("(", "[").replace(")", "]")
+        return where
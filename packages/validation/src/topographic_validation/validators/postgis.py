@@ -1,14 +1,144 @@
+from collections.abc import Iterator
+from typing import Any
+
 import geopandas as gpd
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from topographic_validation.output_sink import concat
+from topographic_validation.tiles import Bounds
+from topographic_validation.validators.base import (
+    RULE_MASK_PREFIX,
+)
+from topographic_validation.validators.binary_copy import copy_postgis_chunks
+from topographic_validation.validators.sql_pushdown import SqlPushdownTopologyValidator
+
+# One pooled engine per database, shared by every validator of the run
+_engines: dict[str, Engine] = {}
+_connections_opened = 0
+
+# Rows fetched at a time from the server-side cursor of a query
+STREAM_CHUNK_SIZE = 50_000
+
+# (db_url, schema, table) -> primary key, geometry column and column names
+_table_metadata: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+TABLE_METADATA_SQL = """
+SELECT
+    c.table_schema,
+    c.table_name,
+    c.column_name,
+    kcu.column_name IS NOT NULL AS is_primary_key,
+    gc.f_geometry_column IS NOT NULL AS is_geometry
+FROM
+    information_schema.columns AS c
+LEFT JOIN
+    information_schema.table_constraints AS tc
+ON
+    tc.table_schema = c.table_schema AND tc.table_name = c.table_name AND tc.constraint_type = 'PRIMARY KEY'
+LEFT JOIN
+    information_schema.key_column_usage AS kcu
+ON
+    kcu.constraint_name = tc.constraint_name AND kcu.constraint_schema = tc.constraint_schema
+    AND kcu.column_name = c.column_name
+LEFT JOIN
+    geometry_columns AS gc
+ON
+    gc.f_table_schema = c.table_schema AND gc.f_table_name = c.table_name AND gc.f_geometry_column = c.column_name
+WHERE
+    c.table_schema || '.' || c.table_name IN :tables
+ORDER BY
+    c.table_schema, c.table_name, c.ordinal_position;
+"""
+
+
+def _count_connection(dbapi_connection: Any, connection_record: Any) -> None:
+    global _connections_opened
+    _connections_opened += 1
+
+
+def get_engine(db_url: str) -> Engine:
+    """Get the pooled engine of a database, creating it on first use"""
+    engine = _engines.get(db_url)
+    if engine is None:
+        # psycopg 3 is the driver installed with the package, SQLAlchemy defaults to psycopg2
+        url = (
+            db_url.replace("postgresql://", "postgresql+psycopg://", 1)
+            if db_url.startswith("postgresql://")
+            else db_url
+        )
+        engine = create_engine(url, pool_pre_ping=True)
+        event.listen(engine, "connect", _count_connection)
+        _engines[db_url] = engine
+    return engine
+
 
-from topographic_validation.validators.base import AbstractTopologyValidator
+def connections_opened() -> int:
+    """Number of database connections opened by this process"""
+    return _connections_opened
 
 
-class PostgisTopologyValidator(AbstractTopologyValidator):
+def read_postgis_chunks(
+    engine: Engine, query: str, geom_col: str, chunksize: int = STREAM_CHUNK_SIZE, binary_copy: bool = False
+) -> Iterator[gpd.GeoDataFrame]:
+    """Stream the result of a query through a server-side cursor, chunksize rows at a time.
+
+    The connection is returned to the pool once the chunks are consumed or the
+    iterator is closed. With ``binary_copy`` and the psycopg 3 driver the rows
+    are read through binary COPY instead, see the binary_copy module.
+    """
+    if binary_copy and engine.dialect.driver == "psycopg":
+        yield from copy_postgis_chunks(engine, query, geom_col, chunksize)
+        return
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as connection:
+        yield from gpd.read_postgis(query, connection, geom_col=geom_col, chunksize=chunksize)
+
+
+def split_table_name(table: str) -> tuple[str, str]:
+    """Split a table name into (schema, table), the schema defaults to public"""
+    if "." in table:
+        schema, name = table.split(".", 1)
+        return schema, name
+    return "public", table
+
+
+def load_table_metadata(db_url: str, tables: list[str]) -> None:
+    """Read the primary key, geometry column and columns of all tables with one catalog query"""
+    names = sorted(
+        {split_table_name(table) for table in tables} - {key[1:] for key in _table_metadata if key[0] == db_url}
+    )
+    if not names:
+        return
+
+    df_columns = pd.read_sql(
+        text(TABLE_METADATA_SQL).bindparams(bindparam("tables", expanding=True)),
+        get_engine(db_url),
+        params={"tables": tuple(f"{schema}.{name}" for schema, name in names)},
+    )
+    for schema, name in names:
+        df_table = df_columns[(df_columns["table_schema"] == schema) & (df_columns["table_name"] == name)]
+        pkeys = df_table.loc[df_table["is_primary_key"], "column_name"]
+        geom_columns = df_table.loc[df_table["is_geometry"], "column_name"]
+        _table_metadata[(db_url, schema, name)] = {
+            "pkey": pkeys.iloc[0] if len(pkeys) > 0 else "id",
+            "geom_column": geom_columns.iloc[0] if len(geom_columns) > 0 else "geom",
+            "columns": list(dict.fromkeys(df_table["column_name"])),
+        }
+
+
+def get_table_metadata(db_url: str, table: str) -> dict[str, Any]:
+    """Get the cached metadata of a table, querying the catalog if it was not preloaded"""
+    key = (db_url, *split_table_name(table))
+    if key not in _table_metadata:
+        load_table_metadata(db_url, [table])
+    return _table_metadata[key]
+
+
+class PostgisTopologyValidator(SqlPushdownTopologyValidator):
     def __init__(
         self,
-        summary_report: dict[str, bool | str],
+        summary_report: dict[str, Any],
         export_validation_data: bool,
         db_url: str,
         table: str,
@@ -39,57 +169,108 @@ class PostgisTopologyValidator(AbstractTopologyValidator):
         if not db_url.startswith("postgresql"):
             raise ValueError("db_url must be a PostgreSQL connection string starting with 'postgresql'")
 
-        self.engine = create_engine(db_url)
+        self.engine = get_engine(db_url)
         self.pkey = self.get_primary_key()
         self.source = "postgis"
-        self.geom_column = "geom"
+        self.geom_column = str(get_table_metadata(db_url, table)["geom_column"])
+        self.pushdown = False
+        self.binary_copy = False
+
+    def set_binary_copy(self, binary_copy: bool) -> None:
+        """Read query results through binary COPY rather than read_postgis"""
+        self.binary_copy = binary_copy
+
+    def read_query(self, query: str) -> gpd.GeoDataFrame:
+        """Read the whole result of a query into memory, the chunks it is streamed in are concatenated"""
+        return concat(list(read_postgis_chunks(self.engine, query, self.geom_column, binary_copy=self.binary_copy)))
 
     def get_primary_key(self) -> str:
         """Get the primary key column name from the PostgreSQL table"""
-        table = self.table.split(".")[-1]  # Get the table name without schema
-        schema = self.table.split(".")[0] if "." in self.table else "public"
+        return str(get_table_metadata(self.db_url, self.table)["pkey"])
 
+    def get_columns(self, table: str) -> list[str]:
+        """Get the column names of a PostgreSQL table"""
+        return list(get_table_metadata(self.db_url, table)["columns"])
+
+    def bbox_condition(self, bbox: Bounds | None = None) -> str | None:
+        """SQL condition selecting the features in bbox, the validator bbox by default"""
+        if bbox is None:
+            bbox = self.bbox
+        if not bbox:
+            return None
+        return f"{self.geom_column} && ST_MakeEnvelope({bbox[0]}, {bbox[1]}, {bbox[2]}, {bbox[3]}, 2193)"
+
+    def transform_sql(self, geom: str, crs: Any) -> str:
+        """The geometries carry their SRID"""
+        return f"ST_Transform({geom}, {self.area_crs})"
+
+    def table_extent(self, table: str) -> tuple[Bounds | None, Any]:
+        """Bounds of the geometries of a table, and their SRID"""
+        sql = text(
+            f"""
+        SELECT ST_XMin(extent), ST_YMin(extent), ST_XMax(extent), ST_YMax(extent),
+            (SELECT ST_SRID({self.geom_column}) FROM {table} LIMIT 1) AS srid
+        FROM (SELECT ST_Extent({self.geom_column}) AS extent FROM {table}) AS e;
+        """
+        )
+        with self.engine.connect() as connection:
+            row = connection.execute(sql).one()
+        crs = f"EPSG:{row[4]}" if row[4] else None
+        if row[0] is None:
+            return None, crs
+        return (float(row[0]), float(row[1]), float(row[2]), float(row[3])), crs
+
+    def table_estimate(self, table: str) -> tuple[int | None, Bounds | None]:
+        """Planner statistics: reltuples and the estimated extent, unknown before the table is analyzed"""
+        schema, name = split_table_name(table)
         sql = text(
             """
-        SELECT
-            kcu.column_name
-        FROM
-            information_schema.table_constraints AS tc
-        JOIN
-            information_schema.key_column_usage AS kcu
-        ON
-            tc.constraint_name = kcu.constraint_name
-        WHERE
-            tc.table_name = :table AND tc.constraint_schema = :schema
-            AND tc.constraint_type = 'PRIMARY KEY';
+        SELECT c.reltuples, ST_XMin(e.extent), ST_YMin(e.extent), ST_XMax(e.extent), ST_YMax(e.extent)
+        FROM pg_class c
+        CROSS JOIN (SELECT ST_EstimatedExtent(:schema, :name, :geom_column) AS extent) AS e
+        WHERE c.oid = CAST(:table AS regclass);
         """
         )
+        params = {"schema": schema, "name": name, "geom_column": self.geom_column, "table": f"{schema}.{name}"}
+        with self.engine.connect() as connection:
+            row = connection.execute(sql, params).one()
+        # reltuples is -1 for a table never vacuumed or analyzed
+        rows = int(row[0]) if row[0] is not None and row[0] >= 0 else None
+        bounds = None if row[1] is None else (float(row[1]), float(row[2]), float(row[3]), float(row[4]))
+        return rows, bounds
 
-        df_table = pd.read_sql(sql, self.engine, params={"table": table, "schema": schema})
-        if len(df_table["column_name"]) > 0:
-            pk = df_table["column_name"][0]
-        else:
-            pk = "id"
-        return pk
+    def _table_columns(self, table: str) -> list[str]:
+        return self.get_columns(table)
+
+    def _read_table(
+        self,
+        table: str,
+        where_condition: str | None = None,
+        columns: list[str] | None = None,
+        bbox: Bounds | None = None,
+    ) -> gpd.GeoDataFrame:
+        """Read one table from PostGIS database"""
+        where = ""
+        bbox_condition = self.bbox_condition(bbox) if bbox else None
+        if where_condition:
+            where = f"WHERE {where_condition}"
+            if bbox_condition:
+                where += f" AND {bbox_condition}"
+        elif bbox_condition:
+            where = f"WHERE {bbox_condition}"
+
+        select = ", ".join([*columns, self.geom_column]) if columns is not None else "*"
+        query = f"SELECT {select} FROM {table} {where}"
+        return self.read_query(query)
 
     def _read_data(self) -> None:
         """Read data from PostGIS database"""
-        where_condition = ""
-        if self.where_condition:
-            where_condition = f"WHERE {self.where_condition}"
-            if self.bbox:
-                where_condition += f" AND {self.geom_column} && ST_MakeEnvelope({self.bbox[0]}, {self.bbox[1]}, {self.bbox[2]}, {self.bbox[3]}, 2193)"
-        elif self.bbox:
-            where_condition = f"WHERE {self.geom_column} && ST_MakeEnvelope({self.bbox[0]}, {self.bbox[1]}, {self.bbox[2]}, {self.bbox[3]}, 2193)"
-
-        query = f"SELECT * FROM {self.table} {where_condition}"
-        self.gdf = gpd.read_postgis(query, self.engine, geom_col=self.geom_column)
+        self.gdf = self.load_table(
+            self.table, self.where_condition, self.rule_columns(self.table, [self.where_condition])
+        )
 
         if self.twotable:
-            query2 = f"SELECT * FROM {self.table2}"
-            if self.bbox:
-                query2 += f" WHERE {self.geom_column} && ST_MakeEnvelope({self.bbox[0]}, {self.bbox[1]}, {self.bbox[2]}, {self.bbox[3]}, 2193)"
-            self.gdf2 = gpd.read_postgis(query2, self.engine, geom_col=self.geom_column)
+            self.gdf2 = self.load_intersection_table()
 
     def _read_data_by_rule(self, rule_is_null: bool = True, rule: str = "") -> None:
         """Read data from PostGIS database filtered by rule"""
@@ -108,4 +289,31 @@ class PostgisTopologyValidator(AbstractTopologyValidator):
             where += f" AND {self.geom_column} && ST_MakeEnvelope({self.bbox[0]}, {self.bbox[1]}, {self.bbox[2]}, {self.bbox[3]}, 2193)"
 
         query = f"SELECT {self.pkey}, {self.geom_column} FROM {self.table} {where}"
-        self.gdf = gpd.read_postgis(query, self.engine, geom_col=self.geom_column)
+        self.gdf = self.read_query(query)
+
+    def _read_rule_masks(self, rule_expressions: list[str], limit: int | None = None) -> gpd.GeoDataFrame:
+        """Evaluate all rules in one query, only failing features are returned"""
+        return concat(list(self._read_rule_mask_chunks(rule_expressions, limit)))
+
+    def _read_rule_mask_chunks(
+        self, rule_expressions: list[str], limit: int | None = None
+    ) -> Iterator[gpd.GeoDataFrame]:
+        """The failing features of one query, streamed from a server-side cursor"""
+        masks = ", ".join(f"({expression}) AS {RULE_MASK_PREFIX}{i}" for i, expression in enumerate(rule_expressions))
+        where = "WHERE (" + " OR ".join(f"({expression})" for expression in rule_expressions) + ")"
+        if self.where_condition:
+            where += f" AND ({self.where_condition})"
+        if self.bbox:
+            where += f" AND {self.geom_column} && ST_MakeEnvelope({self.bbox[0]}, {self.bbox[1]}, {self.bbox[2]}, {self.bbox[3]}, 2193)"
+
+        query = f"SELECT {self.pkey}, {self.geom_column}, {masks} FROM {self.table} {where}"
+        if limit is not None:
+            query += f" LIMIT {limit}"
+        return read_postgis_chunks(self.engine, query, self.geom_column, binary_copy=self.binary_copy)
+
+    def is_line_layer(self, layer_sql: str) -> bool:
+        """Check the geometry type of the first feature, like the in-memory rule does"""
+        sql = text(f"SELECT GeometryType({self.geom_column}) FROM ({layer_sql}) layer LIMIT 1")
+        with self.engine.connect() as connection:
+            geometry_type = connection.execute(sql).scalar()
+        return geometry_type in ("LINESTRING", "MULTILINESTRING")
@@ -0,0 +1,185 @@
+"""Run the spatial rules as SQL in the database, only violating rows are transferred.
+
+The queries are built by the sql_rules module. A database validator provides
+how to run a query and read its columns, and the SQL selecting the features in
+a bbox. Coverage checks and the neighbourhood of changed features run in memory.
+"""
+
+import datetime
+from abc import abstractmethod
+from typing import Any
+
+import geopandas as gpd
+import numpy as np
+
+from topographic_validation.tiles import Bounds
+from topographic_validation.validators.base import (
+    METRES_PER_DEGREE,
+    AbstractTopologyValidator,
+    _column_values,
+    is_metric,
+    tolerance_in_degrees,
+)
+from topographic_validation.validators.sql_rules import (
+    features_in_layer_sql,
+    features_not_on_layer_sql,
+    filtered_table_sql,
+    predicate_sql,
+    self_intersection_sql,
+)
+
+
+class SqlPushdownTopologyValidator(AbstractTopologyValidator):
+    pushdown: bool
+
+    def set_pushdown(self, pushdown: bool) -> None:
+        """Run the spatial rules as SQL in the database, only violating rows are transferred"""
+        self.pushdown = pushdown
+
+    @abstractmethod
+    def read_query(self, query: str) -> gpd.GeoDataFrame:
+        """Read the result of a query with the geometry column decoded"""
+
+    @abstractmethod
+    def get_columns(self, table: str) -> list[str]:
+        """Column names of a table"""
+
+    @abstractmethod
+    def bbox_condition(self, bbox: Bounds | None = None) -> str | None:
+        """SQL condition selecting the features in bbox, the validator bbox by default"""
+
+    @abstractmethod
+    def is_line_layer(self, layer_sql: str) -> bool:
+        """Whether the first feature of a layer is a line, like the in-memory rule checks"""
+
+    @abstractmethod
+    def transform_sql(self, geom: str, crs: Any) -> str:
+        """SQL projecting a geometry in crs to area_crs"""
+
+    def dwithin_sql(self, geom_a: str, geom_b: str) -> str:
+        """SQL condition: geom_a lies within the tolerance, in metres, of geom_b.
+
+        As find_features_near_lines, in a geographic CRS the tolerance in degrees
+        only prefilters, the pairs are checked again projected to area_crs.
+        """
+        extent, crs = self.table_extent(self.table)
+        if is_metric(crs) or extent is None:
+            return f"ST_DWithin({geom_a}, {geom_b}, {self.tolerance})"
+        projected_a, projected_b = self.transform_sql(geom_a, crs), self.transform_sql(geom_b, crs)
+        projected = f"ST_DWithin({projected_a}, {projected_b}, {self.tolerance})"
+        return (
+            f"ST_DWithin({geom_a}, {geom_b}, {tolerance_in_degrees(self.tolerance, extent)}) "
+            f"AND (ST_DWithin({geom_a}, {geom_b}, {self.tolerance / METRES_PER_DEGREE}) OR {projected})"
+        )
+
+    def layer_bbox_condition(self) -> str | None:
+        """A tile relates its features to layer features beyond the tile, the database join finds them"""
+        if self.tile_core is not None:
+            return None
+        return self.bbox_condition()
+
+    def read_datasets(self) -> None:
+        """With pushdown the rules query the database directly, nothing is read up front"""
+        if not self.pushdown or self.in_memory_self_intersection:
+            super().read_datasets()
+
+    @property
+    def query_limit(self) -> int | None:
+        """Fail-fast runs only need the first violating row of a pushdown query"""
+        return 1 if self.fail_fast else None
+
+    @property
+    def in_memory_self_intersection(self) -> bool:
+        """Coverage checks and the neighbourhood of changed features run in memory, also with pushdown"""
+        return (self.incremental and not self.twotable) or self.self_intersection_method == "coverage"
+
+    def find_self_intersecting(self) -> gpd.GeoDataFrame:
+        if not self.pushdown or self.in_memory_self_intersection:
+            return super().find_self_intersecting()
+
+        starttime = datetime.datetime.now()
+        table_columns = self.get_columns(self.table)
+        columns = [column for column in (self.pkey, "name", "feature_type") if column in table_columns]
+        features = filtered_table_sql(
+            self.table, [*columns, self.geom_column], [self.where_condition, self.bbox_condition()]
+        )
+        intersections = self.read_query(
+            self_intersection_sql(features, self.pkey, self.geom_column, columns, limit=self.query_limit)
+        )
+        intersections = intersections[~intersections.geometry.is_empty]
+        print("Time taken for self intersection query:", datetime.datetime.now() - starttime, flush=True)
+
+        def pair(column: str, default: str) -> tuple[np.ndarray, np.ndarray]:
+            return (
+                _column_values(intersections, f"{column}_1", default),
+                _column_values(intersections, f"{column}_2", default),
+            )
+
+        return self.build_intersection_frame(
+            np.asarray(intersections.geometry.values),
+            {
+                "pair_names": pair("name", "noname"),
+                "pair_keys": pair(self.pkey, ""),
+                "pair_feature_types": pair("feature_type", "nofeaturetype"),
+            },
+            crs=intersections.crs,
+        )
+
+    def find_intersections_features_between_layers(self) -> gpd.GeoDataFrame:
+        if not self.pushdown:
+            return super().find_intersections_features_between_layers()
+
+        starttime = datetime.datetime.now()
+        table_columns = self.get_columns(self.table)
+        columns = [self.pkey, self.geom_column]
+        if self.pkey != "id" and "id" in table_columns:
+            columns.append("id")
+        if "name" in table_columns:
+            columns.append("name")
+
+        features = filtered_table_sql(self.table, columns, [self.where_condition, self.bbox_condition()])
+        layer = filtered_table_sql(self.table2, [self.geom_column], [self.layer_bbox_condition()])
+        intersecting_features = self.read_query(
+            features_in_layer_sql(features, layer, self.geom_column, columns, limit=self.query_limit)
+        )
+        if not intersecting_features.empty:
+            self.update_summary_report("feature_in_layers")
+
+        print("Time taken for feature in layer query:", datetime.datetime.now() - starttime, flush=True)
+        return intersecting_features
+
+    def find_not_intersections_features_between_layers(
+        self, predicate: str = "intersects", buffer_lines: bool = True
+    ) -> gpd.GeoDataFrame:
+        if not self.pushdown:
+            return super().find_not_intersections_features_between_layers(predicate, buffer_lines)
+
+        starttime = datetime.datetime.now()
+        table_columns = self.get_columns(self.table)
+        columns = [self.pkey, self.geom_column] + [
+            column for column in ("id", "name") if column in table_columns and column != self.pkey
+        ]
+
+        features = filtered_table_sql(self.table, columns, [self.where_condition, self.bbox_condition()])
+        layer = filtered_table_sql(self.table2, [self.geom_column], [self.layer_bbox_condition()])
+
+        geom_a, geom_b = f"a.{self.geom_column}", f"b.{self.geom_column}"
+        if buffer_lines and predicate == "intersects" and self.is_line_layer(layer):
+            match = self.dwithin_sql(geom_a, geom_b)
+        else:
+            match = predicate_sql(predicate, geom_a, geom_b)
+
+        non_intersecting_features = self.read_query(
+            features_not_on_layer_sql(features, layer, columns, match, limit=self.query_limit)
+        )
+        # As the in-memory rule, the layer columns of an unmatched feature are null
+        layer_columns = self.get_columns(self.table2)
+        non_intersecting_features = non_intersecting_features.assign(
+            **{column: None for column in ("id", "name") if column not in columns and column in layer_columns}
+        )
+        wanted = [self.pkey, self.geom_column, "id", "name"]
+        non_intersecting_features = non_intersecting_features[
+            list(dict.fromkeys(column for column in wanted if column in non_intersecting_features.columns))
+        ]
+        print("Time taken for feature not on layer query:", datetime.datetime.now() - starttime, flush=True)
+        return non_intersecting_features
@@ -0,0 +1,79 @@
+"""SQL for running the spatial validation rules inside the database.
+
+Each builder takes the SQL of the (already filtered) feature tables and returns
+a query yielding only the violating rows, in the same shape as the in-memory rules.
+With a ``limit`` the database stops once that many violating rows are found.
+"""
+
+SPATIAL_PREDICATES = {
+    "intersects": "ST_Intersects",
+    "touches": "ST_Touches",
+    "contains": "ST_Contains",
+}
+
+
+def filtered_table_sql(table: str, columns: list[str], conditions: list[str | None]) -> str:
+    """Select columns of a table, AND-ing the given where conditions"""
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    where = " AND ".join(f"({condition})" for condition in conditions if condition)
+    if where:
+        sql += f" WHERE {where}"
+    return sql
+
+
+def predicate_sql(predicate: str, geom_a: str, geom_b: str) -> str:
+    if predicate not in SPATIAL_PREDICATES:
+        raise ValueError(f"Unsupported spatial predicate: {predicate}")
+    return f"{SPATIAL_PREDICATES[predicate]}({geom_a}, {geom_b})"
+
+
+def limit_sql(sql: str, limit: int | None) -> str:
+    return sql if limit is None else f"{sql} LIMIT {limit}"
+
+
+def self_intersection_sql(
+    features_sql: str, pkey: str, geom_column: str, columns: list[str], limit: int | None = None
+) -> str:
+    """Intersections of every pair of intersecting features.
+
+    Each attribute in ``columns`` is returned for both features as ``<column>_1``
+    and ``<column>_2``. Every pair is returned once, ordered by key. A limited
+    query is not ordered, so it does not have to intersect every pair first.
+
+    The features are selected on both sides of the join rather than in a CTE:
+    PostgreSQL materializes a CTE referenced twice, and the join could then not
+    use the spatial index of the table.
+    """
+    attributes = ", ".join(f"a.{column} AS {column}_1, b.{column} AS {column}_2" for column in columns)
+    sql = (
+        f"SELECT {attributes}, ST_Intersection(a.{geom_column}, b.{geom_column}) AS {geom_column} "
+        f"FROM ({features_sql}) a JOIN ({features_sql}) b "
+        f"ON a.{pkey} < b.{pkey} AND ST_Intersects(a.{geom_column}, b.{geom_column})"
+    )
+    if limit is None:
+        return f"{sql} ORDER BY a.{pkey}, b.{pkey}"
+    return limit_sql(sql, limit)
+
+
+def features_in_layer_sql(
+    features_sql: str, layer_sql: str, geom_column: str, columns: list[str], limit: int | None = None
+) -> str:
+    """Features intersecting the layer, once per intersecting layer feature like an inner sjoin"""
+    return limit_sql(
+        f"SELECT {', '.join(f'a.{column}' for column in columns)} "
+        f"FROM ({features_sql}) a JOIN ({layer_sql}) b "
+        f"ON ST_Intersects(a.{geom_column}, b.{geom_column})",
+        limit,
+    )
+
+
+def features_not_on_layer_sql(
+    features_sql: str, layer_sql: str, columns: list[str], match_sql: str, limit: int | None = None
+) -> str:
+    """Features without any layer feature matching ``match_sql``, which relates aliases a and b"""
+    return limit_sql(
+        f"SELECT {', '.join(f'a.{column}' for column in columns)} "
+        f"FROM ({features_sql}) a "
+        f"WHERE NOT EXISTS (SELECT 1 FROM ({layer_sql}) b WHERE {match_sql})",
+        limit,
+    )
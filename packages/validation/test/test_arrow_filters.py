@@ -0,0 +1,69 @@
+"""SQL where conditions compiled into pyarrow filters for Parquet reads."""
+
+from pathlib import Path
+
+import geopandas as gpd
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.dataset as ds  # type: ignore[import-untyped]
+import pytest
+from shapely import Point
+from topographic_validation.validators.arrow_filters import UnsupportedFilterError, where_to_expression
+from topographic_validation.validators.parquet import ParquetTopologyValidator
+
+TABLE = pa.table(
+    {
+        "id": [1, 2, 3, 4],
+        "status": ["built", "under_construction", None, "built"],
+        "lane_count": [2, None, 1, 4],
+        "updated_at": pa.array(["2026-10-10", "2020-01-01", "2026-10-12", "2019-05-05"]).cast(pa.timestamp("ms")),
+    }
+)
+
+
+def _ids(where: str) -> list[int]:
+    return list(ds.dataset(TABLE).to_table(filter=where_to_expression(where, TABLE.schema))["id"].to_pylist())
+
+
+@pytest.mark.parametrize(
+    "where, ids",
+    [
+        ("status = 'built'", [1, 4]),
+        ("status NOT IN ('under_construction')", [1, 4]),
+        ("status IS NULL OR lane_count >= 4", [3, 4]),
+        ("(status = 'built' AND lane_count < 3) OR id = 2", [1, 2]),
+        ("NOT (lane_count BETWEEN 2 AND 3)", [3, 4]),
+        ("updated_at >= '2026-10-01'", [1, 3]),
+        ("lane_count IS NOT NULL AND status <> 'built'", []),
+    ],
+)
+def test_where_to_expression_follows_sql_semantics(where, ids):
+    assert _ids(where) == ids
+
+
+@pytest.mark.parametrize("where", ["status LIKE 'b%'", "missing = 1", "lane_count = 'two'", "upper(status) = 'X'"])
+def test_unsupported_conditions_raise(where):
+    with pytest.raises(UnsupportedFilterError):
+        where_to_expression(where, TABLE.schema)
+
+
+@pytest.mark.parametrize("where", ["updated_at >= '2026-10-01'", "id + 1 = 4"])
+def test_parquet_read_pushes_down_or_falls_back(tmp_path: Path, where):
+    gdf = gpd.GeoDataFrame(
+        {"id": [1, 2, 3], "name": ["b1", "c2", "b3"], "updated_at": ["2026-10-10", "2020-01-01", "2026-10-12"]},
+        geometry=[Point(i, i) for i in range(3)],
+        crs=2193,
+    )
+    gdf.to_parquet(tmp_path / "building.parquet", write_covering_bbox=True)
+    validator = ParquetTopologyValidator(
+        summary_report={},
+        export_validation_data=False,
+        db_url=str(tmp_path / "files.parquet"),
+        table="building",
+        export_layername="building",
+        where_condition=where,
+        bbox=(0.5, 0.5, 5, 5),
+    )
+
+    validator.read_datasets()
+
+    assert list(validator.gdf["id"]) == [3]
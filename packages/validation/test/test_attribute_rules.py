@@ -0,0 +1,95 @@
+"""Null and query rules on one table are evaluated together from a single read."""
+
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely import Point
+from topographic_validation.validators.base import RULE_MASK_PREFIX
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+from topographic_validation.validators.parquet import ParquetTopologyValidator
+
+
+@pytest.fixture
+def water_point(tmp_path: Path) -> dict[str, str]:
+    gdf = gpd.GeoDataFrame(
+        {
+            "id": [1, 2, 3, 4, 5],
+            "type": ["waterfall", "waterfall", "spring", "waterfall", "spring"],
+            "height": [None, 10.0, None, None, 2.0],
+            "orientation": [None, None, 90.0, 45.0, None],
+            "subtype": ["a", "b", "a", "c", None],
+        },
+        geometry=[Point(i, i) for i in range(5)],
+        crs=2193,
+    )
+    gdf.to_file(tmp_path / "data.gpkg", layer="water_point", driver="GPKG")
+    gdf.to_parquet(tmp_path / "water_point.parquet")
+    return {"gpkg": str(tmp_path / "data.gpkg"), "parquet": str(tmp_path / "files.parquet")}
+
+
+@pytest.mark.parametrize("validator_class", [GpkgTopologyValidator, ParquetTopologyValidator])
+def test_rule_masks_for_a_table(water_point, validator_class):
+    db_url = water_point["gpkg" if validator_class is GpkgTopologyValidator else "parquet"]
+    validator = validator_class(
+        summary_report={},
+        export_validation_data=False,
+        db_url=db_url,
+        table="water_point",
+        export_layername="water_point",
+        where_condition="type = 'waterfall'",
+    )
+
+    gdf = validator.read_rule_masks(["height", "orientation"], ["subtype IN ('a', 'c')"])
+
+    failed = {i: sorted(gdf.loc[gdf[f"{RULE_MASK_PREFIX}{i}"], "id"]) for i in range(3)}
+    assert failed == {0: [1, 4], 1: [1, 2], 2: [1, 4]}
+    assert sorted(gdf["id"]) == [1, 2, 4]
+
+
+def test_run_rule_group_checks_updates_summary(water_point):
+    summary: dict = {}
+    validator = GpkgTopologyValidator(
+        summary_report=summary,
+        export_validation_data=False,
+        db_url=water_point["gpkg"],
+        table="water_point",
+        export_layername="water_point",
+        where_condition="type = 'spring'",
+    )
+
+    validator.run_rule_group_checks(
+        [{"column": "height"}, {"column": "orientation"}],
+        [{"column": "subtype", "rule": "subtype = 'z'"}],
+    )
+
+    assert summary == {"null_columns": True}
+
+
+def test_rule_checks_write_each_chunk_of_a_streamed_read(water_point, tmp_path, monkeypatch):
+    """Sources streaming their results, like PostGIS, are evaluated and written one chunk at a time"""
+    validator = ParquetTopologyValidator(
+        summary_report={},
+        export_validation_data=True,
+        db_url=water_point["parquet"],
+        table="water_point",
+        export_layername="water_point",
+        output_dir=str(tmp_path / "output"),
+    )
+    read_rule_masks = validator._read_rule_masks
+
+    def one_feature_at_a_time(rule_expressions, limit=None):
+        gdf = read_rule_masks(rule_expressions, limit)
+        for i in range(len(gdf)):
+            yield gdf.iloc[[i]]
+
+    monkeypatch.setattr(validator, "_read_rule_mask_chunks", one_feature_at_a_time)
+    (tmp_path / "output").mkdir()
+
+    validator.run_rule_group_checks([{"column": "height"}], [{"column": "subtype", "rule": "subtype = 'z'"}])
+
+    written = gpd.read_file(tmp_path / "output" / "topology_null.gpkg", layer="water_point_null_height")
+    assert sorted(written["id"]) == [1, 3, 4]
+    assert validator.metrics.violations == 3
+    assert validator.metrics.rows["water_point"] == 3
+    assert validator.summary_report == {"null_columns": True}
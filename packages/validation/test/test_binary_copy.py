@@ -0,0 +1,170 @@
+import datetime
+import os
+import struct
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely import Point
+from topographic_validation.validators.binary_copy import (
+    COPY_SIGNATURE,
+    BinaryCopyParser,
+    CopyColumn,
+    copy_frame,
+)
+from sqlalchemy import text
+from topographic_validation.validators.postgis import get_engine, read_postgis_chunks
+
+# A PostGIS database the parity tests may create tables in, they are skipped without one
+TEST_DB_URL = os.environ.get("TOPOGRAPHIC_VALIDATION_TEST_DB")
+
+
+def _copy_stream(rows: list[list[bytes | None]]) -> bytes:
+    """A binary COPY stream of rows of field values, as sent by the server"""
+    stream = COPY_SIGNATURE + struct.pack("!ii", 0, 0)
+    for row in rows:
+        stream += struct.pack("!h", len(row))
+        for value in row:
+            stream += struct.pack("!i", -1) if value is None else struct.pack("!i", len(value)) + value
+    return stream + struct.pack("!h", -1)
+
+
+COLUMNS = [
+    CopyColumn("id", 20, "geom"),
+    CopyColumn("name", 1043, "geom"),
+    CopyColumn("height", 23, "geom"),
+    CopyColumn("area", 1700, "geom"),
+    CopyColumn("updated_at", 1114, "geom"),
+    CopyColumn("survey_date", 1082, "geom"),
+    CopyColumn("geom", 0, "geom"),
+]
+
+
+def _rows() -> list[list[bytes | None]]:
+    points = [shapely.set_srid(Point(x, x), 2193) for x in range(3)]
+    return [
+        [
+            struct.pack("!q", index),
+            name,
+            None if height is None else struct.pack("!i", height),
+            str(index + 0.5).encode(),
+            struct.pack("!q", index * 86_400_000_000),
+            None if index == 1 else struct.pack("!i", index * 366),
+            shapely.to_wkb(point, include_srid=True),
+        ]
+        for index, (name, height, point) in enumerate(
+            zip([b"a", None, "é".encode()], [10, None, 30], points, strict=True)
+        )
+    ]
+
+
+def test_copy_columns_send_other_types_as_text() -> None:
+    assert [column.select for column in COLUMNS] == [
+        'q."id"',
+        'q."name"',
+        'q."height"',
+        'q."area"::text',
+        'q."updated_at"',
+        'q."survey_date"',
+        'ST_AsEWKB(q."geom")',
+    ]
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 10_000])
+def test_parser_reads_rows_split_across_blocks(block_size: int) -> None:
+    stream = _copy_stream(_rows())
+    parser = BinaryCopyParser(len(COLUMNS))
+    for start in range(0, len(stream), block_size):
+        parser.feed(stream[start : start + block_size])
+
+    assert parser.finished
+    assert parser.row_count == 3
+    assert parser.take(2)[1] == [b"a", None]
+    assert parser.take()[1] == ["é".encode()]
+    assert parser.row_count == 0
+
+
+def test_copy_frame_decodes_columns_as_read_postgis() -> None:
+    parser = BinaryCopyParser(len(COLUMNS))
+    parser.feed(_copy_stream(_rows()))
+
+    gdf = copy_frame(COLUMNS, parser.take(), "geom")
+
+    assert gdf["id"].dtype == np.int64
+    assert gdf["id"].tolist() == [0, 1, 2]
+    assert gdf["name"].fillna("").tolist() == ["a", "", "é"]
+    # As pandas reads integers with nulls
+    assert gdf["height"].isna().tolist() == [False, True, False]
+    assert gdf["height"].dtype == np.float64
+    assert gdf["area"].tolist() == [0.5, 1.5, 2.5]
+    assert gdf["updated_at"].tolist() == [
+        pd.Timestamp("2000-01-01"),
+        pd.Timestamp("2000-01-02"),
+        pd.Timestamp("2000-01-03"),
+    ]
+    assert gdf["survey_date"].tolist() == [datetime.date(2000, 1, 1), None, datetime.date(2002, 1, 2)]
+    assert gdf.crs == "EPSG:2193"
+    assert gdf.geometry.x.tolist() == [0.0, 1.0, 2.0]
+
+
+def test_copy_frame_dtypes_match_the_frame_read_sql_builds() -> None:
+    parser = BinaryCopyParser(len(COLUMNS))
+    parser.feed(_copy_stream(_rows()))
+    gdf = copy_frame(COLUMNS, parser.take(), "geom")
+
+    # read_postgis builds its frame with read_sql from the values psycopg returns
+    records = [
+        (0, "a", 10, Decimal("0.5"), datetime.datetime(2000, 1, 1), datetime.date(2000, 1, 1)),
+        (1, None, None, Decimal("1.5"), datetime.datetime(2000, 1, 2), None),
+        (2, "é", 30, Decimal("2.5"), datetime.datetime(2000, 1, 3), datetime.date(2002, 1, 2)),
+    ]
+    names = [column.name for column in COLUMNS[:-1]]
+    expected = pd.DataFrame.from_records(records, columns=names, coerce_float=True)
+
+    pd.testing.assert_frame_equal(pd.DataFrame(gdf[names]), expected)
+
+
+def test_parser_rejects_other_streams() -> None:
+    with pytest.raises(ValueError):
+        BinaryCopyParser(1).feed(b"id,geom\n1,POINT (0 0)\n" * 2)
+
+
+def test_postgresql_urls_use_psycopg_3() -> None:
+    assert get_engine("postgresql://user@localhost/copy_test").dialect.driver == "psycopg"
+
+
+@pytest.mark.skipif(TEST_DB_URL is None, reason="Set TOPOGRAPHIC_VALIDATION_TEST_DB to a PostGIS database URL")
+def test_binary_copy_reads_the_same_frame_as_read_postgis() -> None:
+    engine = get_engine(str(TEST_DB_URL))
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS binary_copy_parity"))
+        connection.execute(
+            text(
+                "CREATE TABLE binary_copy_parity (id bigint, height integer, flag boolean, area numeric, "
+                "name varchar, survey_date date, updated_at timestamp, checked_at timestamptz, "
+                "geom geometry(Point, 2193))"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO binary_copy_parity VALUES "
+                "(1, 10, true, 1.25, 'a', '2025-03-24', '2025-03-24 10:00:00', '2025-03-24 10:00:00+13', "
+                "ST_SetSRID(ST_MakePoint(1, 2), 2193)), "
+                "(2, NULL, NULL, NULL, NULL, NULL, NULL, NULL, ST_SetSRID(ST_MakePoint(3, 4), 2193))"
+            )
+        )
+    query = "SELECT * FROM binary_copy_parity ORDER BY id"
+    try:
+        expected = pd.concat(list(read_postgis_chunks(engine, query, "geom")))
+        copied = pd.concat(list(read_postgis_chunks(engine, query, "geom", binary_copy=True)))
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE binary_copy_parity"))
+
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(copied.drop(columns="geom")), pd.DataFrame(expected.drop(columns="geom"))
+    )
+    assert copied.crs == expected.crs
+    assert copied.geometry.geom_equals(expected.geometry).all()
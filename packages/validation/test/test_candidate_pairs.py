@@ -0,0 +1,131 @@
+"""Bulk candidate pair generation must match the per-row spatial index loop."""
+
+import geopandas as gpd
+import numpy as np
+from shapely import box
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+
+
+def _validator(gdf: gpd.GeoDataFrame, gdf2: gpd.GeoDataFrame | None = None) -> GpkgTopologyValidator:
+    validator = GpkgTopologyValidator(
+        summary_report={},
+        export_validation_data=False,
+        db_url="unused.gpkg",
+        table="a",
+        export_layername="a",
+        table2=None if gdf2 is None else "b",
+    )
+    validator.gdf = gdf
+    if gdf2 is not None:
+        validator.gdf2 = gdf2
+        validator.sindex = gdf2.sindex
+    else:
+        validator.sindex = gdf.sindex
+    return validator
+
+
+def _random_boxes(seed: int, count: int) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 100, size=(count, 2))
+    size = rng.uniform(0.5, 5, size=(count, 2))
+    geoms = [box(x, y, x + w, y + h) for (x, y), (w, h) in zip(xy, size, strict=True)]
+    return gpd.GeoDataFrame({"id": np.arange(count)}, geometry=geoms, crs=2193)
+
+
+def test_candidate_pairs_match_row_loop():
+    gdf = _random_boxes(seed=1, count=500)
+    validator = _validator(gdf)
+
+    expected = set()
+    for idx1, geom in enumerate(gdf.geometry):
+        for idx2 in gdf.sindex.query(geom):
+            if idx1 < idx2:
+                expected.add((idx1, int(idx2)))
+
+    left, right = validator.find_candidate_pairs()
+
+    assert set(zip(left.tolist(), right.tolist(), strict=True)) == expected
+    assert len(left) == len(expected)
+
+
+def test_tile_candidate_pairs_without_key_do_not_depend_on_read_order():
+    gdf = _random_boxes(seed=4, count=300).drop(columns="id")
+    shuffled = gdf.sample(frac=1, random_state=5).reset_index(drop=True)
+
+    def pairs(frame: gpd.GeoDataFrame) -> set[tuple[bytes, bytes]]:
+        validator = _validator(frame)
+        validator.set_tile((0, 0, 100, 100), (0, 0, 50, 50))
+        left, right = validator.find_candidate_pairs()
+        wkb = frame.geometry.to_wkb().to_numpy()
+        return set(zip(wkb[left], wkb[right], strict=True))
+
+    assert "id" not in gdf.columns
+    assert pairs(gdf) == pairs(shuffled)
+    assert len(pairs(gdf)) > 10
+
+
+def test_candidate_pairs_two_tables_keep_all_matches():
+    gdf = _random_boxes(seed=2, count=200)
+    gdf2 = _random_boxes(seed=3, count=300)
+    validator = _validator(gdf, gdf2)
+
+    expected = {(idx1, int(idx2)) for idx1, geom in enumerate(gdf.geometry) for idx2 in gdf2.sindex.query(geom)}
+
+    left, right = validator.find_candidate_pairs()
+
+    assert set(zip(left.tolist(), right.tolist(), strict=True)) == expected
+
+
+def test_rtree_pairs_match_the_spatial_index(tmp_path):
+    db_url = str(tmp_path / "boxes.gpkg")
+    gdf = _random_boxes(seed=4, count=300)
+    gdf2 = _random_boxes(seed=5, count=200)
+    gdf.to_file(db_url, layer="a", driver="GPKG")
+    gdf2.to_file(db_url, layer="b", driver="GPKG")
+
+    for table2, other in [(None, gdf), ("b", gdf2)]:
+        validator = GpkgTopologyValidator({}, False, db_url, "a", "a", table2=table2, where_condition="id % 2 = 0")
+        # fids start at 1 in the order the features were written
+        left, right = other.sindex.query(gdf.geometry.values)
+        keep = gdf["id"].to_numpy()[left] % 2 == 0
+        if table2 is None:
+            keep &= (left < right) & (gdf["id"].to_numpy()[right] % 2 == 0)
+        expected = {(int(i) + 1, int(j) + 1) for i, j in zip(left[keep], right[keep], strict=True)}
+
+        pairs = validator.read_candidate_pairs()
+
+        assert {(int(i), int(j)) for i, j in pairs} == expected
+
+
+def test_rtree_pushdown_reads_only_the_features_of_pairs(tmp_path):
+    db_url = str(tmp_path / "boxes.gpkg")
+    _random_boxes(seed=6, count=400).to_file(db_url, layer="a", driver="GPKG")
+    results = {}
+    for pushdown in (False, True):
+        validator = GpkgTopologyValidator(
+            {}, False, db_url, "a", "a", where_condition="id < 300", bbox=(10, 10, 90, 90), output_dir=str(tmp_path)
+        )
+        validator.set_pushdown(pushdown)
+        validator.read_datasets()
+        results[pushdown] = (validator.find_self_intersecting(), len(validator.gdf))
+
+    (expected, all_rows), (intersections, read_rows) = results[False], results[True]
+    assert read_rows < all_rows
+    assert intersections["pair_keys"].tolist() == expected["pair_keys"].tolist()
+    assert intersections.geometry.geom_equals(expected.geometry).all()
+
+
+def test_rtree_pushdown_reads_the_features_of_each_table_by_its_own_fids(tmp_path):
+    db_url = str(tmp_path / "boxes.gpkg")
+    boxes = [box(10 * i, 0, 10 * i + 1, 1) for i in range(300)]
+    gpd.GeoDataFrame({"id": range(300)}, geometry=boxes, crs=2193).to_file(db_url, layer="a", driver="GPKG")
+    # Only the last 50 features of b, fids 151 to 200, overlap the first 50 of a, fids 1 to 50
+    far = [box(10 * i, 1000, 10 * i + 1, 1001) for i in range(150)]
+    gpd.GeoDataFrame({"id": range(200)}, geometry=far + boxes[:50], crs=2193).to_file(db_url, layer="b", driver="GPKG")
+
+    validator = GpkgTopologyValidator({}, False, db_url, "a", "a", table2="b", output_dir=str(tmp_path))
+    validator.set_pushdown(True)
+    validator.read_datasets()
+
+    assert sorted(validator.gdf["id"]) == list(range(50))
+    assert sorted(validator.gdf2["id"]) == list(range(150, 200))
@@ -0,0 +1,46 @@
+"""Validators only read the columns the rules need."""
+
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely import Point
+from topographic_validation.validators.base import referenced_identifiers
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+from topographic_validation.validators.parquet import ParquetTopologyValidator
+
+
+def test_referenced_identifiers_skips_string_literals():
+    identifiers = referenced_identifiers(["type = 'name AND status'", None, '"Lane Count" IS NULL'])
+    assert identifiers == ["type", "Lane Count", "IS", "NULL"]
+
+
+@pytest.mark.parametrize("validator_class", [GpkgTopologyValidator, ParquetTopologyValidator])
+def test_read_datasets_projects_columns(tmp_path: Path, validator_class):
+    gdf = gpd.GeoDataFrame(
+        {
+            "id": [1, 2],
+            "name": ["a", "b"],
+            "type": ["vehicle", "foot"],
+            "surface": ["sealed", "unsealed"],
+            "lane_count": [2, 1],
+        },
+        geometry=[Point(0, 0), Point(1, 1)],
+        crs=2193,
+    )
+    gdf.to_file(tmp_path / "data.gpkg", layer="road_line", driver="GPKG")
+    gdf.to_parquet(tmp_path / "road_line.parquet")
+    db_url = str(tmp_path / ("data.gpkg" if validator_class is GpkgTopologyValidator else "files.parquet"))
+
+    validator = validator_class(
+        summary_report={},
+        export_validation_data=False,
+        db_url=db_url,
+        table="road_line",
+        export_layername="road_line",
+        where_condition="type = 'vehicle'",
+    )
+    validator.read_datasets()
+
+    assert sorted(validator.gdf.columns) == ["geometry", "id", "name", "type"]
+    assert list(validator.gdf["id"]) == [1]
@@ -0,0 +1,78 @@
+"""Run-scoped dataset cache shared between validation rules."""
+
+import geopandas as gpd
+from shapely import Point
+from topographic_validation.cache import DatasetCache, estimate_nbytes
+
+
+def _frame(count: int) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame({"id": range(count)}, geometry=[Point(i, i) for i in range(count)], crs=2193)
+
+
+def test_get_or_read_reads_once_and_shares_sindex():
+    cache = DatasetCache()
+    reads = []
+
+    def read() -> gpd.GeoDataFrame:
+        reads.append(1)
+        return _frame(10)
+
+    first = cache.get_or_read(("gpkg", "a.gpkg", "road_line", None, None, None), read)
+    second = cache.get_or_read(("gpkg", "a.gpkg", "road_line", None, None, None), read)
+
+    assert len(reads) == 1
+    assert first.gdf is second.gdf
+    assert first.sindex is second.sindex
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    size = estimate_nbytes(_frame(100))
+    cache = DatasetCache(max_bytes=2 * size)
+
+    cache.put("a", _frame(100))
+    cache.put("b", _frame(100))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", _frame(100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * size
+
+
+def test_dataset_larger_than_budget_is_not_cached():
+    cache = DatasetCache(max_bytes=10)
+    cache.put("a", _frame(1))
+
+    entry = cache.put("b", _frame(100))
+
+    assert len(entry.gdf) == 100
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_read_of_fewer_columns_is_served_by_wider_entry():
+    cache = DatasetCache()
+    wide = _frame(10)
+    cache.put(("gpkg", "a.gpkg", "road_line", None, None, frozenset({"id", "name"})), wide)
+
+    assert cache.get(("gpkg", "a.gpkg", "road_line", None, None, frozenset({"id"}))).gdf is wide
+    assert cache.get(("gpkg", "a.gpkg", "road_line", None, None, frozenset({"id", "status"}))) is None
+    assert cache.get(("gpkg", "a.gpkg", "road_line", "status = 'x'", None, frozenset({"id"}))) is None
+
+
+def test_bbox_read_is_clipped_from_the_whole_table_until_it_changes():
+    cache = DatasetCache(clip_to_bbox=True)
+    cache.put(("gpkg", "a.gpkg", "road_line", None, None, None), _frame(10))
+
+    clipped = cache.get(("gpkg", "a.gpkg", "road_line", None, (2.5, 2.5, 5, 5), frozenset(["id"])))
+    assert clipped is not None
+    assert clipped.gdf["id"].tolist() == [3, 4, 5]
+    assert list(clipped.gdf.index) == [0, 1, 2]
+
+    cache.discard_table("gpkg", "a.gpkg", "road_line")
+    assert cache.get(("gpkg", "a.gpkg", "road_line", None, (2.5, 2.5, 5, 5), None)) is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,114 @@
+"""The DuckDB engine reports the same violations as the pandas engine, from where clauses pandas cannot run."""
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import pyogrio
+import pytest
+from shapely import LineString, Point, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tools import TopoValidatorSettings
+
+duckdb = pytest.importorskip("duckdb")
+try:
+    duckdb.connect().execute("LOAD spatial")
+except duckdb.Error:
+    pytest.skip("DuckDB spatial extension not installed", allow_module_level=True)
+
+CONFIG = {
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "feature_not_on_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+    "feature_in_layers": [
+        {"table": "building_point", "intersection_table": "building", "layername": "points-in-building", "message": "m"}
+    ],
+    "null_columns": [{"table": "building", "column": "name", "message": "m"}],
+    "query_rules": [{"table": "building", "column": "height", "rule": "height > 20", "message": "m"}],
+}
+
+
+def _write(tmp_path: Path) -> str:
+    layers = {
+        "building": gpd.GeoDataFrame(
+            {"id": [1, 2, 3, 4], "name": ["a", None, "c", None], "height": [10, 30, 25, 5]},
+            geometry=[box(0, 0, 10, 10), box(5, 0, 15, 10), box(50, 0, 60, 10), box(55, 0, 65, 10)],
+            crs=2193,
+        ),
+        "building_point": gpd.GeoDataFrame({"id": [1, 2]}, geometry=[Point(1, 1), Point(30, 30)], crs=2193),
+        "road_line": gpd.GeoDataFrame(
+            {"id": [1], "name": ["main"]}, geometry=[LineString([(0, 50), (100, 50)])], crs=2193
+        ),
+        "bridge_line": gpd.GeoDataFrame(
+            {"id": [1, 2]}, geometry=[LineString([(10, 50), (20, 50)]), LineString([(10, 80), (20, 80)])], crs=2193
+        ),
+    }
+    for table, gdf in layers.items():
+        gdf.to_parquet(tmp_path / f"{table}.parquet", write_covering_bbox=True)
+    return str(tmp_path / "files.parquet")
+
+
+def _write_geographic(tmp_path: Path) -> str:
+    """Bridges 0.05 m and 50 m from a road, in longitude and latitude"""
+    road = gpd.GeoSeries([LineString([(1_750_000, 5_430_000), (1_751_000, 5_430_000)])], crs=2193)
+    bridges = gpd.GeoSeries(
+        [LineString([(1_750_400, 5_430_000 + offset), (1_750_600, 5_430_000 + offset)]) for offset in (0.05, 50)],
+        crs=2193,
+    )
+    layers = {
+        "road_line": gpd.GeoDataFrame({"id": [1], "name": ["main"]}, geometry=road.to_crs(4326)),
+        "bridge_line": gpd.GeoDataFrame({"id": [1, 2]}, geometry=bridges.to_crs(4326)),
+    }
+    for table, gdf in layers.items():
+        gdf.to_parquet(tmp_path / f"{table}.parquet", write_covering_bbox=True)
+    return str(tmp_path / "files.parquet")
+
+
+def _run(tmp_path: Path, engine: str, config: dict, bbox=None, write=_write) -> dict[str, int]:
+    config_file = tmp_path / f"config_{engine}.json"
+    config_file.write_text(json.dumps(config))
+    output_dir = tmp_path / engine
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=write(tmp_path),
+        output_dir=str(output_dir),
+        bbox=bbox,
+    )
+    settings.parquet_engine = engine
+    ValidateDatasetController(settings).run_validation()
+    return {
+        layer: pyogrio.read_info(output, layer=layer)["features"]
+        for output in output_dir.glob("topology_*.gpkg")
+        for layer, _ in pyogrio.list_layers(output)
+    }
+
+
+@pytest.mark.parametrize("bbox", [None, (0.0, 0.0, 30.0, 100.0)])
+def test_duckdb_engine_matches_pandas(tmp_path, bbox):
+    expected = _run(tmp_path, "pandas", CONFIG, bbox)
+    assert any(expected.values())
+    assert _run(tmp_path, "duckdb", CONFIG, bbox) == expected
+
+
+def test_duckdb_engine_runs_nested_where_clauses(tmp_path):
+    config = {
+        "null_columns": [
+            {
+                "table": "building",
+                "column": "name",
+                "where": "(height > 20 AND (id = 2 OR id = 4)) OR (height < 0)",
+                "message": "m",
+            }
+        ]
+    }
+    violations = _run(tmp_path, "duckdb", config)
+    assert list(violations.values()) == [1]
+
+
+def test_duckdb_engine_tolerance_is_in_metres_in_degrees(tmp_path):
+    config = {"feature_not_on_layers": [CONFIG["feature_not_on_layers"][0]]}
+    expected = _run(tmp_path, "pandas", config, write=_write_geographic)
+    # Only the bridge 50 m from the road is off it, a tolerance of 0.1 degrees would keep it on
+    assert list(expected.values()) == [1]
+    assert _run(tmp_path, "duckdb", config, write=_write_geographic) == expected
@@ -0,0 +1,43 @@
+"""The error store tracks errors between runs and returns only the changes."""
+
+import geopandas as gpd
+from shapely import Point, box
+from topographic_validation.error_store import ErrorStore, error_keys
+
+
+def _errors(ids: list[int]) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame({"id": ids, "warning": "w"}, geometry=[Point(i, i).buffer(1) for i in ids], crs=2193)
+
+
+def _changes(delta: gpd.GeoDataFrame) -> list[tuple[str, str]]:
+    return sorted(zip(delta["error_key"].str.split(":").str[0], delta["status"], strict=True))
+
+
+def test_runs_mark_errors_new_open_and_resolved(tmp_path):
+    store = ErrorStore(str(tmp_path / "errors.sqlite"))
+
+    delta = store.update({"rule": _errors([1, 2])}, 2193, "2026-01-01T00:00:00")
+    assert _changes(delta) == [("1", "new"), ("2", "new")]
+    assert delta.crs == 2193
+
+    delta = store.update({"rule": _errors([2, 3])}, 2193, "2026-01-02T00:00:00")
+    assert _changes(delta) == [("1", "resolved"), ("3", "new")]
+    assert store.counts() == {"new": 1, "open": 1, "resolved": 1}
+
+    # A partial run reports nothing resolved, a resolved error that comes back is new again
+    delta = store.update({"rule": _errors([1])}, 2193, "2026-01-03T00:00:00", resolve=False)
+    assert _changes(delta) == [("1", "new")]
+    assert store.counts() == {"new": 2, "open": 1, "resolved": 0}
+
+
+def test_error_key_follows_the_features_and_the_geometry():
+    pairs = gpd.GeoDataFrame(
+        {"pair_names": ["a-b", "a-b"], "pair_keys": ["1-2", "1-2"]},
+        geometry=[box(0, 0, 1, 1), box(0, 0, 2, 1)],
+        crs=2193,
+    )
+    keys = error_keys(pairs)
+    assert keys[0].startswith("1-2:") and keys[1].startswith("1-2:")
+    assert keys[0] != keys[1]
+    # The same geometry with its vertices in another order keeps its key
+    assert error_keys(pairs.set_geometry([box(0, 0, 1, 1, ccw=False), box(0, 0, 2, 1)], crs=2193))[0] == keys[0]
@@ -0,0 +1,106 @@
+"""Fail-fast runs stop at the first violation and agree with full runs on which rules fail."""
+
+import json
+import subprocess
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely import box
+from test_examples_e2e import CONFIG_PATH, _build_config, _discover_examples, _write_fixtures
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tools import TopoValidatorSettings
+from topographic_validation.validators import base
+
+
+def _run(config: dict, db_path: str, output_dir: Path, fail_fast: bool) -> ValidateDatasetController:
+    config_file = output_dir.parent / f"{output_dir.name}_config.json"
+    config_file.write_text(json.dumps(config))
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=db_path,
+        output_dir=str(output_dir),
+        fail_fast=fail_fast,
+    )
+    controller = ValidateDatasetController(settings)
+    controller.run_validation()
+    return controller
+
+
+@pytest.mark.parametrize("chunk_size", [1, base.FAIL_FAST_CHUNK_SIZE])
+@pytest.mark.parametrize("scenario_dir", _discover_examples())
+def test_fail_fast_finds_the_violations_of_full_runs(scenario_dir, chunk_size, tmp_path, monkeypatch):
+    monkeypatch.setattr(base, "FAIL_FAST_CHUNK_SIZE", chunk_size)
+    role, table, rule_name, scenario, _ = scenario_dir.parts[-5:]
+    config = _build_config(json.loads(CONFIG_PATH.read_text()), rule_name, table, scenario)
+    db_paths = _write_fixtures(sorted(scenario_dir.glob("*.geojson")), tmp_path / "data")
+
+    for file_format, db_path in db_paths.items():
+        controller = _run(config, db_path, tmp_path / f"out_{file_format}", fail_fast=True)
+        assert controller.summary_report[rule_name] is (role == "counterexamples"), file_format
+        assert (controller.failed_rule is not None) is (role == "counterexamples"), file_format
+        assert not list((tmp_path / f"out_{file_format}").glob("topology_*.gpkg"))
+
+
+def test_run_stops_at_the_first_failing_rule_and_exits_with_an_error(tmp_path):
+    gpkg = str(tmp_path / "data.gpkg")
+    gpd.GeoDataFrame(
+        {"id": [1, 2, 3], "name": ["a", None, "c"]},
+        geometry=[box(0, 0, 10, 10), box(5, 0, 15, 10), box(50, 0, 60, 10)],
+        crs=2193,
+    ).to_file(gpkg, layer="building", driver="GPKG")
+    config = {
+        "null_columns": [{"table": "building", "column": "name", "message": "m"}],
+        "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    }
+
+    controller = _run(config, gpkg, tmp_path / "output", fail_fast=True)
+    assert controller.failed_rule == "building"
+    assert controller.summary_report["fail_fast"] == {"failed_rule": "building", "rules_run": 1, "rules": 2}
+    assert controller.summary_report["null_columns"] is True
+    assert controller.summary_report["self_intersect_layers"] is False
+
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config))
+    result = subprocess.run(
+        ["uv", "run", "topographic_validation", "--db-path", gpkg, "--config-file", str(config_file)]
+        + ["--output-dir", str(tmp_path / "cli"), "--fail-fast"],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 1, result.stderr
+    assert "Validation failed: building found a violation" in result.stderr
+
+
+def test_run_reports_the_first_failing_rule_in_config_order(tmp_path):
+    gpkg = str(tmp_path / "data.gpkg")
+    gpd.GeoDataFrame({"id": [1], "name": [None]}, geometry=[box(0, 0, 1, 1)], crs=2193).to_file(
+        gpkg, layer="building", driver="GPKG"
+    )
+    # The larger table is planned first, its rule must still not run before the building rule
+    gpd.GeoDataFrame({"id": range(20)}, geometry=[box(i, 0, i + 2, 1) for i in range(20)], crs=2193).to_file(
+        gpkg, layer="road", driver="GPKG"
+    )
+    config = {
+        "null_columns": [{"table": "building", "column": "name", "message": "m"}],
+        "self_intersect_layers": [{"table": "road", "layername": "road-validation", "message": "m"}],
+    }
+
+    controller = _run(config, gpkg, tmp_path / "output", fail_fast=True)
+    assert controller.failed_rule == "building"
+    assert controller.summary_report["fail_fast"] == {"failed_rule": "building", "rules_run": 1, "rules": 2}
+
+
+def test_parquet_attribute_rules_stop_at_the_first_failing_row_group(tmp_path):
+    gdf = gpd.GeoDataFrame(
+        {"id": range(6), "name": ["a", "b", "c", "d", None, None]},
+        geometry=[box(i, 0, i + 1, 1) for i in range(6)],
+        crs=2193,
+    )
+    gdf.to_parquet(tmp_path / "building.parquet", row_group_size=2)
+    config = {"null_columns": [{"table": "building", "column": "name", "message": "m"}]}
+
+    controller = _run(config, str(tmp_path / "files.parquet"), tmp_path / "output", fail_fast=True)
+    assert controller.rule_metrics[0]["violations"] == 2
+    assert controller.failed_rule == "building"
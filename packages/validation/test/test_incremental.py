@@ -0,0 +1,126 @@
+"""Incremental runs validate the features edited since the last run and their neighbours."""
+
+import datetime
+import json
+from pathlib import Path
+
+import geopandas as gpd
+from shapely import LineString, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tools import TopoValidatorSettings
+
+OLD, NEW = "2025-06-01T00:00:00", "2026-05-01T00:00:00"
+
+CONFIG = {
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "feature_not_on_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+}
+
+
+def _write_dataset(path: Path) -> str:
+    gpkg = str(path / "data.gpkg")
+    buildings = gpd.GeoDataFrame(
+        {
+            "name": ["a", "b", "c", "d", "e"],
+            "updated_at": [OLD, OLD, OLD, OLD, NEW],
+        },
+        geometry=[box(0, 0, 10, 10), box(5, 0, 15, 10), box(100, 0, 110, 10), box(105, 0, 115, 10), box(12, 0, 20, 5)],
+        crs=2193,
+    )
+    buildings.to_file(gpkg, layer="building", driver="GPKG")
+    roads = gpd.GeoDataFrame(
+        {"name": ["r"], "updated_at": [OLD]}, geometry=[LineString([(0, 50), (100, 50)])], crs=2193
+    )
+    roads.to_file(gpkg, layer="road_line", driver="GPKG")
+    bridges = gpd.GeoDataFrame(
+        {"name": ["on", "off", "off-new"], "updated_at": [NEW, OLD, NEW]},
+        geometry=[LineString([(10, 50), (20, 50)]), LineString([(10, 80), (20, 80)]), LineString([(30, 80), (40, 80)])],
+        crs=2193,
+    )
+    bridges.to_file(gpkg, layer="bridge_line", driver="GPKG")
+    return gpkg
+
+
+def _run(tmp_path: Path, gpkg: str, name: str) -> dict[str, list[str]]:
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(CONFIG))
+    output_dir = tmp_path / name
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=gpkg,
+        output_dir=str(output_dir),
+        area_crs=2193,
+        incremental=True,
+        state_file=str(tmp_path / "state.json"),
+    )
+    ValidateDatasetController(settings).run_validation()
+    return {
+        "self_intersect": sorted(
+            gpd.read_file(output_dir / "topology_self_intersect.gpkg", layer="building-validation_errors_areas")[
+                "pair_names"
+            ]
+        ),
+        "not_on_layer": sorted(
+            gpd.read_file(output_dir / "topology_not_intersect.gpkg", layer="bridges-off-road_not_intersect_road_line")[
+                "name"
+            ]
+        ),
+    }
+
+
+def test_incremental_run_validates_changes_and_their_neighbours(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+
+    # Without a previous run every feature is validated
+    assert _run(tmp_path, gpkg, "first") == {
+        "self_intersect": ["a-b", "b-e", "c-d"],
+        "not_on_layer": ["off", "off-new"],
+    }
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert set(state[gpkg]) == {"building", "bridge_line", "road_line"}
+
+    # Pretend the last run was between the old and the new edits
+    state[gpkg] = dict.fromkeys(state[gpkg], "2026-01-01T00:00:00")
+    (tmp_path / "state.json").write_text(json.dumps(state))
+    assert _run(tmp_path, gpkg, "second") == {"self_intersect": ["b-e"], "not_on_layer": ["off-new"]}
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert all(since > "2026-01-01T00:00:00" for since in state[gpkg].values())
+
+
+def test_rule_is_validated_in_full_when_its_intersection_table_changed(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+    _run(tmp_path, gpkg, "first")
+
+    # The road moved away from the bridge that was on it, the bridge itself is unchanged
+    roads = gpd.read_file(gpkg, layer="road_line")
+    roads["updated_at"] = [NEW]
+    roads.geometry = [LineString([(0, 500), (100, 500)])]
+    roads.to_file(gpkg, layer="road_line", driver="GPKG")
+    state = json.loads((tmp_path / "state.json").read_text())
+    state[gpkg] = dict.fromkeys(state[gpkg], "2026-01-01T00:00:00")
+    (tmp_path / "state.json").write_text(json.dumps(state))
+
+    assert _run(tmp_path, gpkg, "second") == {"self_intersect": ["b-e"], "not_on_layer": ["off", "off-new", "on"]}
+
+
+def test_incremental_run_keeps_edits_made_on_the_day_of_the_last_run(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+    _run(tmp_path, gpkg, "first")
+
+    # The layers record the date of an edit, made here later on the day of the last run
+    today = datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%d")
+    buildings = gpd.read_file(gpkg, layer="building")
+    buildings["updated_at"] = ["2025-06-01", "2025-06-01", "2025-06-01", "2025-06-01", today]
+    buildings.to_file(gpkg, layer="building", driver="GPKG")
+    bridges = gpd.read_file(gpkg, layer="bridge_line")
+    bridges["updated_at"] = ["2025-06-01", "2025-06-01", today]
+    bridges.to_file(gpkg, layer="bridge_line", driver="GPKG")
+    # The last run started later in the day than the date of the edits
+    state = json.loads((tmp_path / "state.json").read_text())
+    state[gpkg] = dict.fromkeys(state[gpkg], f"{today}T02:00:00")
+    (tmp_path / "state.json").write_text(json.dumps(state))
+
+    assert _run(tmp_path, gpkg, "second") == {"self_intersect": ["b-e"], "not_on_layer": ["off-new"]}
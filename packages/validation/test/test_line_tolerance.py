@@ -0,0 +1,60 @@
+"""Features lie on a line layer within a tolerance in metres, whatever the CRS of the data."""
+
+import geopandas as gpd
+import pytest
+from shapely import LineString, Point
+from topographic_validation.validators import postgis
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+from topographic_validation.validators.postgis import PostgisTopologyValidator
+
+DB_URL = "postgresql+psycopg://user@localhost/topo"
+
+
+def _not_on_lines(offsets_m: list[float], crs: int, tolerance: float) -> list[int]:
+    validator = GpkgTopologyValidator(
+        summary_report={}, export_validation_data=False, db_url="unused.gpkg", table="a", export_layername="a"
+    )
+    line = gpd.GeoSeries([LineString([(1_750_000, 5_430_000), (1_751_000, 5_430_000)])], crs=2193)
+    points = gpd.GeoSeries([Point(1_750_500, 5_430_000 + offset) for offset in offsets_m], crs=2193)
+    validator.gdf = gpd.GeoDataFrame({"id": range(len(offsets_m))}, geometry=points.to_crs(crs))
+    validator.gdf2 = gpd.GeoDataFrame(geometry=line.to_crs(crs))
+    validator.tolerance = tolerance
+    return list(validator.find_not_intersections_features_between_layers()["id"])
+
+
+@pytest.mark.parametrize("crs", [2193, 4326])
+def test_tolerance_is_in_metres(crs):
+    assert _not_on_lines([0, 0.05, 0.5, 5], crs, tolerance=0.1) == [2, 3]
+    assert _not_on_lines([0, 0.05, 0.5, 5], crs, tolerance=1) == [3]
+
+
+def test_layer_is_not_buffered():
+    validator = GpkgTopologyValidator(
+        summary_report={}, export_validation_data=False, db_url="unused.gpkg", table="a", export_layername="a"
+    )
+    line = LineString([(0, 0), (1, 0)])
+    validator.gdf = gpd.GeoDataFrame({"id": [1]}, geometry=[Point(0.5, 0.05)], crs=2193)
+    validator.gdf2 = gpd.GeoDataFrame(geometry=[line], crs=2193)
+    validator.find_not_intersections_features_between_layers()
+    assert validator.gdf2.geometry.iloc[0].equals(line)
+
+
+@pytest.mark.parametrize("crs", ["EPSG:2193", "EPSG:4326"])
+def test_pushdown_tolerance_is_in_metres(monkeypatch, crs):
+    monkeypatch.setitem(
+        postgis._table_metadata,
+        (DB_URL, "public", "bridge_line"),
+        {"pkey": "id", "geom_column": "geom", "columns": ["id", "geom"]},
+    )
+    validator = PostgisTopologyValidator({}, False, DB_URL, "bridge_line", "bridges", output_dir="/tmp")
+    extent = (174.0, -41.3, 174.1, -41.2) if crs == "EPSG:4326" else (1_750_000, 5_430_000, 1_751_000, 5_431_000)
+    monkeypatch.setattr(validator, "table_extent", lambda table: (extent, crs))
+
+    sql = validator.dwithin_sql("a.geom", "b.geom")
+
+    if crs == "EPSG:2193":
+        assert sql == f"ST_DWithin(a.geom, b.geom, {validator.tolerance})"
+    else:
+        # Prefiltered in degrees, then checked projected to the area CRS in metres
+        assert "ST_DWithin(ST_Transform(a.geom, 2193), ST_Transform(b.geom, 2193), 0.1)" in sql
+        assert f"ST_DWithin(a.geom, b.geom, {validator.tolerance}) " not in sql
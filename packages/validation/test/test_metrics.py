@@ -0,0 +1,72 @@
+"""Every rule run reports its phase timings, counts and peak RSS in the summary report."""
+
+import json
+import time
+from pathlib import Path
+
+import geopandas as gpd
+from shapely import LineString, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.metrics import PHASES, RuleMetrics
+from topographic_validation.tools import TopoValidatorSettings
+
+CONFIG = {
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "feature_not_on_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+    "null_columns": [{"table": "building", "column": "name", "message": "m"}],
+}
+
+
+def test_nested_phase_time_only_counts_towards_the_inner_phase():
+    metrics = RuleMetrics()
+    with metrics.phase("compute"), metrics.phase("index"):
+        time.sleep(0.05)
+    assert metrics.phases["index"] >= 0.05
+    assert metrics.phases["compute"] < 0.05
+
+
+def test_summary_and_jsonl_have_one_record_per_rule(tmp_path: Path):
+    gpkg = str(tmp_path / "data.gpkg")
+    gpd.GeoDataFrame(
+        {"id": [1, 2, 3], "name": ["a", "b", None]},
+        geometry=[box(0, 0, 10, 10), box(5, 0, 15, 10), box(50, 0, 60, 10)],
+        crs=2193,
+    ).to_file(gpkg, layer="building", driver="GPKG")
+    gpd.GeoDataFrame({"id": [1], "name": ["r"]}, geometry=[LineString([(0, 50), (100, 50)])], crs=2193).to_file(
+        gpkg, layer="road_line", driver="GPKG"
+    )
+    gpd.GeoDataFrame(
+        {"id": [1, 2], "name": ["on", "off"]},
+        geometry=[LineString([(10, 50), (20, 50)]), LineString([(10, 80), (20, 80)])],
+        crs=2193,
+    ).to_file(gpkg, layer="bridge_line", driver="GPKG")
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(CONFIG))
+    metrics_file = tmp_path / "metrics.jsonl"
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=gpkg,
+        output_dir=str(tmp_path / "output"),
+        metrics_file=str(metrics_file),
+    )
+
+    ValidateDatasetController(settings).run_validation()
+
+    summary = json.loads((tmp_path / "output" / "validation_summary_report.json").read_text())
+    metrics = {record["family"]: record for record in summary["metrics"]}
+    # In config order, one worker runs the rules without planning them
+    assert list(metrics) == ["attribute_rules", "feature_not_on_layers", "self_intersect_layers"]
+    for record in metrics.values():
+        assert set(record["phases"]) == set(PHASES)
+        assert record["seconds"] >= sum(record["phases"].values()) - 1e-3
+    assert metrics["attribute_rules"]["violations"] == 1
+    assert metrics["feature_not_on_layers"]["rows"] == {"bridge_line": 2, "road_line": 1}
+    assert metrics["feature_not_on_layers"]["violations"] == 1
+    assert metrics["self_intersect_layers"]["candidate_pairs"] == 1
+    assert metrics["self_intersect_layers"]["violations"] == 1
+
+    lines = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert [line["rule"] for line in lines] == [record["rule"] for record in summary["metrics"]]
+    assert all(line["db_path"] == gpkg for line in lines)
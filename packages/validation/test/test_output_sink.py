@@ -0,0 +1,26 @@
+"""The output sink writes the buffered results of a run on flush."""
+
+import geopandas as gpd
+import pyogrio
+from shapely import Point
+from topographic_validation.output_sink import OutputSink
+
+
+def _points(ids: list[int]) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame({"id": ids}, geometry=[Point(i, i) for i in ids], crs=2193)
+
+
+def test_sink_writes_each_output_once_on_flush(tmp_path):
+    gpkg, parquet = str(tmp_path / "topology_null.gpkg"), str(tmp_path / "rule.parquet")
+    sink = OutputSink()
+    sink.add_layer(gpkg, "a", _points([1, 2]))
+    sink.add_layer(gpkg, "b", _points([3]))
+    sink.add_layer(gpkg, "a", _points([4]))
+    sink.add_parquet(parquet, _points([5, 6]))
+    assert not (tmp_path / "topology_null.gpkg").exists()
+
+    sink.flush()
+    assert sorted(pyogrio.list_layers(gpkg)[:, 0]) == ["a", "b"]
+    assert gpd.read_file(gpkg, layer="a")["id"].tolist() == [1, 2, 4]
+    assert gpd.read_parquet(parquet)["id"].tolist() == [5, 6]
+    assert sink.layers == {} and sink.parquet == {}
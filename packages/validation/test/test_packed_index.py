@@ -0,0 +1,146 @@
+"""The packed R-tree saved next to the data returns the same candidates as the STRtree of geopandas."""
+
+import json
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+import pytest
+import shapely
+from shapely import LineString, Point, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.packed_index import INDEX_FOLDER, IndexStore, PackedRTree
+from topographic_validation.tools import TopoValidatorSettings
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+
+
+def _geometries(count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(0, 1000, count), rng.uniform(0, 1000, count)
+    size = rng.uniform(0, 20, count)
+    geometries = np.asarray(shapely.box(x, y, x + size, y + size))
+    lines = np.asarray(shapely.linestrings(np.stack([np.column_stack([x, y]), np.column_stack([x + 5, y])], axis=1)))
+    # Lines, points, missing and empty geometries among the boxes
+    geometries[::7] = lines[::7]
+    geometries[::11] = np.asarray(shapely.points(x, y))[::11]
+    geometries[5::97] = None
+    geometries[6::97] = shapely.Polygon()
+    return geometries
+
+
+def _pairs(result: np.ndarray) -> list[tuple[int, int]]:
+    return sorted(zip(result[0].tolist(), result[1].tolist(), strict=True))
+
+
+@pytest.mark.parametrize("predicate", [None, "intersects", "within", "contains", "overlaps", "dwithin"])
+def test_queries_match_strtree(predicate: str | None) -> None:
+    tree_geometries = _geometries(5_000, 1)
+    inputs = _geometries(800, 2)
+    distance = 3.0 if predicate == "dwithin" else None
+
+    expected = gpd.GeoSeries(tree_geometries).sindex.query(inputs, predicate=predicate, distance=distance)
+    result = PackedRTree.build(tree_geometries).query(inputs, predicate=predicate, distance=distance)
+
+    assert len(expected[0]) > 0
+    assert _pairs(result) == _pairs(expected)
+
+
+def test_single_geometry_and_sorted_queries() -> None:
+    tree_geometries = _geometries(300, 3)
+    tree = PackedRTree.build(tree_geometries)
+    strtree = gpd.GeoSeries(tree_geometries).sindex
+
+    for geometry in [box(100, 100, 300, 300), Point(500, 500), LineString([(0, 0), (1000, 1000)])]:
+        assert tree.query(geometry, sort=True).tolist() == strtree.query(geometry, sort=True).tolist()
+    assert tree.query(None).tolist() == []
+    sorted_result = tree.query(_geometries(50, 4), sort=True)
+    assert _pairs(sorted_result) == [tuple(pair) for pair in sorted_result.T.tolist()]
+
+
+def test_empty_trees_match_nothing() -> None:
+    tree = PackedRTree.build(np.array([None, shapely.Polygon()], dtype=object))
+    assert len(tree) == 0
+    assert tree.query([box(0, 0, 1, 1)]).shape == (2, 0)
+
+
+def test_saved_tree_is_loaded_memory_mapped_for_the_same_snapshot(tmp_path) -> None:
+    geometries = _geometries(2_000, 5)
+    store = IndexStore(str(tmp_path / "index"))
+    built, loaded = store.load_or_build("data.gpkg.building", "v1", geometries)
+    assert not loaded
+
+    saved, loaded = store.load_or_build("data.gpkg.building", "v1", geometries)
+    assert loaded
+    assert isinstance(saved.leaves, np.memmap)
+    inputs = _geometries(200, 6)
+    assert _pairs(saved.query(inputs, predicate="intersects")) == _pairs(built.query(inputs, predicate="intersects"))
+
+    # A new snapshot or a table of another size is built again, replacing the stale tree
+    assert store.load("data.gpkg.building", "v1", geometries[:10]) is None
+    assert not store.load_or_build("data.gpkg.building", "v2", geometries)[1]
+    assert len(list((tmp_path / "index").glob("*.npy"))) == 3
+
+
+def test_runs_with_the_saved_index_report_the_same_violations(tmp_path) -> None:
+    building = gpd.GeoDataFrame({"id": [1, 2]}, geometry=[box(0, 0, 10, 10), box(50, 0, 60, 10)], crs=2193)
+    points = gpd.GeoDataFrame({"id": [1, 2, 3]}, geometry=[Point(1, 1), Point(30, 30), Point(55, 5)], crs=2193)
+    db_path = tmp_path / "data.gpkg"
+    building.to_file(db_path, layer="building")
+    points.to_file(db_path, layer="building_point")
+    config = {
+        "feature_in_layers": [
+            {
+                "table": "building_point",
+                "intersection_table": "building",
+                "layername": "points-in-building",
+                "message": "m",
+            }
+        ]
+    }
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config))
+
+    def run(output: str) -> dict[str, int]:
+        settings = TopoValidatorSettings(
+            validation_config_file=str(config_file), db_path=str(db_path), output_dir=str(tmp_path / output)
+        )
+        settings.persist_index = True
+        ValidateDatasetController(settings).run_validation()
+        return {
+            layer: pyogrio.read_info(result, layer=layer)["features"]
+            for result in (tmp_path / output).glob("topology_*.gpkg")
+            for layer, _ in pyogrio.list_layers(result)
+        }
+
+    first = run("first")
+    assert any(first.values())
+    assert [path.name.split(".")[2] for path in (tmp_path / INDEX_FOLDER).glob("*.order.npy")] == ["building"]
+    assert run("second") == first
+
+
+def test_layer_rules_query_the_saved_index_without_patching_the_layer(tmp_path, monkeypatch) -> None:
+    building = gpd.GeoDataFrame(
+        {"id": [1, 2], "name": ["a", "b"]}, geometry=[box(0, 0, 10, 10), box(50, 0, 60, 10)], crs=2193
+    )
+    points = gpd.GeoDataFrame({"id": [1, 2, 3]}, geometry=[Point(1, 1), Point(30, 30), Point(55, 5)], crs=2193)
+    validator = GpkgTopologyValidator(
+        summary_report={},
+        export_validation_data=False,
+        db_url="unused.gpkg",
+        table="building_point",
+        export_layername="points",
+        table2="building",
+    )
+    validator.set_index_store(IndexStore(str(tmp_path / INDEX_FOLDER)))
+    monkeypatch.setattr(validator, "table_snapshot", lambda table: (f"unused.gpkg.{table}", "v1"))
+    validator.gdf, validator.gdf2 = points, building
+    validator.sindex = validator.layer_sindex()
+
+    assert isinstance(validator.sindex, PackedRTree)
+    inside = validator.find_intersections_features_between_layers()
+    assert inside["id"].tolist() == [1, 3]
+    # The name of the layer feature each point lies in, as an inner sjoin gives
+    assert inside["name"].tolist() == ["a", "b"]
+    assert validator.find_not_intersections_features_between_layers()["id"].tolist() == [2]
+    # The layer, which may be shared with other rules through the dataset cache, keeps no tree
+    assert not building.has_sindex
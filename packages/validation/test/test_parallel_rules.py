@@ -0,0 +1,82 @@
+"""Rules run in a process pool must produce the same report and outputs as a serial run."""
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+from shapely import LineString, Point, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tools import TopoValidatorSettings
+
+CONFIG = {
+    "feature_in_layers": [
+        {
+            "table": "building_point",
+            "intersection_table": "building",
+            "layername": "points-in-buildings",
+            "message": "m",
+        }
+    ],
+    "line_not_on_feature_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "null_columns": [{"table": "building_point", "column": "orientation", "message": "m"}],
+}
+
+
+def _write_dataset(path: Path) -> str:
+    gpkg = str(path / "data.gpkg")
+    layers: dict[str, list] = {
+        "building": [box(0, 0, 10, 10), box(5, 5, 15, 15), box(100, 100, 110, 110)],
+        "building_point": [Point(1, 1), Point(50, 50)],
+        "road_line": [LineString([(0, 0), (100, 0)])],
+        "bridge_line": [LineString([(10, 0), (20, 0)]), LineString([(10, 50), (20, 50)])],
+    }
+    for layer, geoms in layers.items():
+        gdf = gpd.GeoDataFrame({"id": range(1, len(geoms) + 1)}, geometry=geoms, crs=2193)
+        if layer == "building_point":
+            gdf["orientation"] = [None, 90.0]
+        gdf.to_file(gpkg, layer=layer, driver="GPKG")
+    return gpkg
+
+
+def _run(tmp_path: Path, gpkg: str, jobs: int) -> tuple[dict, dict[str, int]]:
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(CONFIG))
+    output_dir = tmp_path / f"out_{jobs}"
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=gpkg,
+        output_dir=str(output_dir),
+        export_parquet=True,
+        jobs=jobs,
+    )
+    ValidateDatasetController(settings).run_validation()
+
+    summary = json.loads((output_dir / "validation_summary_report.json").read_text())
+    flags = {key: value for key, value in summary.items() if isinstance(value, bool)}
+    outputs = {}
+    for file in sorted(output_dir.iterdir()):
+        if file.suffix == ".gpkg":
+            for layer in gpd.list_layers(file)["name"]:
+                outputs[f"{file.name}:{layer}"] = len(gpd.read_file(file, layer=layer))
+        elif file.suffix == ".parquet":
+            outputs[file.name] = len(gpd.read_parquet(file))
+    return flags, outputs
+
+
+def test_parallel_run_matches_serial_run(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+
+    serial = _run(tmp_path, gpkg, jobs=1)
+    parallel = _run(tmp_path, gpkg, jobs=2)
+
+    assert parallel == serial
+    flags, outputs = parallel
+    assert flags["feature_in_layers"] is True
+    assert flags["line_not_on_feature_layers"] is True
+    assert flags["self_intersect_layers"] is True
+    assert flags["null_columns"] is True
+    assert outputs["topology_self_intersect.gpkg:building-validation_errors_areas"] == 1
+    assert not (tmp_path / "out_2" / "_staging").exists()
@@ -0,0 +1,107 @@
+"""The execution plan groups rules sharing tables and runs the costliest groups first."""
+
+import json
+
+import geopandas as gpd
+import pytest
+from shapely import LineString, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.planner import bbox_share, plan_rules
+from topographic_validation.tools import TopoValidatorSettings
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+from topographic_validation.validators.parquet import ParquetTopologyValidator
+
+TASKS = [
+    ("attribute_rules", {"table": "road_line", "null_columns": [], "query_rules": []}, None),
+    ("feature_not_on_layers", {"table": "bridge_line", "intersection_table": "road_line", "layername": "b"}, None),
+    ("self_intersect_layers", {"table": "vegetation", "layername": "v"}, None),
+    ("self_intersect_layers", {"table": "building", "layername": "bu"}, None),
+]
+ESTIMATES = {
+    "road_line": (1_000, (0, 0, 100, 100)),
+    "bridge_line": (100, (0, 0, 100, 100)),
+    "vegetation": (50_000, (0, 0, 100, 100)),
+    "building": (None, (50, 50, 100, 100)),
+}
+
+
+def test_groups_share_tables_and_run_longest_first():
+    plan = plan_rules(TASKS, ESTIMATES)
+
+    assert [group.tasks for group in plan.groups] == [[2], [3], [0, 1]]
+    assert plan.groups[2].tables == ["road_line", "bridge_line"]
+    # A table of unknown size is taken as the largest known
+    assert plan.rows["building"] == 50_000
+    assert plan.order == [2, 3, 0, 1]
+
+
+def test_bbox_scales_the_rows_by_the_share_of_the_extent():
+    plan = plan_rules(TASKS, ESTIMATES, bbox=(0, 0, 50, 100))
+
+    assert plan.rows["road_line"] == 500
+    assert plan.rows["building"] == 0
+    assert bbox_share((10, 0, 10, 100), (0, 0, 50, 50)) == 0.5
+
+
+def test_units_split_groups_longer_than_the_share_of_a_worker():
+    tasks = [
+        ("attribute_rules", {"table": "vegetation", "null_columns": [], "query_rules": []}, None),
+        ("self_intersect_layers", {"table": "vegetation", "layername": "v"}, None),
+        ("attribute_rules", {"table": "road_line", "null_columns": [], "query_rules": []}, None),
+    ]
+    plan = plan_rules(tasks, ESTIMATES)
+
+    units = plan.units(jobs=2)
+    assert [unit.tasks for unit in units] == [[1], [0], [2]]
+    assert [unit.release for unit in units] == [False, False, True]
+    assert [unit.tasks for unit in plan.units(jobs=1)] == [[0, 1], [2]]
+    assert plan.worker_loads(2)[0] == plan.costs[1]
+    assert "2 workers" in plan.explain(jobs=2)
+
+
+@pytest.mark.parametrize("file_format", ["gpkg", "parquet"])
+def test_table_estimate_from_metadata(tmp_path, file_format):
+    gdf = gpd.GeoDataFrame(
+        {"id": range(3)},
+        geometry=[box(0, 0, 1, 1), LineString([(2, 2), (5, 3)]), box(4, -1, 6, 0)],
+        crs=2193,
+    )
+    if file_format == "gpkg":
+        db_path = str(tmp_path / "data.gpkg")
+        gdf.to_file(db_path, layer="building", driver="GPKG")
+        validator = GpkgTopologyValidator({}, False, db_path, "building", "building")
+    else:
+        gdf.to_parquet(tmp_path / "building.parquet")
+        validator = ParquetTopologyValidator({}, False, str(tmp_path / "files.parquet"), "building", "building")
+
+    assert validator.table_estimate("building") == (3, (0.0, -1.0, 6.0, 3.0))
+
+
+def test_tables_whose_estimate_fails_are_planned_as_the_largest(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "data.gpkg")
+    for table, count in (("building", 3), ("road_line", 10)):
+        gpd.GeoDataFrame({"id": range(count)}, geometry=[box(i, 0, i + 1, 1) for i in range(count)], crs=2193).to_file(
+            db_path, layer=table, driver="GPKG"
+        )
+    config_file = tmp_path / "config.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "self_intersect_layers": [
+                    {"table": "building", "layername": "bu", "message": "m"},
+                    {"table": "road_line", "layername": "r", "message": "m"},
+                ]
+            }
+        )
+    )
+    estimate = GpkgTopologyValidator.table_estimate
+
+    def failing_estimate(self, table):
+        if table == "building":
+            raise RuntimeError("no statistics")
+        return estimate(self, table)
+
+    monkeypatch.setattr(GpkgTopologyValidator, "table_estimate", failing_estimate)
+    settings = TopoValidatorSettings(validation_config_file=str(config_file), db_path=db_path, jobs=2)
+
+    assert "building (unknown, taken as 10 rows)" in ValidateDatasetController(settings).explain()
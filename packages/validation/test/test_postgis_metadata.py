@@ -0,0 +1,48 @@
+from shapely import Point
+from sqlalchemy import text
+from topographic_validation.validators import postgis
+from topographic_validation.validators.postgis import PostgisTopologyValidator, get_engine
+
+DB_URL = "postgresql+psycopg://user@localhost/topo"
+
+
+def test_get_engine_is_shared_and_counts_connections() -> None:
+    engine = get_engine("sqlite://")
+    assert get_engine("sqlite://") is engine
+
+    opened = postgis.connections_opened()
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    # The pool hands back the same connection each time
+    assert postgis.connections_opened() == opened + 1
+
+
+def test_validators_use_preloaded_metadata(monkeypatch) -> None:
+    monkeypatch.setitem(
+        postgis._table_metadata,
+        (DB_URL, "topo", "building"),
+        {"pkey": "topo_id", "geom_column": "shape", "columns": ["topo_id", "name", "shape"]},
+    )
+
+    validators = [
+        PostgisTopologyValidator({}, False, DB_URL, "topo.building", "building", output_dir="/tmp") for _ in range(2)
+    ]
+
+    assert validators[0].engine is validators[1].engine
+    assert validators[0].pkey == "topo_id"
+    assert validators[0].geom_column == "shape"
+    assert validators[0].get_columns("topo.building") == ["topo_id", "name", "shape"]
+
+
+def test_query_results_are_streamed_in_chunks() -> None:
+    engine = get_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE streamed (id INTEGER, geom TEXT)"))
+        for i in range(5):
+            connection.execute(text("INSERT INTO streamed VALUES (:id, :geom)"), {"id": i, "geom": Point(i, i).wkb_hex})
+
+    chunks = list(postgis.read_postgis_chunks(engine, "SELECT id, geom FROM streamed", "geom", chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [x for chunk in chunks for x in chunk.geometry.x] == [0, 1, 2, 3, 4]
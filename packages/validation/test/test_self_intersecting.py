@@ -0,0 +1,105 @@
+"""Columnar evaluation of self-intersection candidate pairs."""
+
+import geopandas as gpd
+import pytest
+from shapely import Polygon, box
+from topographic_validation.validators.gpkg import GpkgTopologyValidator
+
+U_SHAPE = Polygon([(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (1, 1), (1, 3), (0, 3)])
+
+
+def _run(geoms: list) -> gpd.GeoDataFrame:
+    validator = GpkgTopologyValidator(
+        summary_report={},
+        export_validation_data=False,
+        db_url="unused.gpkg",
+        table="a",
+        export_layername="a",
+    )
+    validator.gdf = gpd.GeoDataFrame(
+        {
+            "id": list(range(10, 10 + len(geoms))),
+            "name": [f"n{i}" for i in range(len(geoms))],
+        },
+        geometry=geoms,
+        crs=2193,
+    )
+    validator.sindex = validator.gdf.sindex
+    return validator.find_self_intersecting()
+
+
+def test_overlap_is_area_with_pair_attributes():
+    result = _run([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+
+    assert list(result["geometry_type"]) == ["area"]
+    assert result.geometry.iloc[0].equals(box(1, 1, 2, 2))
+    assert list(result["pair_names"]) == ["n0-n1"]
+    assert list(result["pair_keys"]) == ["10-11"]
+    assert list(result["pair_feature_types"]) == ["nofeaturetype-nofeaturetype"]
+
+
+def test_shared_edge_and_corner():
+    result = _run([box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 1, 3, 2)])
+
+    assert sorted(result["geometry_type"]) == ["line", "point"]
+
+
+def test_multipolygon_is_exploded():
+    result = _run([U_SHAPE, box(-1, 2, 4, 2.5)])
+
+    assert list(result["geometry_type"]) == ["multipolygon", "multipolygon"]
+    assert list(result["pair_keys"]) == ["10-11", "10-11"]
+
+
+def test_geometry_collection_parts_are_classified():
+    # Overlaps the left arm of the U and touches the inner edge of the right arm
+    result = _run([U_SHAPE, box(0.5, 2, 2, 2.5)])
+
+    assert sorted(result["geometry_type"]) == ["area", "line"]
+
+
+def test_disjoint_candidates_are_dropped():
+    # Bounding boxes overlap but the geometries do not
+    result = _run([U_SHAPE, box(1.2, 1.5, 1.8, 2.5)])
+
+    assert result.empty
+
+
+def _coverage(geoms: list, gap_width: float = 0) -> gpd.GeoDataFrame:
+    validator = GpkgTopologyValidator(
+        summary_report={}, export_validation_data=False, db_url="unused.gpkg", table="a", export_layername="a"
+    )
+    validator.gdf = gpd.GeoDataFrame({"id": list(range(10, 10 + len(geoms)))}, geometry=geoms, crs=2193)
+    validator.sindex = validator.gdf.sindex
+    return validator.find_coverage_errors(gap_width)
+
+
+def test_valid_coverage_has_no_errors():
+    result = _coverage([box(0, 0, 1, 1), box(1, 0, 2, 1), Polygon([(0, 1), (1, 1), (2, 1), (2, 2), (0, 2)])])
+
+    assert result.empty
+    assert {"pair_keys", "coverage_error", "geometry_type"} <= set(result.columns)
+
+
+def test_coverage_overlap_is_reported_as_edges_and_area():
+    result = _coverage([box(0, 0, 2, 1), box(1, 0, 3, 1), box(5, 0, 6, 1)])
+
+    edges = result[result["coverage_error"] == "invalid_edge"]
+    assert sorted(edges["pair_keys"]) == ["10", "11"]
+    assert set(edges["geometry_type"]) == {"line"}
+    overlaps = result[result["coverage_error"] == "overlap"]
+    assert list(overlaps["pair_keys"]) == ["10-11"]
+    assert overlaps.geometry.iloc[0].normalize().equals(box(1, 0, 2, 1).normalize())
+
+
+def test_coverage_gap_narrower_than_gap_width():
+    # The gap between the two boxes is closed by the polygons above and below them
+    above = Polygon([(0, 1), (1, 1), (1.2, 1), (2, 1), (2, 2), (0, 2)])
+    below = Polygon([(0, -1), (2, -1), (2, 0), (1.2, 0), (1, 0), (0, 0)])
+    geoms = [box(0, 0, 1, 1), box(1.2, 0, 2, 1), above, below]
+    assert _coverage(geoms).empty
+
+    gaps = _coverage(geoms, gap_width=0.5)
+    gap = gaps[gaps["coverage_error"] == "gap"]
+    assert list(gap["pair_keys"]) == ["10-11-12-13"]
+    assert gap.geometry.iloc[0].area == pytest.approx(0.2)
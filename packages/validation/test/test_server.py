@@ -0,0 +1,145 @@
+"""Serve mode validates from tables kept in memory, reloading the tables that change."""
+
+import json
+import os
+import threading
+import urllib.request
+from pathlib import Path
+
+import geopandas as gpd
+import pyogrio
+import pytest
+from shapely import LineString, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.server import ValidationServer, ValidationService
+from topographic_validation.tools import TopoValidatorSettings
+
+CONFIG = {
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "feature_not_on_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+    "null_columns": [{"table": "building", "column": "name", "message": "m"}],
+}
+BBOX = (0.0, 0.0, 30.0, 100.0)
+
+
+def _buildings() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {"id": [1, 2, 3, 4], "name": ["a", None, "c", None]},
+        geometry=[box(0, 0, 10, 10), box(5, 0, 15, 10), box(50, 0, 60, 10), box(55, 0, 65, 10)],
+        crs=2193,
+    )
+
+
+def _write(tmp_path: Path, file_format: str) -> str:
+    layers = {
+        "building": _buildings(),
+        "road_line": gpd.GeoDataFrame({"id": [1]}, geometry=[LineString([(0, 50), (100, 50)])], crs=2193),
+        "bridge_line": gpd.GeoDataFrame(
+            {"id": [1, 2, 3]},
+            geometry=[
+                LineString([(10, 50), (20, 50)]),
+                LineString([(10, 80), (20, 80)]),
+                LineString([(70, 80), (80, 80)]),
+            ],
+            crs=2193,
+        ),
+    }
+    for table, gdf in layers.items():
+        if file_format == "gpkg":
+            gdf.to_file(tmp_path / "data.gpkg", layer=table, driver="GPKG")
+        else:
+            gdf.to_parquet(tmp_path / f"{table}.parquet", write_covering_bbox=True)
+    return str(tmp_path / ("data.gpkg" if file_format == "gpkg" else "files.parquet"))
+
+
+def _service(tmp_path: Path, db_path: str) -> ValidationService:
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(CONFIG))
+    return ValidationService(TopoValidatorSettings(validation_config_file=str(config_file), db_path=db_path))
+
+
+@pytest.mark.parametrize("file_format", ["gpkg", "parquet"])
+def test_bbox_requests_match_runs_reading_the_bbox(tmp_path, file_format):
+    db_path = _write(tmp_path, file_format)
+    service = _service(tmp_path, db_path)
+
+    result = service.validate(bbox=BBOX)
+
+    settings = TopoValidatorSettings(
+        validation_config_file=str(tmp_path / "config.json"),
+        db_path=db_path,
+        output_dir=str(tmp_path / "out"),
+        bbox=BBOX,
+    )
+    controller = ValidateDatasetController(settings)
+    controller.run_validation()
+    expected = {
+        layer: pyogrio.read_info(output, layer=layer)["features"]
+        for output in (tmp_path / "out").glob("topology_*.gpkg")
+        for layer, _ in pyogrio.list_layers(output)
+    }
+    assert {layer: len(collection["features"]) for layer, collection in result["violations"].items()} == expected
+    assert result["summary"] == {
+        key: value for key, value in controller.summary_report.items() if isinstance(value, bool)
+    }
+    assert not list(tmp_path.glob("topology_*.gpkg"))
+
+
+@pytest.mark.parametrize("file_format", ["gpkg", "parquet"])
+def test_only_the_changed_table_is_read_again(tmp_path, file_format):
+    db_path = _write(tmp_path, file_format)
+    service = _service(tmp_path, db_path)
+    assert service.validate("building")["summary"]["self_intersect_layers"] is True
+
+    fixed = _buildings().iloc[[0, 2]]
+    if file_format == "gpkg":
+        fixed.to_file(db_path, layer="building", driver="GPKG")
+    else:
+        fixed.to_parquet(tmp_path / "building.parquet", write_covering_bbox=True)
+    os.utime(db_path if file_format == "gpkg" else tmp_path / "building.parquet", ns=(0, 10**18))
+
+    result = service.validate("building-validation")
+    assert result["reloaded_tables"] == ["building"]
+    assert result["summary"]["self_intersect_layers"] is False
+    assert service.validate("building-validation")["reloaded_tables"] == []
+
+
+def test_http_requests(tmp_path, monkeypatch):
+    server = ValidationServer(("127.0.0.1", 0), _service(tmp_path, _write(tmp_path, "gpkg")))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urllib.request.urlopen(f"{url}/rules") as response:
+            assert [rule["rule"] for rule in json.load(response)] == [
+                "building",
+                "bridges-off-road",
+                "building-validation",
+            ]
+
+        request = urllib.request.Request(
+            f"{url}/validate", data=json.dumps({"rule": "bridges-off-road", "bbox": list(BBOX)}).encode(), method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            result = json.load(response)
+        assert result["rules"] == ["bridges-off-road"]
+        [layer] = result["violations"].values()
+        assert len(layer["features"]) == 1
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/validate?rule=missing")
+        assert error.value.code == 404
+
+        def fail(rule, bbox):
+            raise RuntimeError("table is locked")
+
+        monkeypatch.setattr(server.service, "validate", fail)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/validate")
+        assert error.value.code == 500
+        assert json.load(error.value) == {"error": "Validation failed: table is locked"}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,41 @@
+import pytest
+from topographic_validation.validators.sql_rules import (
+    features_not_on_layer_sql,
+    filtered_table_sql,
+    predicate_sql,
+    self_intersection_sql,
+)
+
+
+def test_filtered_table_sql_skips_empty_conditions() -> None:
+    sql = filtered_table_sql("building", ["topo_id", "geom"], ["feature_type = 'x'", None])
+    assert sql == "SELECT topo_id, geom FROM building WHERE (feature_type = 'x')"
+    assert filtered_table_sql("building", ["geom"], [None]) == "SELECT geom FROM building"
+
+
+def test_predicate_sql_rejects_unknown_predicate() -> None:
+    assert predicate_sql("touches", "a.geom", "b.geom") == "ST_Touches(a.geom, b.geom)"
+    with pytest.raises(ValueError):
+        predicate_sql("crosses", "a.geom", "b.geom")
+
+
+def test_self_intersection_sql_returns_each_pair_once() -> None:
+    sql = self_intersection_sql("SELECT * FROM building", "topo_id", "geom", ["topo_id", "name"])
+    assert "a.topo_id < b.topo_id" in sql
+    assert "a.name AS name_1, b.name AS name_2" in sql
+
+
+def test_self_intersection_sql_joins_the_filtered_table_without_a_cte() -> None:
+    features = filtered_table_sql("building", ["topo_id", "geom"], ["feature_type = 'x'"])
+    sql = self_intersection_sql(features, "topo_id", "geom", ["topo_id"], limit=5)
+    # A CTE referenced on both sides of the join would be materialized, hiding the spatial index
+    assert "WITH" not in sql
+    assert f"FROM ({features}) a JOIN ({features}) b ON" in sql
+    assert sql.endswith("LIMIT 5")
+
+
+def test_features_not_on_layer_sql_uses_not_exists() -> None:
+    sql = features_not_on_layer_sql(
+        "SELECT * FROM bridge", "SELECT geom FROM road", ["topo_id"], "ST_Intersects(a.geom, b.geom)"
+    )
+    assert sql.startswith("SELECT a.topo_id FROM (SELECT * FROM bridge) a WHERE NOT EXISTS")
@@ -0,0 +1,110 @@
+"""Tiled validation reports the same results as one run over the whole extent."""
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+from shapely import LineString, Point, box
+from topographic_validation.controller import ValidateDatasetController
+from topographic_validation.tiles import in_core, tile_grid
+from topographic_validation.tools import TopoValidatorSettings
+
+CONFIG = {
+    "feature_in_layers": [
+        {
+            "table": "building_point",
+            "intersection_table": "building",
+            "layername": "points-in-buildings",
+            "message": "m",
+        }
+    ],
+    "line_not_on_feature_layers": [
+        {"table": "bridge_line", "intersection_table": "road_line", "layername": "bridges-off-road", "message": "m"}
+    ],
+    "self_intersect_layers": [{"table": "building", "layername": "building-validation", "message": "m"}],
+    "null_columns": [{"table": "building_point", "column": "orientation", "message": "m"}],
+}
+
+
+def test_tile_cores_partition_the_extent():
+    cores = tile_grid((0, 0, 250, 100), 100)
+    assert len(cores) == 6
+    assert cores[0] == (0, 0, 100, 100)
+    assert cores[-1] == (200, 100, 300, 200)
+
+    points = gpd.GeoDataFrame(geometry=[Point(100, 50), Point(99.9, 50), Point(250, 100)], crs=2193)
+    owners = np.array([in_core(points, core, 2193) for core in cores])
+    assert (owners.sum(axis=0) == 1).all()
+
+
+def _write_dataset(path: Path) -> str:
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(0, 1000, (60, 2))
+    gpkg = str(path / "data.gpkg")
+    layers: dict[str, list] = {
+        "building": [box(x, y, x + 80, y + 80) for x, y in xy],
+        "building_point": [Point(x + 1, y + 1) for x, y in xy[::2]] + [Point(2000, 2000)],
+        "road_line": [LineString([(x, y), (x + 300, y + 40)]) for x, y in xy[:20]],
+        "bridge_line": [LineString([(x, y), (x + 30, y + 4)]) for x, y in xy[:30]],
+    }
+    for layer, geoms in layers.items():
+        gdf = gpd.GeoDataFrame({"id": range(1, len(geoms) + 1)}, geometry=geoms, crs=2193)
+        if layer == "building_point":
+            gdf["orientation"] = [None if i % 3 == 0 else 90.0 for i in range(len(geoms))]
+        gdf.to_file(gpkg, layer=layer, driver="GPKG")
+    return gpkg
+
+
+def _run(
+    tmp_path: Path, gpkg: str, tile_size: float, bbox: tuple[float, float, float, float] | None = None
+) -> tuple[dict, dict[str, list]]:
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(CONFIG))
+    output_dir = tmp_path / f"out_{tile_size}{'_bbox' if bbox else ''}"
+    settings = TopoValidatorSettings(
+        validation_config_file=str(config_file),
+        db_path=gpkg,
+        output_dir=str(output_dir),
+        export_parquet=True,
+        tile_size=tile_size,
+        bbox=bbox,
+        area_crs=2193,
+    )
+    ValidateDatasetController(settings).run_validation()
+
+    summary = json.loads((output_dir / "validation_summary_report.json").read_text())
+    flags = {key: value for key, value in summary.items() if isinstance(value, bool)}
+    outputs = {}
+    for file in sorted(output_dir.iterdir()):
+        if file.suffix == ".gpkg":
+            for layer in gpd.list_layers(file)["name"]:
+                gdf = gpd.read_file(file, layer=layer)
+                outputs[f"{file.name}:{layer}"] = sorted(gdf.geometry.normalize().to_wkt())
+        elif file.suffix == ".parquet":
+            outputs[file.name] = sorted(gpd.read_parquet(file).geometry.normalize().to_wkt())
+    return flags, outputs
+
+
+def test_tiled_run_matches_untiled_run(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+
+    untiled = _run(tmp_path, gpkg, tile_size=0)
+    tiled = _run(tmp_path, gpkg, tile_size=150)
+
+    assert tiled == untiled
+    assert len(untiled[1]["building-validation_topology_self_intersect.parquet"]) > 10
+    assert not (tmp_path / "out_150" / "_staging").exists()
+
+
+def test_tiled_bbox_run_keeps_results_beyond_the_bbox(tmp_path):
+    gpkg = _write_dataset(tmp_path)
+    bbox = (200.0, 200.0, 700.0, 700.0)
+
+    untiled = _run(tmp_path, gpkg, tile_size=0, bbox=bbox)
+    tiled = _run(tmp_path, gpkg, tile_size=150, bbox=bbox)
+
+    assert tiled == untiled
+    # Intersections of buildings crossing the edge of the bbox lie partly beyond it
+    bounds = gpd.GeoSeries.from_wkt(untiled[1]["building-validation_topology_self_intersect.parquet"]).total_bounds
+    assert bounds[0] < bbox[0] or bounds[1] < bbox[1] or bounds[2] > bbox[2] or bounds[3] > bbox[3]